@@ -9,16 +9,18 @@
 # Standard Library Imports
 # ==============================================================================
 
+import argparse
 import asyncio
 import concurrent.futures
+import copy
 import logging
 import os
 import re
 import signal
 import sys
+import tempfile
 import time
-from functools import partial
-from typing import Optional, Final, Tuple, Awaitable, List, Dict, Iterable
+from typing import Optional, Final, Tuple, Awaitable, List, Dict, Union
 
 # ==============================================================================
 # Third-Party Imports
@@ -27,12 +29,11 @@ from typing import Optional, Final, Tuple, Awaitable, List, Dict, Iterable
 import cv2
 import numpy as np
 import pandas as pd
-import plotly.express as px
+from plotly.graph_objects import Figure
 import undetected_chromedriver as uc
 import yaml
 from dotenv import load_dotenv
 from fake_useragent import UserAgent
-from paddleocr import PaddleOCR
 from selenium.common.exceptions import NoAlertPresentException
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.by import By
@@ -45,15 +46,36 @@ from webdriver_manager.chrome import ChromeDriverManager
 # Local Imports
 # ==============================================================================
 
-from Notifiers import send_line, send_mail, short_msg
+from Benchtools import bench_ocr, bench_parser, build_corpus_templates, format_confusion, format_stages, format_table
+from Charttools import ChartCache, ChartRenderer, build_figures, chart_html_paths, chart_key, write_charts_html
+from Fetchtools import ScheduleClient, export_session, extract_dom_table, extract_table
+from Imagetools import prepare_attachments
+from Mocktools import MockPortal
+from Notifiers import MailTransport, mail_transport, send_line, send_mail, short_msg
+from Ocrtools import OcrClient, OcrPool, harvest_captcha, load_ocr_settings, ocr_server_address, serve_ocr
+from Outboxtools import Outbox
+from Parsetools import TimetableRow, parse_rows
+from Sessiontools import SessionStore
 from Sqltools import MyPsql
+from Telemetrytools import TELEMETRY_DEFAULTS, Telemetry
+from Termtools import FingerprintStore, fingerprint, is_recent
+from Xlsxtools import WorkbookSink
 
 # ==============================================================================
 # Constants
 # ==============================================================================
 
 LOG_FILENAME: Final[str] = "Asyncio.log"
-EXCLUDED_KEYWORDS: Final[set] = {"遠", "健康", "電影", "音樂"}
+XLSX_FILENAME: Final[str] = "schedule.xlsx"
+CHART_CACHE_FILENAME: Final[str] = "chart_cache.json"
+CHART_NAMES: Final[Tuple[str, ...]] = ("courses_pie", "courses_bar")
+# Everything that shapes the charts besides the data; part of the chart cache key.
+CHART_SETTINGS: Final[Dict] = {
+    "columns": ["Courses", "Credit course"],
+    "pie_title": "Course Distribution",
+    "bar_title": "Course Statistics Bar Chart",
+    "bar_tickangle": -45,
+}
 
 # ==============================================================================
 # Global Variables
@@ -67,16 +89,33 @@ password: Optional[str] = None
 
 # Core components (loaded from config.yaml or initialized at runtime)
 driver: Optional[uc.Chrome] = None
-ocr_model: Optional[PaddleOCR] = None
+ocr_model: Optional[Union[OcrPool, OcrClient]] = None
+ocr_settings: Optional[Dict] = None
+# Screenshot and answer of the captcha being submitted, harvested once the login is confirmed.
+pending_captcha: Optional[Tuple[bytes, str]] = None
 console_log: Optional[logging.Logger] = None
 psql: Optional[MyPsql] = None
+session_store: Optional[SessionStore] = None
+fingerprints: Optional[FingerprintStore] = None
+workbook: WorkbookSink = WorkbookSink(XLSX_FILENAME)
+# Rows of every stored term, merged into the database at once by flush_db().
+pending_rows: List[Tuple[str, ...]] = []
+chart_cache: ChartCache = ChartCache(CHART_CACHE_FILENAME)
+chart_renderer: Optional[ChartRenderer] = None
+# Spans and event-loop lag of this run, exported by export_telemetry().
+telemetry: Telemetry = Telemetry()
 
 # Configuration parameters (loaded from config.yaml)
 max_retry: Optional[int] = None
 url: Optional[str] = None
 img_path: Optional[str] = None
+fetch_configs: Dict = {}
+chart_configs: Dict = {}
+notify_configs: Dict = {}
+attachment_configs: Dict = {}
+telemetry_configs: Dict = {}
 
-# Thread pool for async operations
+# Thread pool for async operations (OCR runs in its own process pool, see setup_ocr)
 thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers = 4)
 
 # ==============================================================================
@@ -130,14 +169,39 @@ def signal_handler(sig, frame) -> None:
     sys.exit(0)
 
 
+@telemetry.timed("setup_ocr")
 def setup_ocr() -> None:
-    global ocr_model
+    # setup_ocr() runs concurrently with setup_env(), so it reads its own section of config.yaml
+    # in the same way setup_driver() does.
+    # A running "ocr-server" is preferred, since its model is already resident.
+    # Otherwise OCR falls back to an in-process worker pool.
+    global ocr_model, ocr_settings
 
     try:
-        ocr_model = PaddleOCR(use_textline_orientation = True, lang = "en")
+        with open("config.yaml", "r", encoding="utf-8-sig") as yaml_f:
+            configs = yaml.safe_load(yaml_f)
+
+            ocr_configs: Dict = configs.get("ocr", {})
+            settings: Dict = load_ocr_settings(ocr_configs, configs["general"]["img_path"])
+            ocr_settings = settings
+
+        client = OcrClient(ocr_server_address(ocr_configs.get("server", {})))
+        try:
+            client.warm_up()
+            ocr_model = client
+            console_log.info("Ocr server connected success.")
+            return
+        except OSError as oe:
+            console_log.debug(f"Ocr server unavailable, using local workers : {oe}")
+
+        ocr_model = OcrPool(settings, max_workers = ocr_configs.get("workers", 2))
+        ocr_model.warm_up()
         console_log.info("Ocr model initialized success.")
     except Exception as e:
         console_log.error(f"Setup ocr fail : {e}")
+        if ocr_model:
+            ocr_model.shutdown()
+        ocr_model = None
 
 
 def check_acc_pwd(account: str, password: str) -> Optional[Tuple[str, str]]: 
@@ -158,8 +222,10 @@ def check_acc_pwd(account: str, password: str) -> Optional[Tuple[str, str]]:
         console_log.error(f"Check acc and pwd fail : {e}")
 
 
+@telemetry.timed("setup_env")
 def setup_env() -> None:
-    global account, password, url, max_retry, img_path
+    global account, password, url, max_retry, img_path, fetch_configs, session_store, fingerprints
+    global chart_configs, chart_renderer, notify_configs, attachment_configs
 
     try:
         load_dotenv()
@@ -174,12 +240,39 @@ def setup_env() -> None:
             max_retry = configs["general"]["max_retry"]
             url = configs["general"]["url"]
             img_path = configs["general"]["img_path"]
+            fetch_configs = configs.get("fetch", {})
+            session_configs: Dict = configs.get("session", {})
+            chart_configs = configs.get("charts", {})
+            notify_configs = configs.get("notify", {})
+            attachment_configs = configs.get("attachments", {})
+
+        chart_renderer = ChartRenderer(
+            chart_configs.get("backend", "kaleido"),
+            max_workers = chart_configs.get("workers", 2),
+            width = chart_configs.get("width", 1200),
+            height = chart_configs.get("height", 700),
+            scale = chart_configs.get("scale", 1)
+        )
+        if not chart_renderer.available:
+            console_log.info("Chart render backend unavailable, charts are exported through the browser.")
+
+        fingerprints = FingerprintStore(
+            fetch_configs.get("fingerprints", "./fingerprints.json"),
+            stale_after = fetch_configs.get("stale_after", 604800)
+        )
+
+        if session_configs.get("enabled", True):
+            session_store = SessionStore(
+                session_configs.get("path", "./session.bin"),
+                max_age = session_configs.get("max_age", 1800)
+            )
 
         console_log.info("Environment variables initialized success.")
     except Exception as e:
         console_log.error(f"Setup env fail : {e}")
 
 
+@telemetry.timed("setup_driver")
 def setup_driver() -> None:
     global driver
 
@@ -202,6 +295,22 @@ def setup_driver() -> None:
         console_log.error(f"Driver initialized fail : {e}")
 
 
+def setup_telemetry() -> None:
+    # Called first in main(), inside the event loop, so the loop-lag sampler covers the whole run.
+    global telemetry_configs
+
+    try:
+        with open("config.yaml", "r", encoding="utf-8-sig") as yaml_f:
+            configs = yaml.safe_load(yaml_f)
+
+            telemetry_configs = {**TELEMETRY_DEFAULTS, **(configs.get("telemetry") or {})}
+
+        if telemetry_configs["enabled"]:
+            telemetry.start_sampler(telemetry_configs["lag_interval"], telemetry_configs["stall_threshold"])
+    except Exception as e:
+        console_log.error(f"Setup telemetry fail : {e}")
+
+
 def analysis_element(by: By, value: str, mode: str = "clickable") -> Optional[WebElement]:
     try:
         match mode:
@@ -220,68 +329,23 @@ def analysis_element(by: By, value: str, mode: str = "clickable") -> Optional[We
         console_log.error(f"Analysis element fail : {e}")
 
 
-def ocr_img_sync(element: WebElement) -> Optional[str]:
-    captcha_path: str = os.path.join(img_path, "captcha.png")
-    denoising_path: str = os.path.join(img_path, "denoising.png")
-    dilate_path: str = os.path.join(img_path, "dilate.png")
+@telemetry.timed("ocr")
+async def ocr_img_async(element: WebElement) -> Optional[str]:
+    # The screenshot is a WebDriver round trip, so it runs in a background thread.
+    # Preprocessing and inference run in the OCR process pool to avoid blocking the event loop.
+    global pending_captcha
 
     try:
         # Some numbers are difficult to recognize.
-        element.screenshot(captcha_path)
-        parser_content: str = ""
-
-        # Image preprocessing.
-        captcha_img: np.ndarray = cv2.imread(captcha_path, cv2.IMREAD_GRAYSCALE)
-        _ , captcha_img = cv2.threshold(captcha_img, 20, 255, cv2.THRESH_BINARY)
-        cv2.imwrite(denoising_path, captcha_img)
-
-        # Define kernel and preprocess the denoised image.
-        #     - For common numbers, a kernel of np.ones((2, 3), np.uint8) works best.
-        #     - For the number 1, a kernel of (3, 5) is more effective.
-        #     - Numbers 3 and 4 are prone to failure due to their severe curvature.
-        #
-        # Note:
-        #     - Testing on different computers shows that recognition performance can still vary,
-        #         even with identical CPUs and GPUs.
-        #     - Running without browser headless mode is recommended, 
-        #         as headless rendering can affect image resolution and 
-        #         make it very difficult for PaddleOCR to recognize text.
+        png_bytes: bytes = await asyncio.to_thread(lambda: element.screenshot_as_png)
+        parser_content, confidence = await ocr_model.recognize(png_bytes)
 
-        # There is no one-size-fits-all solution.
-        # Try incrementing or decrementing the value by 1~2.
-        kernel: np.ndarray = np.ones((2, 3), np.uint8)
-
-        denoising_img: np.ndarray = cv2.imread(denoising_path, cv2.IMREAD_GRAYSCALE)
-        denoising_img = cv2.bitwise_not(denoising_img)
-
-        dilated_img: np.ndarray = cv2.dilate(denoising_img, kernel, iterations=1)
-        dilated_img = cv2.bitwise_not(dilated_img)
-
-        cv2.imwrite(dilate_path, dilated_img)
-
-        results: List[Dict] = ocr_model.predict(dilate_path)
-
-        # Analyze results data.
-        parser_content = "".join(results[-1]["rec_texts"])
-
-        if len(parser_content) == 5:
-            console_log.info(f"OCR captcha success recognized : {parser_content}")
+        if parser_content:
+            console_log.info(f"OCR captcha success recognized : {parser_content} ({confidence:.2f})")
+            pending_captcha = (png_bytes, parser_content)
             return parser_content
         else:
-            console_log.warning(f"OCR fail : {parser_content}")
-    except Exception as e:
-        console_log.error(f"OCR img fail : {e}")
-
-
-async def ocr_img_async(element: WebElement) -> Optional[str]:
-    # Runs a synchronous OCR task in a background thread to avoid blocking the event loop.
-    try:
-        loop = asyncio.get_event_loop()
-        result: Optional[str] = await loop.run_in_executor(
-            thread_pool, 
-            partial(ocr_img_sync, element)
-        )
-        return result
+            console_log.warning("OCR fail : no candidate yields 5 digits.")
     except Exception as e:
         console_log.error(f"OCR async execution fail : {e}")
 
@@ -369,6 +433,7 @@ def alert_handler() -> Optional[bool]:
         pass
 
 
+@telemetry.timed("login_attempt")
 async def login_attempt() -> Optional[bool]:
     try:
         console_log.info("Start to concurrent operations...")
@@ -411,6 +476,9 @@ async def login_attempt() -> Optional[bool]:
 
         if "news.asp" in driver.current_url:
             console_log.info("Login success.")
+            # The portal accepted the answer, so its glyphs are safe to keep as templates.
+            if ocr_settings and pending_captcha and pending_captcha[1] == captcha_code:
+                await asyncio.to_thread(harvest_captcha, *pending_captcha, ocr_settings)
             return True
         else:
             console_log.warning("Login fail.")
@@ -435,6 +503,20 @@ async def login_page() -> Optional[bool]:
         console_log.error(f"Login page fail : {e}")
 
 
+@telemetry.timed("restore_session")
+async def restore_session() -> Optional[bool]:
+    # One navigation to news.asp with the cached cookies instead of a full login.
+    if not session_store:
+        return
+    return await asyncio.to_thread(session_store.restore, driver, url)
+
+
+async def cache_session() -> None:
+    if session_store:
+        await asyncio.to_thread(session_store.save, driver)
+
+
+@telemetry.timed("navigate")
 def navigate_to_course() -> None:
     try:
         # Executing it twice is to resolve the advertising pop-up when loggin success.
@@ -454,98 +536,140 @@ def navigate_to_course() -> None:
         console_log.error(f"Navigate to course fail : {e}")
 
 
-def check_no_data_error() -> bool:
-    return analysis_element(By.CLASS_NAME, "error-container", "presence") is not None
+async def store_xlsx(year: str, semester: str, 
+                        time_datas: Tuple[str], courses_info: List[TimetableRow]) -> Optional[bool]:
+    # Only queued here, the workbook is written once by flush_xlsx() after every term has been parsed.
+    try:
+        workbook.add(f"{year}-{semester}", pd.DataFrame(courses_info, columns = time_datas))
+        return True
+    except Exception as e:
+        console_log.error(f"Store xlsx {year}-{semester} timetable fail: {e}")
+
+
+@telemetry.timed("flush_xlsx")
+async def flush_xlsx() -> Optional[bool]:
+    return await asyncio.to_thread(workbook.flush)
 
 
-def parse_row(html_str: str) -> list[str]:
-    # Algorithm updated to handle inconsistent webpage structures.
-    # Previously, the data rows were split into a fixed length of 28 elements.
-    # However, current HTML updates introduce "noise elements" (e.g., Remote Learning or specific course categories), causing row lengths to fluctuate between 28 and 30.
-    # To normalize the data, we now use a set-based exclusion filter. This ensures that extraneous tags are stripped out before parsing, maintaining the integrity of the 5-step indexing logic:
-    # Before : 
-    #   - parts: List[str] = html.split("<br>")[:-10]
-    # After :
-    #   - EXCLUDED_KEYWORDS: set = {"遠", "健康", "電影", "音樂"} 
-    #   - parts: List[str] = [p for p in html.split("<br>")[:-10] if not any(keyword in p for keyword in EXCLUDED_KEYWORDS)]
+async def store_db(year: str, semester: str, courses_info: List[TimetableRow]) -> Optional[bool]:
+    # Only queued here, like store_xlsx(); flush_db() merges every term in one transaction.
     try:
-        html: str = html_str.replace("\u3000", "空堂<br>" * 4).replace("</td><td>", "<br>")
-        html: str = re.sub(r"<(?!br).*?>", "", html)
+        pending_rows.extend((f"{year}-{semester}", *row) for row in courses_info)
+        return True
+    except Exception as e:
+        console_log.error(f"Store db {year}-{semester} fail: {e}")
 
-        parts: List[str] = [
-            p for p in html.split("<br>")[:-10] 
-            if not any(keyword in p for keyword in EXCLUDED_KEYWORDS)
-        ]
-        time_range:str = f"{parts[1]}-{parts[2]}"
 
-        courses: List[str] = []
-        for _ in range(3, len(parts), 5):
-            course_name = "空堂 - Free Period" if "空堂" in parts[_] else f"{parts[_]} - {parts[_+1]}"
-            courses.append(course_name)
+@telemetry.timed("flush_db")
+async def flush_db() -> Optional[bool]:
+    if not pending_rows:
+        return True
 
-        return [time_range, *courses]
-    except Exception as e:
-        console_log.error(f"Parse row fail : {e}")
+    counts: Optional[Dict[str, int]] = await psql.bulk_upsert_sql(pending_rows)
+    if counts is None:
+        return
 
+    pending_rows.clear()
+    return True
 
-async def store_xlsx(year: str, semester: str, 
-                        time_datas: Tuple[str], html_datas: Tuple[str]) -> None:
-    try:
-        courses_info: Tuple[Tuple[str]]  = tuple(parse_row(html) for html in html_datas)
-        df = pd.DataFrame(courses_info, columns = time_datas)
 
-        if not os.path.exists("schedule.xlsx"):
-            mode = "w"
-            sheet_exists = None
-        else:
-            mode = "a"
-            sheet_exists = "replace"
+def should_visit(year_text: str, semester_text: str) -> bool:
+    # Incremental mode only visits current / upcoming terms and the terms the fingerprint store asks for.
+    if not fetch_configs.get("incremental") or not fingerprints:
+        return True
 
-        with pd.ExcelWriter("schedule.xlsx", mode = mode, engine = "openpyxl", if_sheet_exists = sheet_exists) as writer:
-            df.to_excel(writer, sheet_name = f"{year}-{semester}", index = False)
-    except Exception as e:
-        console_log.error(f"Store xlsx {year}-{semester} timetable fail: {e}")
+    term: str = f"{year_text}-{semester_text}"
+    return is_recent(term) or fingerprints.needs_visit(term)
 
 
-async def store_db(year: str, semester: str, 
-                    time_datas: Tuple[str], html_datas: Tuple[str]) -> None:
-    try:
-        courses_info: Tuple[Tuple[str]]  = tuple(
-            (f"{year}-{semester}", *(parse_row(html))) for html in html_datas
-        )
+def no_schedule(year_text: str, semester_text: str) -> None:
+    # Empty terms are fingerprinted too, so incremental mode does not revisit old empty terms every run.
+    console_log.info(f"There is no schedule : {year_text} - {semester_text}")
+    if fingerprints:
+        fingerprints.record(f"{year_text}-{semester_text}", "")
 
-        await psql.upsert_sql(f"{year}-{semester}", courses_info)
-    except Exception as e:
-        console_log.error(f"Store db {year}-{semester} fail: {e}")
 
+def check_term(year_text: str, semester_text: str,
+                time_datas: Tuple[str], rows_html: Tuple[str]) -> Optional[Tuple[List[TimetableRow], str]]:
+    # Rows are parsed once for both stores and fingerprinted.
+    # Returns None when parsing fails or the term is unchanged since the last run,
+    # in which case store_xlsx, store_db and timetable_pic are all skipped.
+    term: str = f"{year_text}-{semester_text}"
 
-async def store_with(year_text: str, semester_text: str) -> None:
     try:
-        time_headers: List[WebElement] = driver.find_elements(By.CSS_SELECTOR, "table.table-bordered > thead > tr > th")
-        time_datas: Tuple[str] = ("", *(header.text for header in time_headers[1:6]))
+        with telemetry.span("parse", term = term):
+            courses_info: List[TimetableRow] = parse_rows(rows_html)
+    except Exception as e:
+        console_log.error(f"Parse rows {term} fail : {e}")
+        return
+
+    digest: str = fingerprint(time_datas, courses_info)
+    if fingerprints and os.path.exists(XLSX_FILENAME) and fingerprints.unchanged(term, digest):
+        fingerprints.touch(term)
+        console_log.info(f"Term {term} unchanged, skip storing.")
+        return
+
+    return courses_info, digest
 
-        rows: List[WebElement] = driver.find_elements(By.CSS_SELECTOR, 'table.table-bordered > tbody > tr')[11:15]
-        rows_html: Tuple[str] = tuple(row.get_attribute('outerHTML') for row in rows)
 
-        await asyncio.gather(
-            store_xlsx(year_text, semester_text, time_datas, rows_html),
-            store_db(year_text, semester_text, time_datas, rows_html)
+async def store_table(year_text: str, semester_text: str, time_datas: Tuple[str],
+                        courses_info: List[TimetableRow], digest: Optional[str] = None) -> None:
+    with telemetry.span("store", term = f"{year_text}-{semester_text}"):
+        results: List[Optional[bool]] = await asyncio.gather(
+            store_xlsx(year_text, semester_text, time_datas, courses_info),
+            store_db(year_text, semester_text, courses_info)
         )
-    except Exception as e:
-        console_log.error(f"Store with fail: {e}")
+
+    # Only a fully stored term is fingerprinted, a failed store is retried on the next run.
+    if fingerprints and digest and all(results):
+        fingerprints.record(f"{year_text}-{semester_text}", digest)
+
+
+def scrape_table(year_text: str, semester_text: str) -> Dict:
+    # Previously every header.text and row.get_attribute("outerHTML") was its own WebDriver round trip,
+    # plus the error-container lookup and the element lookups of timetable_pic().
+    # A single injected script now returns the headers, rows, no-data flag and table bounding box.
+    with telemetry.span("scrape", term = f"{year_text}-{semester_text}"):
+        table: Dict = extract_dom_table(driver)
+    table["time_datas"] = ("", *table["headers"])
+    table["rows_html"] = tuple(table["rows"])
+    return table
 
 
-def timetable_pic(year: str, semester: str) -> None:
+def _crop_timetable(table: Dict, schedule_path: str) -> bool:
+    # Crop the timetable out of one viewport screenshot using the bounding box from scrape_table().
+    # Only possible when the whole table is inside the viewport, otherwise the caller falls back.
+    rect: Optional[Dict] = table.get("rect")
+    viewport: Dict = table.get("viewport", {})
+    if not rect or rect["x"] < 0 or rect["y"] < 0 \
+            or rect["x"] + rect["width"] > viewport.get("width", 0) \
+            or rect["y"] + rect["height"] > viewport.get("height", 0):
+        return False
+
+    png: np.ndarray = cv2.imdecode(np.frombuffer(driver.get_screenshot_as_png(), np.uint8), cv2.IMREAD_COLOR)
+    dpr: float = table.get("dpr", 1)
+    left, top = int(rect["x"] * dpr), int(rect["y"] * dpr)
+    right, bottom = int((rect["x"] + rect["width"]) * dpr), int((rect["y"] + rect["height"]) * dpr)
+
+    return cv2.imwrite(schedule_path, png[top:bottom, left:right])
+
+
+def timetable_pic(year: str, semester: str, table: Optional[Dict] = None) -> None:
     schedule_path: str = os.path.join(img_path, f"schedule_info_{year}-{semester}.png")
 
     try:
-        # Using screenshot take timetable of mine.
-        bottom: WebElement = analysis_element(By.CLASS_NAME, "bolder", "presence")
-        table_border: WebElement = analysis_element(By.CLASS_NAME, "table-bordered", "presence")
-
-        driver.execute_script("arguments[0].scrollIntoView();", bottom)
-        table_border.screenshot(schedule_path)
-        console_log.info(f"Take a picture of {year}-{semester} timetable success.")
+        with telemetry.span("screenshot", term = f"{year}-{semester}"):
+            if table and _crop_timetable(table, schedule_path):
+                console_log.info(f"Take a picture of {year}-{semester} timetable success.")
+                return
+
+            # Using screenshot take timetable of mine.
+            bottom: WebElement = analysis_element(By.CLASS_NAME, "bolder", "presence")
+            table_border: WebElement = analysis_element(By.CLASS_NAME, "table-bordered", "presence")
+
+            driver.execute_script("arguments[0].scrollIntoView();", bottom)
+            table_border.screenshot(schedule_path)
+            console_log.info(f"Take a picture of {year}-{semester} timetable success.")
     except Exception as e:
         console_log.error(f"Take a picture of {year}-{semester} timetable fail : {e}")
 
@@ -570,57 +694,231 @@ async def parse_schedule() -> None:
                 semester_select.select_by_index(semester_idx)
                 current_semester_text: str = semester_select.first_selected_option.text
 
+                if not should_visit(current_year_text, current_semester_text):
+                    continue
+
                 await asyncio.sleep(time_counter())
 
                 button: Optional[WebElement] = analysis_element(By.CLASS_NAME, "btn-info")
                 send_click_to_element(button)
                 await asyncio.sleep(time_counter())
 
-                if check_no_data_error():
-                    console_log.info(f"There is no schedule : {current_year_text} - {current_semester_text}")
+                table: Dict = scrape_table(current_year_text, current_semester_text)
+                if table["no_data"]:
+                    no_schedule(current_year_text, current_semester_text)
+                    continue
+
+                checked: Optional[Tuple[List[TimetableRow], str]] = check_term(
+                    current_year_text, current_semester_text, table["time_datas"], table["rows_html"]
+                )
+                if not checked:
                     continue
 
                 await asyncio.gather(
-                    store_with(current_year_text, current_semester_text),
-                    asyncio.to_thread(timetable_pic, current_year_text, current_semester_text)
+                    store_table(current_year_text, current_semester_text, table["time_datas"], *checked),
+                    asyncio.to_thread(timetable_pic, current_year_text, current_semester_text, table)
                 )
     except Exception as e:
         console_log.error(f"Parse schedule fail : {e}")
 
 
-def save_chart_as_html(data: pd.DataFrame) -> None:
+def _on_tab(handle: str, func, *args):
+    # Every WebDriver command targets the current window, so switch first.
+    driver.switch_to.window(handle)
+    return func(*args)
+
+
+def _open_tabs(count: int) -> List[str]:
+    # Open extra tabs on the course page in the same authenticated session.
+    # A tab whose direct load does not show the course form replays navigate_to_course(),
+    # and is closed if it still cannot reach it.
+    handles: List[str] = [driver.current_window_handle]
+    course_url: str = driver.current_url
+
+    for _ in range(count - 1):
+        driver.switch_to.new_window("tab")
+        driver.get(course_url)
+
+        if not analysis_element(By.NAME, "CosYear", "presence"):
+            navigate_to_course()
+
+        if not analysis_element(By.NAME, "CosYear", "presence"):
+            console_log.warning("Open course tab fail, closing it.")
+            driver.close()
+            driver.switch_to.window(handles[0])
+            continue
+
+        handles.append(driver.current_window_handle)
+
+    driver.switch_to.window(handles[0])
+    return handles
+
+
+def _close_tabs(handles: List[str]) -> None:
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+
+
+def _submit_term(year_idx: int, semester_idx: int) -> Tuple[str, str]:
+    # Elements are fetched fresh in the current tab on every call, so no stale reference is reused.
+    year_select: Select = Select(analysis_element(By.NAME, "CosYear"))
+    year_select.select_by_index(year_idx)
+    year_text: str = year_select.first_selected_option.text
+
+    semester_select: Select = Select(analysis_element(By.NAME, "CosSmtr"))
+    semester_select.select_by_index(semester_idx)
+    semester_text: str = semester_select.first_selected_option.text
+
+    send_click_to_element(analysis_element(By.CLASS_NAME, "btn-info"))
+    return year_text, semester_text
+
+
+def _collect_term(year_text: str, semester_text: str) -> Optional[Tuple[Dict, Tuple[List[TimetableRow], str]]]:
+    table: Dict = scrape_table(year_text, semester_text)
+    if table["no_data"]:
+        no_schedule(year_text, semester_text)
+        return
+
+    checked: Optional[Tuple[List[TimetableRow], str]] = check_term(
+        year_text, semester_text, table["time_datas"], table["rows_html"]
+    )
+    if not checked:
+        return
+
+    timetable_pic(year_text, semester_text, table)
+    return table, checked
+
+
+async def _scrape_tab(handle: str, work_items: List[Tuple[int, int]], driver_lock: asyncio.Lock) -> None:
+    # One worker per tab.
+    # The driver itself only talks to one tab at a time, so commands are serialized by driver_lock,
+    # but the slow part (the portal answering and the tab rendering) overlaps across tabs:
+    # while one tab loads its term, the other workers submit or scrape theirs.
+    while work_items:
+        year_idx, semester_idx = work_items.pop(0)
+
+        try:
+            async with driver_lock:
+                year_text, semester_text = await asyncio.to_thread(
+                    _on_tab, handle, _submit_term, year_idx, semester_idx
+                )
+
+            await asyncio.sleep(time_counter())
+
+            async with driver_lock:
+                collected = await asyncio.to_thread(_on_tab, handle, _collect_term, year_text, semester_text)
+
+            if collected:
+                table, checked = collected
+                await store_table(year_text, semester_text, table["time_datas"], *checked)
+        except Exception as e:
+            console_log.error(f"Scrape tab term {year_idx}-{semester_idx} fail : {e}")
+
+
+async def parse_schedule_tabs(tabs: int) -> None:
+    # Multi-tab mode of parse_schedule():
+    # (year, semester) work items are shared by N tabs of the same logged-in browser, no re-login needed.
+    handles: List[str] = []
+
     try:
-        data.columns: List[str] = ["Courses", "Credit course"]
+        # Option texts are read up front, so incremental mode can drop terms before any tab submits them.
+        year_texts: List[str] = [option.text for option in Select(analysis_element(By.NAME, "CosYear")).options]
+        semester_texts: List[str] = [option.text for option in Select(analysis_element(By.NAME, "CosSmtr")).options]
+        work_items: List[Tuple[int, int]] = [
+            (year_idx, semester_idx)
+            for year_idx in range(len(year_texts)) for semester_idx in range(2)
+            if should_visit(year_texts[year_idx], semester_texts[semester_idx])
+        ]
+        if not work_items:
+            console_log.info("No term to visit.")
+            return
 
-        courses_pie = px.pie(
-            data,
-            names = "Courses",
-            values = "Credit course",
-            title = "Course Distribution"
-            )
-        courses_pie.write_html("courses_pie.html")
-
-        courses_bar = px.bar(
-            data,
-            x = "Courses",
-            y = "Credit course",
-            title = "Course Statistics Bar Chart",
-            text = "Credit course"
+        handles = await asyncio.to_thread(_open_tabs, max(1, min(tabs, len(work_items))))
+        console_log.info(f"Scrape {len(work_items)} terms with {len(handles)} tabs.")
+
+        driver_lock = asyncio.Lock()
+        await asyncio.gather(*(_scrape_tab(handle, work_items, driver_lock) for handle in handles))
+    except Exception as e:
+        console_log.error(f"Parse schedule tabs fail : {e}")
+    finally:
+        if handles:
+            await asyncio.to_thread(_close_tabs, handles)
+
+
+async def _fetch_term(client: ScheduleClient, year: Tuple[str, str], semester: Tuple[str, str]) -> str:
+    # year / semester are (value, text) pairs from ScheduleClient.terms().
+    with telemetry.span("fetch_term", term = f"{year[1]}-{semester[1]}"):
+        return await client.fetch_term(year[0], semester[0])
+
+
+@telemetry.timed("fetch_http")
+async def parse_schedule_http() -> Optional[bool]:
+    # HTTP mode of parse_schedule():
+    # The authenticated cookies and the course-query form are exported from the driver once,
+    # then every term is requested concurrently over one pooled HTTP session,
+    # replacing seconds of browser rendering per term with a single request.
+    # Returns None when the form cannot be exported, so the caller can fall back to browser mode.
+    try:
+        session_info: Optional[Dict] = await asyncio.to_thread(export_session, driver)
+        if not session_info:
+            console_log.warning("Export course form fail, fallback to browser mode.")
+            return
+
+        async with ScheduleClient(
+            session_info,
+            concurrency = fetch_configs.get("concurrency", 4),
+            timeout = fetch_configs.get("timeout", 15)
+        ) as client:
+            terms: List[Tuple[Tuple[str, str], Tuple[str, str]]] = [
+                (year, semester) for year, semester in client.terms() if should_visit(year[1], semester[1])
+            ]
+            htmls: List = await asyncio.gather(
+                *(_fetch_term(client, year, semester) for year, semester in terms),
+                return_exceptions = True
             )
-        courses_bar.update_layout(
-            title = {
-                "text"   : "Course Statistics Bar Chart",
-                "x"      : 0.5,
-                },
-            xaxis_tickangle = -45
+
+        for ((_, year_text), (_, semester_text)), html in zip(terms, htmls):
+            if isinstance(html, Exception):
+                console_log.error(f"Fetch {year_text}-{semester_text} fail : {html}")
+                continue
+
+            with telemetry.span("scrape", term = f"{year_text}-{semester_text}"):
+                time_datas, rows_html, no_data = extract_table(html)
+            if no_data:
+                no_schedule(year_text, semester_text)
+                continue
+
+            checked: Optional[Tuple[List[TimetableRow], str]] = check_term(
+                year_text, semester_text, time_datas, rows_html
             )
-        courses_bar.write_html("courses_bar.html")
+            if checked:
+                await store_table(year_text, semester_text, time_datas, *checked)
+
+        console_log.info(f"Fetch {len(terms)} terms over http success.")
+        return True
+    except Exception as e:
+        console_log.error(f"Parse schedule http fail : {e}")
+
+
+def save_chart_as_html(figures: Dict[str, Figure]) -> Optional[bool]:
+    try:
+        write_charts_html(figures, chart_configs.get("html", "dashboard"))
+        return True
     except Exception as e:
         console_log.error(f"Save chart as html fail : {e}")
 
 
-def export_html_chart_as_image(data_name: str) -> None:
+def _screenshot_plot(data_name: str, selector: str) -> Optional[bool]:
     image_path: str = os.path.join(img_path, f"{data_name}.png")
+    plot: Optional[WebElement] = analysis_element(By.CSS_SELECTOR, selector)
+    plot.screenshot(image_path)
+    console_log.info(f"Export {data_name}.png chart success.")
+    return True
+
+
+def export_html_chart_as_image(data_name: str) -> Optional[bool]:
     html_path: str = os.path.join(".",f"{data_name}.html")
     url = f"file:///{os.path.abspath(html_path)}"
 
@@ -629,46 +927,146 @@ def export_html_chart_as_image(data_name: str) -> None:
             raise ValueError(f"HTML file was created fail : {html_path}")
 
         driver.get(url)
-        plot: Optional[WebElement] = analysis_element(By.CSS_SELECTOR, "div.js-plotly-plot")
-        plot.screenshot(image_path)
-        console_log.info(f"Export {data_name}.png chart success.")
+        return _screenshot_plot(data_name, "div.js-plotly-plot")
     except ValueError as ve:
         console_log.error(ve)
     except Exception as e:
         console_log.error(f"Export html chart as image fail : {data_name} - {e}")
 
 
+def export_dashboard_as_images(data_names: List[str]) -> Dict[str, Optional[bool]]:
+    # One page load (and one plotly.js parse) for every chart of the dashboard.
+    html_path: str = chart_html_paths(data_names, "dashboard")[data_names[0]]
+    exported: Dict[str, Optional[bool]] = {name: None for name in data_names}
+
+    try:
+        if not os.path.exists(html_path):
+            raise ValueError(f"HTML file was created fail : {html_path}")
+
+        driver.get(f"file:///{os.path.abspath(html_path)}")
+        for name in data_names:
+            try:
+                exported[name] = _screenshot_plot(name, f"div#{name}.js-plotly-plot")
+            except Exception as e:
+                console_log.error(f"Export dashboard chart as image fail : {name} - {e}")
+    except ValueError as ve:
+        console_log.error(ve)
+    except Exception as e:
+        console_log.error(f"Export dashboard as images fail : {e}")
+    return exported
+
+
+@telemetry.timed("chart_export")
+def export_charts_as_images(data_names: List[str]) -> Dict[str, Optional[bool]]:
+    # Browser export of the given charts, blocking; run it with asyncio.to_thread().
+    if chart_configs.get("html", "dashboard") == "dashboard":
+        return export_dashboard_as_images(data_names)
+    return {name: export_html_chart_as_image(name) for name in data_names}
+
+
+@telemetry.timed("charts")
 async def analysis_courses() -> None:
+    # The charts only depend on the course counts, CHART_SETTINGS and the "charts" config,
+    # so an unchanged key with intact artifacts skips plotly and the browser screenshots entirely.
     try:
         counts_courses: pd.DataFrame = await psql.fetch_sql()
-        save_chart_as_html(counts_courses)
-        export_html_chart_as_image("courses_pie")
-        export_html_chart_as_image("courses_bar")
+
+        key: str = chart_key(counts_courses, {**CHART_SETTINGS, "render": chart_configs})
+        artifacts: List[str] = [
+            *dict.fromkeys(chart_html_paths(CHART_NAMES, chart_configs.get("html", "dashboard")).values()),
+            *(os.path.join(img_path, f"{name}.png") for name in CHART_NAMES)
+        ]
+        if chart_cache.hit(key, artifacts):
+            console_log.info("Course counts unchanged, reuse cached charts.")
+            return
+
+        figures: Dict[str, Figure] = build_figures(counts_courses, CHART_SETTINGS)
+        if not save_chart_as_html(figures):
+            return
+
+        # PNGs come from the render backend in parallel worker processes;
+        # only charts it could not render go through the browser screenshot, off the event loop.
+        with telemetry.span("chart_render"):
+            rendered: Dict[str, bool] = await chart_renderer.render(
+                figures, {name: os.path.join(img_path, f"{name}.png") for name in CHART_NAMES}
+            ) if chart_renderer else {}
+
+        missing: List[str] = [name for name in CHART_NAMES if not rendered.get(name)]
+        exported: Dict[str, Optional[bool]] = await asyncio.to_thread(export_charts_as_images, missing) if missing else {}
+        if all(exported.values()):
+            chart_cache.store(key, artifacts)
     except Exception as e:
         console_log.error(f"Analysis courses fail : {e}")
 
-async def notifiers_to_user() -> None:
+@telemetry.timed("attachments")
+async def optimize_attachments() -> str:
+    # Downscaled / recompressed copies (and the timetable contact sheet) for the notifiers.
+    # Falls back to the original screenshots in img_path if the stage is disabled or fails.
+    if not attachment_configs.get("enabled", True):
+        return img_path
+
+    try:
+        return await prepare_attachments(img_path, attachment_configs)
+    except Exception as e:
+        console_log.error(f"Optimize attachments fail, sending originals : {e}")
+        return img_path
+
+
+@telemetry.timed("notifiers")
+async def notifiers_to_user(attachment_path: Optional[str] = None) -> None:
     # After completing the course analysis, 
     # the system will automatically send the information to the users defined in the .env configuration file.
     #
     # Since Twilio incurs costs, 
     # only a simple text description is provided here for demonstration purposes.
+    #
+    # Messages go through the durable outbox first, so a failed channel is retried with backoff
+    # (or later with "notify-only") instead of rerunning the whole pipeline.
+    attachment_path = attachment_path or img_path
+
     try:
         message: str = "Course analysis is complete. You can now review the charts to obtain the information." 
-        await asyncio.gather(
-            send_mail(message, img_path),
-            send_line(message, img_path),
-            # short_msg("Courses processed.")
-        )
+        await drain_outbox(Outbox(notify_configs.get("outbox")), message, attachment_path)
     except Exception as e:
         console_log.error(f"Notifiers to user fail : {e}")
 
 
+async def drain_outbox(outbox: Outbox, message: Optional[str] = None, attachment_path: Optional[str] = None) -> None:
+    # Enqueues "message" on every channel (if given), then sends what is due.
+    # One SMTP session serves every mail attempt of the drain, retries included.
+    transport: MailTransport = mail_transport(notify_configs.get("mail"))
+    try:
+        senders: Dict = notify_senders(transport)
+        if message:
+            await outbox.enqueue(senders, message, attachment_path)
+        await outbox.drain(senders)
+    finally:
+        await transport.close()
+
+
+def notify_senders(transport: MailTransport) -> Dict:
+    # Outbox channel -> async sender(message, attachment_path, progress) returning True on success.
+    # Only LINE delivers in parts (push batches), so only it keeps progress between attempts.
+    @telemetry.timed("notify", channel = "mail")
+    async def mail(message: str, path: Optional[str], progress: Dict) -> Optional[bool]:
+        return await send_mail(message, path or img_path, notify_configs.get("mail"), transport)
+
+    @telemetry.timed("notify", channel = "line")
+    async def line(message: str, path: Optional[str], progress: Dict) -> Optional[bool]:
+        return await send_line(message, path or img_path, notify_configs.get("line"), progress)
+
+    return {
+        "mail": mail,
+        "line": line,
+        # "sms": lambda message, path, progress: short_msg("Courses processed."),
+    }
+
+
 async def _cleanup_resources() -> None:
     # Cleanup all global resources.
     # Closes database connections, quits browser driver,
     # and resets global variables to None.
-    global account, password, driver, ocr_model, console_log, psql
+    global account, password, driver, ocr_model, console_log, psql, session_store, chart_renderer, pending_captcha
 
     if psql:
         try:
@@ -679,6 +1077,19 @@ async def _cleanup_resources() -> None:
         finally:
             psql = None
 
+    if chart_renderer:
+        try:
+            chart_renderer.shutdown()
+        except Exception as e:
+            console_log.error(f"Error closing chart workers: {e}")
+
+    if ocr_model:
+        try:
+            ocr_model.shutdown()
+            console_log.info("Ocr workers closed.")
+        except Exception as e:
+            console_log.error(f"Error closing ocr workers: {e}")
+
     if driver:
         try:
             driver.quit()
@@ -691,56 +1102,94 @@ async def _cleanup_resources() -> None:
     account = None
     password = None
     ocr_model= None
+    pending_captcha = None
+    session_store = None
+    chart_renderer = None
     console_log = None
 
 
+async def export_telemetry() -> None:
+    # Runs after _cleanup_resources(), so Telemetrytools logs through its own logger.
+    await telemetry.stop_sampler()
+    if telemetry_configs.get("enabled"):
+        await asyncio.to_thread(telemetry.export, telemetry_configs["output"], telemetry_configs["keep"])
+
+
 async def main() -> None:
     # Main workflow for course schedule automation.
     # Workflow:
     #     1. Initialize components (logging, driver, OCR)
-    #     2. Login to academic system
+    #     2. Restore the cached session, or login to academic system
     #     3. Navigate to course schedule page
     #     4. Parse and store all schedules
     #     5. Generate analytical charts
     #     6. Send notifications to user
-    global account, password, driver, ocr_model, console_log, psql
+    global account, password, driver, ocr_model, console_log, psql, session_store
 
     os.makedirs("imgs", exist_ok = True)
 
     try:
         signal.signal(signal.SIGINT, signal_handler)
+        setup_telemetry()
 
         # Initialize the setup.
+        # setup_env() only reads files, so its result decides whether OCR is needed before the driver is ready:
+        # with a cached session the OCR model is only loaded if restoring it fails.
         loop = asyncio.get_event_loop()
-        tasks: Iterable[Awaitable[None]] = (
-            loop.run_in_executor(thread_pool, setup_env),
-            loop.run_in_executor(thread_pool, setup_driver),
-            loop.run_in_executor(thread_pool, setup_ocr),
-        )
-        await asyncio.gather(*tasks)
+        with telemetry.span("setup"):
+            driver_task: Awaitable[None] = loop.run_in_executor(thread_pool, setup_driver)
+            await loop.run_in_executor(thread_pool, setup_env)
+
+            ocr_task: Optional[Awaitable[None]] = None
+            if not (session_store and session_store.available()):
+                ocr_task = loop.run_in_executor(thread_pool, setup_ocr)
+            await driver_task
 
         if not all((account, password, max_retry, url, img_path)):
             console_log.error("Please confirm the correctness of the information in .env or config.yaml. Exiting program...")
             return
 
-        if not all((driver, ocr_model)):
-            console_log.error("Driver or Ocr model init fail. Exiting program...")
+        if not driver:
+            console_log.error("Driver init fail. Exiting program...")
             return
 
-        await login_page()
-        await asyncio.sleep(time_counter())
-        
-        if "news.asp" not in driver.current_url:
-            console_log.error("All login attempts fail. Exiting program...")
-            return
+        if not await restore_session():
+            await (ocr_task or loop.run_in_executor(thread_pool, setup_ocr))
+
+            if not ocr_model:
+                console_log.error("Ocr model init fail. Exiting program...")
+                return
+
+            with telemetry.span("login"):
+                await login_page()
+            await asyncio.sleep(time_counter())
+
+            if "news.asp" not in driver.current_url:
+                console_log.error("All login attempts fail. Exiting program...")
+                return
+        await cache_session()
 
         navigate_to_course()
         await asyncio.sleep(time_counter())
 
         psql = MyPsql()
-        await parse_schedule()
+        with telemetry.span("fetch", mode = fetch_configs.get("mode") or "browser"):
+            match fetch_configs.get("mode"):
+                case "http":
+                    if not await parse_schedule_http():
+                        await parse_schedule()
+
+                case "tabs":
+                    await parse_schedule_tabs(fetch_configs.get("tabs", 3))
+
+                case _:
+                    await parse_schedule()
+
+        # Fingerprints are only saved once the workbook and the database both hold those terms.
+        if all(await asyncio.gather(flush_xlsx(), flush_db())) and fingerprints:
+            fingerprints.save()
         await analysis_courses()
-        await notifiers_to_user()
+        await notifiers_to_user(await optimize_attachments())
 
         return True
     except Exception as e:
@@ -748,13 +1197,275 @@ async def main() -> None:
     finally:
         await _cleanup_resources()
         thread_pool.shutdown(wait = True)
+        await export_telemetry()
+
+
+def run_ocr_server() -> None:
+    # Keep the OCR model resident for later runs, see Ocrtools.serve_ocr().
+    with open("config.yaml", "r", encoding="utf-8-sig") as yaml_f:
+        configs = yaml.safe_load(yaml_f)
+
+    ocr_configs: Dict = configs.get("ocr", {})
+    settings: Dict = load_ocr_settings(ocr_configs, configs["general"]["img_path"])
+
+    try:
+        asyncio.run(serve_ocr(
+            settings,
+            ocr_server_address(ocr_configs.get("server", {})),
+            max_workers = ocr_configs.get("workers", 2)
+        ))
+    except KeyboardInterrupt:
+        console_log.info("OCR server stopped.")
+
+
+def run_bench_ocr(corpus_dir: Optional[str], output_path: Optional[str]) -> None:
+    # Offline tuning of the captcha pipeline, see Benchtools.bench_ocr().
+    with open("config.yaml", "r", encoding="utf-8-sig") as yaml_f:
+        configs = yaml.safe_load(yaml_f)
+
+    bench_configs: Dict = configs.get("bench", {}).get("ocr", {})
+
+    try:
+        reports: List[Dict] = bench_ocr(
+            corpus_dir or bench_configs.get("corpus", "./captcha_corpus"),
+            configs.get("ocr", {}),
+            bench_configs.get("grid", {}),
+            output_path or bench_configs.get("output", "bench_ocr.json")
+        )
+        print(format_table(reports))
+        for report in reports:
+            print(f"\n{report['config']}\n{format_confusion(report)}")
+    except Exception as e:
+        console_log.error(f"Bench ocr fail : {e}")
+
+
+def run_build_templates(corpus_dir: Optional[str]) -> None:
+    # Rebuilds ocr_templates/ from the labelled OCR corpus, see Benchtools.build_corpus_templates().
+    with open("config.yaml", "r", encoding="utf-8-sig") as yaml_f:
+        configs = yaml.safe_load(yaml_f)
+
+    try:
+        counts: Dict[str, int] = build_corpus_templates(
+            corpus_dir or configs.get("bench", {}).get("ocr", {}).get("corpus", "./captcha_corpus"),
+            configs.get("ocr", {})
+        )
+        print(" ".join(f"{digit}:{count}" for digit, count in counts.items()))
+    except Exception as e:
+        console_log.error(f"Build templates fail : {e}")
+
+
+def run_bench_parser(fixture_path: Optional[str]) -> None:
+    # Checks Parsetools against the legacy parse_row() on the synthetic fixture rows, then times both.
+    with open("config.yaml", "r", encoding="utf-8-sig") as yaml_f:
+        configs = yaml.safe_load(yaml_f)
+
+    bench_configs: Dict = configs.get("bench", {}).get("parser", {})
+
+    try:
+        report: Dict = bench_parser(
+            fixture_path or bench_configs.get("fixtures", "./bench_fixtures/schedule_rows.json"),
+            repeat = bench_configs.get("repeat", 200)
+        )
+        print(f"tables {report['tables']}, rows {report['rows']}, mismatches {len(report['mismatches'])}")
+        print(f"legacy {report['legacy_ms']} ms, structural {report['structural_ms']} ms, x{report['speedup']}")
+        for mismatch in report["mismatches"]:
+            print(f"\nlegacy     : {mismatch['legacy']}\nstructural : {mismatch['structural']}")
+    except Exception as e:
+        console_log.error(f"Bench parser fail : {e}")
+
+
+def _bench_e2e_config(configs: Dict, bench_configs: Dict, portal: MockPortal) -> Dict:
+    # config.yaml of the scratch directory: the portal and both notifiers point at the mock portal,
+    # and nothing is reused from earlier runs (no session cache, fingerprints or attachment cache),
+    # so every benchmark run is a cold run.
+    host, smtp_port = portal.smtp_address
+    notify: Dict = configs.get("notify", {})
+    ocr_configs: Dict = configs.get("ocr", {})
+
+    bench: Dict = copy.deepcopy(configs)
+    bench["general"]["url"] = portal.url
+    bench["driver"] = [*configs.get("driver", []), *bench_configs.get("driver_args", [])]
+    bench["session"] = {**configs.get("session", {}), "enabled": False}
+    bench["ocr"] = {
+        **ocr_configs, "debug": False, "harvest": False,
+        "template_dir": os.path.abspath(ocr_configs.get("template_dir", "./ocr_templates"))
+    }
+    bench["fetch"] = {**configs.get("fetch", {}), "incremental": False, **bench_configs.get("fetch", {})}
+    bench["notify"] = {
+        "outbox": {**notify.get("outbox", {}), "drain_timeout": bench_configs.get("drain_timeout", 10)},
+        "mail": {**notify.get("mail", {}), "host": host, "port": smtp_port, "start_tls": False, "use_tls": False},
+        "line": {**notify.get("line", {}), "upload_url": f"{portal.url}line/upload", "push_url": f"{portal.url}line/push"},
+    }
+    bench["telemetry"] = {
+        **configs.get("telemetry", {}), "enabled": True,
+        "output": os.path.abspath(bench_configs.get("output", "./telemetry/bench"))
+    }
+    return bench
+
+
+def run_bench_e2e() -> None:
+    # Runs main() once against the local mock portal, from a scratch directory holding its own config.yaml,
+    # and prints the wall time per stage. The real portal, notifiers and database schema are never touched.
+    with open("config.yaml", "r", encoding="utf-8-sig") as yaml_f:
+        configs = yaml.safe_load(yaml_f)
+
+    bench_configs: Dict = configs.get("bench", {}).get("e2e", {})
+    workdir: str = os.getcwd()
+
+    try:
+        portal = MockPortal(bench_configs.get("portal"))
+        bench_account, bench_password = portal.account
+        smtp_user, smtp_password = portal.smtp_credentials
+
+        # Set before main() calls load_dotenv(), which never overrides existing variables.
+        os.environ.update({
+            "ACCOUNT": bench_account,
+            "PASSWORD": bench_password,
+            "MAIL_ADDR": smtp_user,
+            "SMTP_PWD": smtp_password,
+            "TO_ADDR": smtp_user,
+            "ACCESS_TOKEN": "bench",
+            "USER_ID": "bench",
+            "TARGET_SCHEMA": bench_configs.get("schema", "course_bench"),
+        })
+
+        with tempfile.TemporaryDirectory(prefix = "course-bench-") as scratch:
+            with open(os.path.join(scratch, "config.yaml"), "w", encoding = "utf-8") as yaml_f:
+                yaml.safe_dump(
+                    _bench_e2e_config(configs, bench_configs, portal), yaml_f, allow_unicode = True, sort_keys = False
+                )
+
+            portal.start()
+            try:
+                os.chdir(scratch)
+                started: float = time.perf_counter()
+                completed: Optional[bool] = asyncio.run(main())
+                wall: float = time.perf_counter() - started
+            finally:
+                os.chdir(workdir)
+                portal.stop()
+
+        summary: Dict = telemetry.summary()
+        print(format_stages(summary))
+        print(
+            f"\nmain() {'completed' if completed else 'stopped early'} in {wall:.2f} s, "
+            f"loop lag max {summary['loop_lag']['max'] * 1000:.0f} ms, {len(summary['stalls'])} stalls"
+        )
+        print("portal : " + ", ".join(f"{key} {count}" for key, count in sorted(portal.stats.items())))
+    except Exception as e:
+        # main() resets console_log during its cleanup.
+        logging.getLogger("Console_log").error(f"Bench e2e fail : {e}")
+
+
+def run_mock_portal() -> None:
+    # Serve the mock portal in the foreground, e.g. to point general.url at it by hand.
+    with open("config.yaml", "r", encoding="utf-8-sig") as yaml_f:
+        configs = yaml.safe_load(yaml_f)
+
+    try:
+        asyncio.run(MockPortal(configs.get("bench", {}).get("e2e", {}).get("portal")).serve())
+    except KeyboardInterrupt:
+        console_log.info("Mock portal stopped.")
+
+
+def run_mark_stale(terms: List[str]) -> None:
+    # Force the next incremental run to re-fetch and re-store the given terms (all known terms if none).
+    with open("config.yaml", "r", encoding="utf-8-sig") as yaml_f:
+        configs = yaml.safe_load(yaml_f)
+
+    store = FingerprintStore(configs.get("fetch", {}).get("fingerprints", "./fingerprints.json"))
+    marked: List[str] = store.mark_stale(terms)
+    if store.save():
+        print(f"Marked stale : {', '.join(marked) or 'none'}")
+
+
+def run_notify_only() -> None:
+    # Flush pending outbox messages without the browser, OCR, login or scraping.
+    global notify_configs, img_path
+
+    load_dotenv()
+    with open("config.yaml", "r", encoding="utf-8-sig") as yaml_f:
+        configs = yaml.safe_load(yaml_f)
+
+    notify_configs = configs.get("notify", {})
+    img_path = configs["general"]["img_path"]
+
+    try:
+        outbox = Outbox(notify_configs.get("outbox"))
+        if not any(outbox.pending().values()):
+            console_log.info("Outbox is empty.")
+            return
+        asyncio.run(drain_outbox(outbox))
+    except Exception as e:
+        console_log.error(f"Notify only fail : {e}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description = "Asyncio course fetcher.")
+    commands = parser.add_subparsers(dest = "command")
+    commands.add_parser("run", help = "Fetch schedules, analyze courses and notify (default).")
+    commands.add_parser("ocr-server", help = "Keep the OCR model resident and serve captcha recognition.")
+
+    bench_ocr_parser = commands.add_parser("bench-ocr", help = "Benchmark captcha OCR settings on a labelled corpus.")
+    bench_ocr_parser.add_argument("corpus", nargs = "?", help = "Directory of <5 digits>[_anything].png captchas.")
+    bench_ocr_parser.add_argument("--output", help = "JSON report path.")
+
+    build_templates_parser = commands.add_parser("build-templates", help = "Rebuild the OCR fast path templates from a labelled corpus.")
+    build_templates_parser.add_argument("corpus", nargs = "?", help = "Directory of <5 digits>[_anything].png captchas.")
+
+    bench_parser_parser = commands.add_parser("bench-parser", help = "Check and time the timetable row parser.")
+    bench_parser_parser.add_argument("fixtures", nargs = "?", help = "JSON list of tables, each a list of row outerHTML.")
+
+    commands.add_parser("bench-e2e", help = "Run the whole pipeline against the local mock portal and time each stage.")
+    commands.add_parser("mock-portal", help = "Serve the local mock portal in the foreground.")
+    commands.add_parser("notify-only", help = "Retry pending notifications from the outbox, no scraping.")
+
+    mark_stale_parser = commands.add_parser("mark-stale", help = "Re-fetch the given terms on the next run.")
+    mark_stale_parser.add_argument("terms", nargs = "*", help = "Terms such as 113-2, all known terms if omitted.")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    if not sys.platform.startswith("win32"):
-        print("This program is for windows.")
-        sys.exit(1)
+    args = parse_args()
+
+    match args.command:
+        case "ocr-server":
+            setup_log()
+            run_ocr_server()
+
+        case "bench-ocr":
+            setup_log()
+            run_bench_ocr(args.corpus, args.output)
+
+        case "build-templates":
+            setup_log()
+            run_build_templates(args.corpus)
+
+        case "bench-parser":
+            setup_log()
+            run_bench_parser(args.fixtures)
+
+        case "bench-e2e":
+            setup_log()
+            run_bench_e2e()
+
+        case "mock-portal":
+            setup_log()
+            run_mock_portal()
+
+        case "notify-only":
+            setup_log()
+            run_notify_only()
+
+        case "mark-stale":
+            setup_log()
+            run_mark_stale(args.terms)
+
+        case _:
+            if not sys.platform.startswith("win32"):
+                print("This program is for windows.")
+                sys.exit(1)
 
-    setup_log()
-    asyncio.run(main())
-    print("Program completed.")
\ No newline at end of file
+            setup_log()
+            asyncio.run(main())
+            print("Program completed.")
\ No newline at end of file
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+"""
+    Created on Sat Oct 17 14:27:08 2026
+
+    @author: Johnson
+"""
+
+# ==============================================================================
+# Standard Library Imports
+# ==============================================================================
+
+import itertools
+import json
+import logging
+import os
+import re
+import time
+from typing import Optional, Final, Tuple, List, Dict, Iterable
+
+# ==============================================================================
+# Third-Party Imports
+# ==============================================================================
+
+import numpy as np
+
+# ==============================================================================
+# Local Imports
+# ==============================================================================
+
+from Ocrtools import CAPTCHA_LENGTH, DigitClassifier, build_templates, load_ocr_settings, recognize_captcha
+from Parsetools import EXCLUDED_KEYWORDS, parse_rows
+
+# ==============================================================================
+# Constants
+# ==============================================================================
+
+LABEL_PATTERN: Final[re.Pattern] = re.compile(r"^(\d{5})(?:[_-].*)?\.png$", re.IGNORECASE)
+MISS_LABEL: Final[str] = "-"
+
+# ==============================================================================
+# Global Variables
+# ==============================================================================
+
+console_log = logging.getLogger("Console_log")
+
+# ==============================================================================
+# NOTE:
+# The purpose of this Benchtools.py module is to measure changes offline
+# instead of through live logins.
+#
+# OCR benchmark:
+#     A corpus is a directory of labelled captcha screenshots named "<5 digits>[_anything].png",
+#     e.g. "73275.png" or "73275_headless.png".
+#     Every configuration of the grid (Cartesian product of the "bench.ocr.grid" lists in config.yaml,
+#     on top of the "ocr" section) runs the full preprocessing and recognition pipeline over the corpus
+#     and reports exact-match rate, per-digit confusion and p50 / p95 latency.
+#     Template harvesting is always disabled, so a run never changes ocr_templates/.
+#     One untimed warm-up sample per configuration keeps model loading out of the latency figures.
+#     The same corpus feeds "build-templates", which replaces ocr_templates/ with glyphs cut from it;
+#     the fast path stays disabled until every digit 0-9 has at least one template.
+#
+# Parser benchmark:
+#     Synthetic timetable rows (bench_fixtures/schedule_rows.json, hand-built in the portal's layout
+#     with its noise segments and free periods, not captured from a live session) go through both the legacy
+#     string-replace / regex parse_row() and Parsetools.parse_rows(); outputs must match,
+#     then both are timed over the same rows.
+#
+# End-to-end benchmark:
+#     "bench-e2e" runs main() against Mocktools.MockPortal in a scratch directory and prints
+#     the per-stage spans of that run with format_stages().
+# ==============================================================================
+
+
+# ==============================================================================
+# Private Helpers
+# ==============================================================================
+
+
+def _load_corpus(corpus_dir: str) -> List[Tuple[str, str, bytes]]:
+    samples: List[Tuple[str, str, bytes]] = []
+
+    for file in sorted(os.listdir(corpus_dir)):
+        match = LABEL_PATTERN.match(file)
+        if not match:
+            continue
+
+        with open(os.path.join(corpus_dir, file), "rb") as png_f:
+            samples.append((file, match.group(1), png_f.read()))
+
+    return samples
+
+
+def _expand_grid(grid: Dict[str, List]) -> List[Dict]:
+    # {"thresholds": [[20], [18, 22]], "fast_path": [true, false]} -> 4 override dicts.
+    if not grid:
+        return [{}]
+
+    keys: List[str] = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+
+def _describe(overrides: Dict) -> str:
+    return ", ".join(f"{key}={value}" for key, value in overrides.items()) or "config.yaml"
+
+
+def _percentile(latencies: List[float], q: float) -> float:
+    return round(float(np.percentile(latencies, q)), 3) if latencies else 0.0
+
+
+def _bench_config(samples: List[Tuple[str, str, bytes]], settings: Dict) -> Dict:
+    classifier: Optional[DigitClassifier] = DigitClassifier(settings["template_dir"]) if settings["fast_path"] else None
+    confusion: Dict[str, Dict[str, int]] = {
+        digit: {label: 0 for label in (*"0123456789", MISS_LABEL)} for digit in "0123456789"
+    }
+    latencies: List[float] = []
+    failures: List[Dict[str, str]] = []
+    exact: int = 0
+
+    try:
+        recognize_captcha(samples[0][2], settings, classifier)
+    except Exception as e:
+        console_log.warning(f"Bench warm-up fail : {e}")
+
+    for file, label, png_bytes in samples:
+        start: float = time.perf_counter()
+        try:
+            text, _ = recognize_captcha(png_bytes, settings, classifier)
+        except Exception as e:
+            console_log.debug(f"Bench recognize fail : {file} - {e}")
+            text = None
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        predicted: str = text if text and len(text) == CAPTCHA_LENGTH else MISS_LABEL * CAPTCHA_LENGTH
+        for truth, guess in zip(label, predicted):
+            confusion[truth][guess] += 1
+
+        if text == label:
+            exact += 1
+        else:
+            failures.append({"file": file, "label": label, "predicted": text or ""})
+
+    return {
+        "samples": len(samples),
+        "exact_match": round(exact / len(samples), 4),
+        "p50_ms": _percentile(latencies, 50),
+        "p95_ms": _percentile(latencies, 95),
+        "confusion": confusion,
+        "failures": failures,
+    }
+
+
+def _legacy_parse_row(html_str: str) -> List[str]:
+    # Reference copy of the original parse_row() from Asyncio-course-fetcher.py, kept verbatim
+    # (minus logging) so the structural parser can be checked and timed against it.
+    html: str = html_str.replace("\u3000", "空堂<br>" * 4).replace("</td><td>", "<br>")
+    html: str = re.sub(r"<(?!br).*?>", "", html)
+
+    parts: List[str] = [
+        p for p in html.split("<br>")[:-10]
+        if not any(keyword in p for keyword in EXCLUDED_KEYWORDS)
+    ]
+    time_range:str = f"{parts[1]}-{parts[2]}"
+
+    courses: List[str] = []
+    for _ in range(3, len(parts), 5):
+        course_name = "空堂 - Free Period" if "空堂" in parts[_] else f"{parts[_]} - {parts[_+1]}"
+        courses.append(course_name)
+
+    return [time_range, *courses]
+
+
+def _format_rows(headers: Tuple[str, ...], rows: Iterable[Tuple[str, ...]]) -> str:
+    # Plain text table, columns padded to their widest cell and the header underlined.
+    table: List[Tuple[str, ...]] = [headers, *rows]
+    widths: List[int] = [max(len(row[col]) for row in table) for col in range(len(headers))]
+    lines: List[str] = [" | ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in table]
+    lines.insert(1, "-+-".join("-" * width for width in widths))
+    return "\n".join(lines)
+
+
+def _best_of(func, rounds: int) -> float:
+    # Best wall time (ms) of several rounds, the least noisy figure for a micro-benchmark.
+    timings: List[float] = []
+    for _ in range(rounds):
+        start: float = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+# ==============================================================================
+# Public API
+# ==============================================================================
+# Methods below are intended for external use.
+
+
+def bench_ocr(corpus_dir: str, ocr_configs: Dict, grid: Dict[str, List],
+                output_path: Optional[str] = None) -> List[Dict]:
+    samples: List[Tuple[str, str, bytes]] = _load_corpus(corpus_dir)
+    if not samples:
+        raise ValueError(f"No labelled captcha found in {corpus_dir} (expected <5 digits>[_anything].png).")
+
+    reports: List[Dict] = []
+    for overrides in _expand_grid(grid):
+        settings: Dict = load_ocr_settings({**ocr_configs, **overrides, "debug": False}, ".")
+        settings["harvest"] = False
+
+        report: Dict = {"config": _describe(overrides), "overrides": overrides, **_bench_config(samples, settings)}
+        reports.append(report)
+        console_log.info(f"Bench ocr {report['config']} : {report['exact_match']:.2%}, p95 {report['p95_ms']} ms")
+
+    if output_path:
+        with open(output_path, "w", encoding = "utf-8") as json_f:
+            json.dump(reports, json_f, ensure_ascii = False, indent = 2)
+
+    return reports
+
+
+def build_corpus_templates(corpus_dir: str, ocr_configs: Dict) -> Dict[str, int]:
+    samples: List[Tuple[str, str, bytes]] = _load_corpus(corpus_dir)
+    if not samples:
+        raise ValueError(f"No labelled captcha found in {corpus_dir} (expected <5 digits>[_anything].png).")
+
+    settings: Dict = load_ocr_settings({**ocr_configs, "debug": False}, ".")
+    counts: Dict[str, int] = build_templates(((label, png_bytes) for _, label, png_bytes in samples), settings)
+
+    missing: List[str] = [digit for digit, count in counts.items() if not count]
+    if missing:
+        console_log.warning(f"Build templates : no glyph for digits {''.join(missing)}, the fast path stays disabled.")
+    return counts
+
+
+def format_table(reports: Iterable[Dict]) -> str:
+    return _format_rows(
+        ("config", "samples", "exact", "p50 ms", "p95 ms"),
+        [
+            (report["config"], str(report["samples"]), f"{report['exact_match']:.2%}",
+                f"{report['p50_ms']:.1f}", f"{report['p95_ms']:.1f}")
+            for report in reports
+        ]
+    )
+
+
+def format_stages(summary: Dict) -> str:
+    # Stage table of a Telemetrytools.Telemetry summary, stages in order of first appearance.
+    return _format_rows(
+        ("stage", "count", "total s", "max s", "errors"),
+        [
+            (stage, str(entry["count"]), f"{entry['total']:.3f}", f"{entry['max']:.3f}", str(entry["errors"]))
+            for stage, entry in summary["stages"].items()
+        ]
+    )
+
+
+def format_confusion(report: Dict) -> str:
+    labels: List[str] = [*"0123456789", MISS_LABEL]
+    lines: List[str] = ["truth\\pred " + " ".join(label.rjust(4) for label in labels)]
+    lines.extend(
+        digit.ljust(10) + " " + " ".join(str(report["confusion"][digit][label]).rjust(4) for label in labels)
+        for digit in "0123456789"
+    )
+    return "\n".join(lines)
+
+
+def bench_parser(fixture_path: str, repeat: int = 200, rounds: int = 5) -> Dict:
+    with open(fixture_path, "r", encoding = "utf-8") as json_f:
+        tables: List[List[str]] = json.load(json_f)
+
+    mismatches: List[Dict] = []
+    for rows_html in tables:
+        legacy: List[List[str]] = [_legacy_parse_row(html) for html in rows_html]
+        structural: List[List[str]] = [list(row) for row in parse_rows(rows_html)]
+        if legacy != structural:
+            mismatches.append({"legacy": legacy, "structural": structural})
+
+    legacy_ms: float = _best_of(
+        lambda: [[_legacy_parse_row(html) for html in rows_html] for _ in range(repeat) for rows_html in tables],
+        rounds
+    )
+    structural_ms: float = _best_of(
+        lambda: [parse_rows(rows_html) for _ in range(repeat) for rows_html in tables],
+        rounds
+    )
+
+    return {
+        "tables": len(tables),
+        "rows": sum(len(rows_html) for rows_html in tables) * repeat,
+        "mismatches": mismatches,
+        "legacy_ms": round(legacy_ms, 3),
+        "structural_ms": round(structural_ms, 3),
+        "speedup": round(legacy_ms / structural_ms, 2) if structural_ms else 0.0,
+    }
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""
+    Created on Sun Oct 18 00:12:40 2026
+
+    @author: Johnson
+"""
+
+# ==============================================================================
+# Standard Library Imports
+# ==============================================================================
+
+import asyncio
+import concurrent.futures
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+from typing import Optional, Final, Tuple, List, Dict, Iterable
+
+# ==============================================================================
+# Third-Party Imports
+# ==============================================================================
+
+import pandas as pd
+import plotly
+import plotly.express as px
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+from plotly.graph_objects import Figure
+
+# ==============================================================================
+# Constants
+# ==============================================================================
+
+# Backends that rasterize a figure without the scraping driver; "selenium" means none.
+# An unsupported backend in config.yaml falls back to FALLBACK_BACKEND.
+RENDER_BACKENDS: Final[Tuple[str, ...]] = ("kaleido", "selenium")
+FALLBACK_BACKEND: Final[str] = "selenium"
+# dashboard : one HTML page holding every figure, plotly.js as a shared local asset.
+# shared    : one HTML file per figure, all referencing the shared local plotly.js asset.
+# inline    : one HTML file per figure with plotly.js inlined (plotly's default, several MB each).
+HTML_MODES: Final[Tuple[str, ...]] = ("dashboard", "shared", "inline")
+DASHBOARD_NAME: Final[str] = "courses_dashboard"
+# The bundle is named after the installed plotly version, so an upgrade writes a new file
+# instead of leaving pages on a stale bundle; older copies are removed.
+PLOTLY_ASSET: Final[str] = f"plotly-{plotly.__version__}.min.js"
+PLOTLY_ASSET_PREFIX: Final[str] = "plotly-"
+DASHBOARD_CHART_HEIGHT: Final[str] = "600px"
+DASHBOARD_TEMPLATE: Final[str] = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>Course Dashboard</title>
+    <script src="{asset}"></script>
+</head>
+<body>
+{charts}
+</body>
+</html>
+"""
+
+# ==============================================================================
+# Global Variables
+# ==============================================================================
+
+console_log = logging.getLogger("Console_log")
+
+# ==============================================================================
+# NOTE:
+# The purpose of this Charttools.py module is to build the course charts, render them without the scraping driver,
+# and avoid rebuilding charts that would come out identical.
+#
+# analysis_courses() renders the course counts to HTML with plotly and then screenshots each HTML file
+# through the shared Selenium driver, which costs seconds per run even when nothing changed.
+# ChartCache keys the last set of artifacts (HTML and PNG) by a hash of the counts DataFrame
+# plus the chart settings; on a hit, and if every artifact is still on disk untouched,
+# both the HTML generation and the image export are skipped.
+#
+# ChartRenderer rasterizes figures straight to PNG with plotly's static export (kaleido),
+# one figure per worker process, so charts render in parallel and never touch the scraping driver.
+# kaleido is an optional dependency ("uv sync --extra charts"). plotly >= 6 requires kaleido >= 1,
+# which no longer bundles a browser: it starts a headless instance of a locally installed Chrome / Chromium
+# (the one undetected-chromedriver drives is enough, or BROWSER_PATH, or "kaleido_get_chrome").
+# When kaleido or Chrome is missing, or a render fails, the caller falls back to the Selenium screenshot
+# of the HTML file.
+#
+# With plotly's defaults every chart HTML inlines the whole plotly.js bundle (several MB),
+# which is written to disk and parsed by the browser once per chart.
+# write_charts_html() instead writes one dashboard page (or one file per chart) that references
+# a single plotly-<version>.min.js copied next to it once, so the bundle is written once and, in dashboard mode,
+# parsed once for all screenshots.
+# ==============================================================================
+
+
+# ==============================================================================
+# Private Helpers
+# ==============================================================================
+
+
+def _artifact_state(paths: List[str]) -> Optional[Dict[str, int]]:
+    # mtime (ns) of every artifact, or None if one is missing.
+    try:
+        return {path: os.stat(path).st_mtime_ns for path in paths}
+    except FileNotFoundError:
+        return None
+
+
+def _ensure_plotly_asset(directory: str) -> None:
+    asset_path: str = os.path.join(directory, PLOTLY_ASSET)
+    if not os.path.exists(asset_path):
+        with open(asset_path, "w", encoding = "utf-8") as js_f:
+            js_f.write(get_plotlyjs())
+
+    for file in os.listdir(directory):
+        if file.startswith(PLOTLY_ASSET_PREFIX) and file.endswith(".min.js") and file != PLOTLY_ASSET:
+            os.remove(os.path.join(directory, file))
+
+
+def _chrome_path() -> Optional[str]:
+    # Same lookup kaleido >= 1 does through choreographer before it starts the browser.
+    browser_path: Optional[str] = os.environ.get("BROWSER_PATH")
+    if browser_path:
+        return browser_path if os.path.exists(browser_path) else None
+
+    try:
+        from choreographer.browsers.chromium import Chromium
+        return Chromium.find_browser(skip_local = False)
+    except Exception as e:
+        console_log.debug(f"Chrome lookup for kaleido fail : {e}")
+        return None
+
+
+def _render_in_worker(figure_json: str, image_path: str, width: int, height: int, scale: float) -> bool:
+    # Runs in a ChartRenderer worker process.
+    pio.from_json(figure_json).write_image(image_path, format = "png", width = width, height = height, scale = scale)
+    return True
+
+
+# ==============================================================================
+# Public API
+# ==============================================================================
+# Methods below are intended for external use.
+
+
+def chart_key(data: pd.DataFrame, settings: Dict) -> str:
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(column) for column in data.columns]).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(data, index = False).values.tobytes())
+    digest.update(json.dumps(settings, sort_keys = True, ensure_ascii = False).encode("utf-8"))
+    # Cached HTML references the versioned plotly.js asset, so a plotly upgrade invalidates it.
+    digest.update(PLOTLY_ASSET.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def build_figures(data: pd.DataFrame, settings: Dict) -> Dict[str, Figure]:
+    # Course counts (course, count) -> {"courses_pie": Figure, "courses_bar": Figure}.
+    data = data.set_axis(settings["columns"], axis = 1)
+
+    courses_pie = px.pie(
+        data,
+        names = "Courses",
+        values = "Credit course",
+        title = settings["pie_title"]
+        )
+
+    courses_bar = px.bar(
+        data,
+        x = "Courses",
+        y = "Credit course",
+        title = settings["bar_title"],
+        text = "Credit course"
+        )
+    courses_bar.update_layout(
+        title = {
+            "text"   : settings["bar_title"],
+            "x"      : 0.5,
+            },
+        xaxis_tickangle = settings["bar_tickangle"]
+        )
+
+    return {"courses_pie": courses_pie, "courses_bar": courses_bar}
+
+
+def chart_html_paths(names: Iterable[str], html_mode: str, directory: str = ".") -> Dict[str, str]:
+    # HTML file holding each chart; every chart maps to the same page in dashboard mode.
+    if html_mode == "dashboard":
+        return {name: os.path.join(directory, f"{DASHBOARD_NAME}.html") for name in names}
+    return {name: os.path.join(directory, f"{name}.html") for name in names}
+
+
+def write_charts_html(figures: Dict[str, Figure], html_mode: str = "dashboard", directory: str = ".") -> List[str]:
+    # Returns the files written (the plotly.js asset excluded, it is only written once per plotly version).
+    if html_mode not in HTML_MODES:
+        raise ValueError(f"Unsupported chart html mode : {html_mode}")
+
+    paths: Dict[str, str] = chart_html_paths(figures, html_mode, directory)
+    if html_mode == "inline":
+        for name, figure in figures.items():
+            figure.write_html(paths[name])
+        return list(paths.values())
+
+    _ensure_plotly_asset(directory)
+    if html_mode == "shared":
+        for name, figure in figures.items():
+            figure.write_html(paths[name], include_plotlyjs = PLOTLY_ASSET)
+        return list(paths.values())
+
+    # Each figure keeps its name as div id, so the exporter can screenshot them from the one page.
+    charts: str = "\n".join(
+        pio.to_html(
+            figure, full_html = False, include_plotlyjs = False,
+            div_id = name, default_height = DASHBOARD_CHART_HEIGHT
+        ) for name, figure in figures.items()
+    )
+    dashboard_path: str = os.path.join(directory, f"{DASHBOARD_NAME}.html")
+    with open(dashboard_path, "w", encoding = "utf-8") as html_f:
+        html_f.write(DASHBOARD_TEMPLATE.format(asset = PLOTLY_ASSET, charts = charts))
+    return [dashboard_path]
+
+
+class ChartRenderer:
+    # Usage:
+    #     renderer = ChartRenderer("kaleido", max_workers = 2)
+    #     done = await renderer.render(figures, {"courses_pie": "./imgs/courses_pie.png", ...})
+    def __init__(self, backend: str = "kaleido", max_workers: int = 2,
+                    width: int = 1200, height: int = 700, scale: float = 1):
+        if backend not in RENDER_BACKENDS:
+            console_log.warning(f"Unsupported chart backend : {backend}, using {FALLBACK_BACKEND}.")
+            backend = FALLBACK_BACKEND
+
+        self._backend: str = backend
+        self._max_workers: int = max(1, int(max_workers))
+        self._size: Tuple[int, int, float] = (width, height, scale)
+        self._executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._available: Optional[bool] = None
+
+    @property
+    def available(self) -> bool:
+        # Checked once: kaleido must be importable and find a Chrome to drive.
+        if self._available is None:
+            self._available = False
+            if self._backend == "kaleido":
+                if importlib.util.find_spec("kaleido") is None:
+                    console_log.info("kaleido is not installed (uv sync --extra charts).")
+                elif not _chrome_path():
+                    console_log.info("kaleido found no Chrome / Chromium, set BROWSER_PATH or run kaleido_get_chrome.")
+                else:
+                    self._available = True
+        return self._available
+
+    async def render(self, figures: Dict[str, Figure], image_paths: Dict[str, str]) -> Dict[str, bool]:
+        # Returns, per chart, whether its PNG was written; the caller falls back for the rest.
+        if not self.available:
+            return {name: False for name in figures}
+
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers = self._max_workers)
+
+        loop = asyncio.get_running_loop()
+        names: List[str] = list(figures)
+        results: List = await asyncio.gather(
+            *(loop.run_in_executor(
+                self._executor, _render_in_worker, figures[name].to_json(), image_paths[name], *self._size
+            ) for name in names),
+            return_exceptions = True
+        )
+
+        rendered: Dict[str, bool] = {}
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                console_log.warning(f"Render {name} with {self._backend} fail : {result}")
+            rendered[name] = result is True
+        return rendered
+
+    def shutdown(self) -> None:
+        if self._executor:
+            self._executor.shutdown(wait = True, cancel_futures = True)
+            self._executor = None
+
+
+class ChartCache:
+    def __init__(self, path: str):
+        self._path: str = path
+        self._entry: Dict = {}
+
+        try:
+            if os.path.exists(path):
+                with open(path, "r", encoding = "utf-8") as json_f:
+                    self._entry = json.load(json_f)
+        except Exception as e:
+            console_log.error(f"Load chart cache fail : {e}")
+
+    def hit(self, key: str, artifacts: List[str]) -> bool:
+        if self._entry.get("key") != key:
+            return False
+        return _artifact_state(artifacts) == self._entry.get("artifacts")
+
+    def store(self, key: str, artifacts: List[str]) -> Optional[bool]:
+        state: Optional[Dict[str, int]] = _artifact_state(artifacts)
+        if state is None:
+            return
+
+        try:
+            self._entry = {"key": key, "artifacts": state}
+            with open(self._path, "w", encoding = "utf-8") as json_f:
+                json.dump(self._entry, json_f, indent = 2)
+            return True
+        except Exception as e:
+            console_log.error(f"Save chart cache fail : {e}")
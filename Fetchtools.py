@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+    Created on Sat Oct 17 16:03:45 2026
+
+    @author: Johnson
+"""
+
+# ==============================================================================
+# Standard Library Imports
+# ==============================================================================
+
+import asyncio
+import logging
+from html import escape
+from html.parser import HTMLParser
+from typing import Optional, Final, Tuple, List, Dict, Iterable
+
+# ==============================================================================
+# Third-Party Imports
+# ==============================================================================
+
+import aiohttp
+from yarl import URL
+
+# ==============================================================================
+# Constants
+# ==============================================================================
+
+# Same slices as scrape_table(): 5 weekday headers after the time column, and the 4 timetable rows.
+HEADER_SLICE: Final[slice] = slice(1, 6)
+ROW_SLICE: Final[slice] = slice(11, 15)
+VOID_TAGS: Final[set] = {"br", "img", "input", "hr", "meta", "link", "col", "wbr"}
+
+# Runs in the authenticated browser on the course page and describes the course-query form,
+# so the HTTP client can submit it without hard-coding the portal's form layout.
+EXPORT_FORM_JS: Final[str] = """
+    const year = document.querySelector("[name=CosYear]");
+    const smtr = document.querySelector("[name=CosSmtr]");
+    if (!year || !smtr || !year.form) { return null; }
+
+    const form = year.form;
+    const button = form.querySelector(".btn-info");
+    const fields = Array.from(new FormData(form).entries());
+    if (button && button.name) { fields.push([button.name, button.value]); }
+
+    const options = (select) => Array.from(select.options).map((option) => [option.value, option.text.trim()]);
+    return {
+        action: form.action || document.location.href,
+        method: (form.method || "get").toLowerCase(),
+        fields: fields,
+        years: options(year),
+        semesters: options(smtr).slice(0, 2),
+        user_agent: navigator.userAgent,
+        referer: document.location.href
+    };
+"""
+
+# Runs on the course page after btn-info and returns everything one term needs in a single round trip:
+# header texts, timetable row outerHTML, the no-data flag and the table's bounding box (CSS pixels).
+# It also scrolls the "bolder" footer into view, as timetable_pic() always did before its screenshot.
+EXTRACT_TABLE_JS: Final[str] = """
+    const noData = document.getElementsByClassName("error-container").length > 0;
+    const table = document.querySelector("table.table-bordered");
+    if (!table) { return {no_data: noData, headers: [], rows: [], rect: null}; }
+
+    const bottom = document.getElementsByClassName("bolder")[0];
+    if (bottom) { bottom.scrollIntoView(); }
+
+    const headers = Array.from(document.querySelectorAll("table.table-bordered > thead > tr > th"));
+    const rows = Array.from(document.querySelectorAll("table.table-bordered > tbody > tr"));
+    const rect = table.getBoundingClientRect();
+    return {
+        no_data: noData,
+        headers: headers.slice(1, 6).map((header) => header.innerText.trim()),
+        rows: rows.slice(11, 15).map((row) => row.outerHTML),
+        rect: {x: rect.left, y: rect.top, width: rect.width, height: rect.height},
+        viewport: {width: window.innerWidth, height: window.innerHeight},
+        dpr: window.devicePixelRatio || 1
+    };
+"""
+
+# ==============================================================================
+# Global Variables
+# ==============================================================================
+
+console_log = logging.getLogger("Console_log")
+
+# ==============================================================================
+# NOTE:
+# The purpose of this Fetchtools.py module is to fetch every term's timetable over plain HTTP
+# once the browser has logged in, instead of selecting CosYear / CosSmtr and clicking btn-info per term.
+#
+# Flow:
+#     1. export_session() reads the cookies and the course-query form from the authenticated driver.
+#     2. ScheduleClient submits that form once per (year, semester), concurrently,
+#         over one pooled aiohttp session bounded by a semaphore.
+#     3. extract_table() turns each response into the same (headers, rows outerHTML) pair
+#         that scrape_table() reads from the browser, so Parsetools.parse_rows() is reused unchanged.
+#
+# Timetable screenshots need a rendered page, so they are only taken in browser mode.
+# ==============================================================================
+
+
+# ==============================================================================
+# Private Helpers
+# ==============================================================================
+
+
+class _TableParser(HTMLParser):
+    # Collects header texts and row HTML of every "table.table-bordered", plus the no-data flag.
+    # Rows are re-serialized the way a browser's outerHTML would be
+    # (character references decoded, attributes double-quoted), so parse_rows() sees the same input.
+    def __init__(self):
+        super().__init__(convert_charrefs = True)
+        self.headers: List[str] = []
+        self.rows: List[str] = []
+        self.no_data: bool = False
+
+        self._table_depth: int = 0
+        self._section: Optional[str] = None
+        self._header: Optional[List[str]] = None
+        self._row: Optional[List[str]] = None
+
+    @staticmethod
+    def _classes(attrs: List[Tuple[str, Optional[str]]]) -> List[str]:
+        return " ".join(value or "" for key, value in attrs if key == "class").split()
+
+    @staticmethod
+    def _start_tag(tag: str, attrs: List[Tuple[str, Optional[str]]]) -> str:
+        rendered: str = "".join(
+            f' {key}="{escape(value, quote = True)}"' if value is not None else f" {key}" for key, value in attrs
+        )
+        return f"<{tag}{rendered}>"
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        classes: List[str] = self._classes(attrs)
+        if "error-container" in classes:
+            self.no_data = True
+
+        if tag == "table" and (self._table_depth or "table-bordered" in classes):
+            self._table_depth += 1
+            if self._table_depth == 1:
+                return
+
+        if not self._table_depth:
+            return
+
+        if tag in ("thead", "tbody"):
+            self._section = tag
+        elif tag == "th" and self._section == "thead":
+            self._header = []
+        elif tag == "tr" and self._section == "tbody" and self._row is None:
+            self._row = []
+
+        if self._row is not None:
+            self._row.append(self._start_tag(tag, attrs))
+        if tag == "br" and self._header is not None:
+            self._header.append("\n")
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if not self._table_depth:
+            return
+
+        if tag == "table":
+            self._table_depth -= 1
+            if not self._table_depth:
+                return
+
+        if self._row is not None and tag not in VOID_TAGS:
+            self._row.append(f"</{tag}>")
+
+        if tag == "th" and self._header is not None:
+            # Same as WebElement.text: <br> becomes a line break, other whitespace collapses.
+            lines: List[str] = [" ".join(line.split()) for line in "".join(self._header).split("\n")]
+            self.headers.append("\n".join(line for line in lines if line))
+            self._header = None
+        elif tag == "tr" and self._row is not None:
+            self.rows.append("".join(self._row))
+            self._row = None
+        elif tag in ("thead", "tbody"):
+            self._section = None
+
+    def handle_data(self, data: str) -> None:
+        if self._header is not None:
+            self._header.append(data)
+        if self._row is not None:
+            self._row.append(escape(data, quote = False).replace("\xa0", "&nbsp;"))
+
+
+# ==============================================================================
+# Public API
+# ==============================================================================
+# Methods below are intended for external use.
+
+
+def export_session(driver) -> Optional[Dict]:
+    # Blocking WebDriver calls, run it with asyncio.to_thread().
+    form: Optional[Dict] = driver.execute_script(EXPORT_FORM_JS)
+    if not form:
+        return None
+
+    form["cookies"] = driver.get_cookies()
+    return form
+
+
+def extract_dom_table(driver) -> Dict:
+    # Blocking WebDriver call, one round trip instead of one per header / row / element lookup.
+    return driver.execute_script(EXTRACT_TABLE_JS)
+
+
+def extract_table(html: str) -> Tuple[Tuple[str, ...], Tuple[str, ...], bool]:
+    # Returns (time_datas, rows_html, no_data) in the shape scrape_table() returns.
+    parser = _TableParser()
+    parser.feed(html)
+    parser.close()
+
+    time_datas: Tuple[str, ...] = ("", *parser.headers[HEADER_SLICE])
+    rows_html: Tuple[str, ...] = tuple(parser.rows[ROW_SLICE])
+    return time_datas, rows_html, parser.no_data or not rows_html
+
+
+class ScheduleClient:
+    # Pooled HTTP client that replays the course-query form with the browser's session cookies.
+    # Usage:
+    #     async with ScheduleClient(session_info, concurrency = 4) as client:
+    #         htmls = await asyncio.gather(*(client.fetch_term(y, s) for y, s in client.terms()))
+    def __init__(self, session_info: Dict, concurrency: int = 4, timeout: float = 15):
+        self._info: Dict = session_info
+        self._concurrency: int = max(1, int(concurrency))
+        self._timeout: float = timeout
+        self._semaphore = asyncio.Semaphore(self._concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> "ScheduleClient":
+        jar = aiohttp.CookieJar(unsafe = True)
+        action = URL(self._info["action"])
+        for cookie in self._info.get("cookies", ()):
+            jar.update_cookies({cookie["name"]: cookie["value"]}, response_url = action)
+
+        self._session = aiohttp.ClientSession(
+            connector = aiohttp.TCPConnector(limit = self._concurrency),
+            cookie_jar = jar,
+            timeout = aiohttp.ClientTimeout(total = self._timeout),
+            headers = {"User-Agent": self._info.get("user_agent", ""), "Referer": self._info.get("referer", "")},
+        )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    def terms(self) -> Iterable[Tuple[Tuple[str, str], Tuple[str, str]]]:
+        # ((year_value, year_text), (semester_value, semester_text)) for every term offered by the form.
+        for year in self._info["years"]:
+            for semester in self._info["semesters"]:
+                yield tuple(year), tuple(semester)
+
+    async def fetch_term(self, year_value: str, semester_value: str) -> str:
+        fields: List[Tuple[str, str]] = [
+            (name, value) for name, value in self._info["fields"] if name not in ("CosYear", "CosSmtr")
+        ]
+        fields.extend((("CosYear", year_value), ("CosSmtr", semester_value)))
+
+        async with self._semaphore:
+            if self._info["method"] == "post":
+                request = self._session.post(self._info["action"], data = fields)
+            else:
+                request = self._session.get(self._info["action"], params = fields)
+
+            async with request as response:
+                response.raise_for_status()
+                return await response.text(errors = "replace")
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+    Created on Sun Oct 18 01:37:25 2026
+
+    @author: Johnson
+"""
+
+# ==============================================================================
+# Standard Library Imports
+# ==============================================================================
+
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+from typing import Optional, Final, Tuple, List, Dict, Iterable
+
+# ==============================================================================
+# Third-Party Imports
+# ==============================================================================
+
+import cv2
+import numpy as np
+
+# ==============================================================================
+# Constants
+# ==============================================================================
+
+# Captcha debug images never leave the machine.
+DEBUG_IMAGES: Final[re.Pattern] = re.compile(r"^(?:captcha|denoising|dilate)\.png$")
+TIMETABLE_IMAGES: Final[re.Pattern] = re.compile(r"^schedule_info_.+\.png$")
+SHEET_NAME: Final[str] = "schedule_sheet"
+ENCODINGS: Final[Dict[str, str]] = {"jpeg": ".jpg", "png": ".png"}
+MIN_JPEG_QUALITY: Final[int] = 40
+SHRINK_STEP: Final[float] = 0.8
+
+# Defaults of the "attachments" section in config.yaml.
+ATTACHMENT_DEFAULTS: Final[Dict] = {
+    "output": "./attachments",
+    "cache": "./attachments_cache",
+    "format": "jpeg",
+    "quality": 85,
+    "max_width": 1280,
+    "max_bytes": 400000,
+    "contact_sheet": True,
+    "columns": 2,
+    "sheet_width": 1920,
+    "workers": 2,
+}
+
+# ==============================================================================
+# Global Variables
+# ==============================================================================
+
+console_log = logging.getLogger("Console_log")
+
+# ==============================================================================
+# NOTE:
+# The purpose of this Imagetools.py module is to shrink what the notifiers send.
+#
+# Timetable screenshots and charts are full-resolution PNGs, attached one by one to the mail
+# and uploaded one by one for LINE. prepare_attachments() runs between the analysis and the notifiers:
+#     - every schedule_info_*.png is tiled into one contact sheet (optional, "contact_sheet"),
+#     - every image is downscaled to "max_width" and re-encoded ("format", "quality")
+#         until it fits "max_bytes", lowering quality first and then resolution,
+#     - the encoding runs in a process pool with cv2,
+#     - results are cached in "cache" under a hash of the source bytes plus the settings,
+#         so unchanged screenshots are never re-encoded,
+#     - entries the current job set did not use are deleted, so "cache" holds one run's worth of files.
+# The current attachment set is then copied into "output", which the notifiers send instead of img_path.
+# ==============================================================================
+
+
+# ==============================================================================
+# Private Helpers
+# ==============================================================================
+
+
+def _cache_key(sources: Iterable[str], settings: Dict) -> str:
+    digest = hashlib.sha256(json.dumps(settings, sort_keys = True).encode("utf-8"))
+    for source in sources:
+        with open(source, "rb") as img_f:
+            digest.update(hashlib.sha256(img_f.read()).digest())
+    return digest.hexdigest()
+
+
+def _resize_to_width(img: np.ndarray, width: int) -> np.ndarray:
+    if img.shape[1] <= width:
+        return img
+    height: int = max(1, round(img.shape[0] * width / img.shape[1]))
+    return cv2.resize(img, (width, height), interpolation = cv2.INTER_AREA)
+
+
+def _encode_to_budget(img: np.ndarray, settings: Dict) -> bytes:
+    # Lower JPEG quality first, then shrink the resolution, until the budget is met.
+    while True:
+        if settings["format"] == "png":
+            qualities: List[int] = [9]
+        else:
+            qualities = list(range(settings["quality"], MIN_JPEG_QUALITY - 1, -10)) or [MIN_JPEG_QUALITY]
+
+        for quality in qualities:
+            params: List[int] = [cv2.IMWRITE_PNG_COMPRESSION, quality] if settings["format"] == "png" \
+                else [cv2.IMWRITE_JPEG_QUALITY, quality, cv2.IMWRITE_JPEG_OPTIMIZE, 1]
+            ok, buffer = cv2.imencode(ENCODINGS[settings["format"]], img, params)
+            if not ok:
+                raise ValueError("Image encode fail.")
+            if buffer.size <= settings["max_bytes"]:
+                return buffer.tobytes()
+
+        if min(img.shape[:2]) < 64:
+            return buffer.tobytes()
+        img = cv2.resize(img, None, fx = SHRINK_STEP, fy = SHRINK_STEP, interpolation = cv2.INTER_AREA)
+
+
+def _contact_sheet(imgs: List[np.ndarray], columns: int, width: int) -> np.ndarray:
+    # Grid of equally wide cells on a white background, row height = tallest cell of the row.
+    cell_width: int = width // columns
+    cells: List[np.ndarray] = [_resize_to_width(img, cell_width) for img in imgs]
+
+    rows: List[np.ndarray] = []
+    for start in range(0, len(cells), columns):
+        row_cells: List[np.ndarray] = cells[start:start + columns]
+        height: int = max(cell.shape[0] for cell in row_cells)
+        row = np.full((height, cell_width * columns, 3), 255, np.uint8)
+        for idx, cell in enumerate(row_cells):
+            row[:cell.shape[0], idx * cell_width:idx * cell_width + cell.shape[1]] = cell
+        rows.append(row)
+    return np.vstack(rows)
+
+
+def _optimize_in_worker(sources: List[str], cache_path: str, settings: Dict) -> str:
+    # Runs in a process pool worker. One source is a single image, several form a contact sheet.
+    imgs: List[np.ndarray] = []
+    for source in sources:
+        img: Optional[np.ndarray] = cv2.imread(source, cv2.IMREAD_COLOR)
+        if img is None:
+            raise ValueError(f"Unreadable image : {source}")
+        imgs.append(img)
+
+    if len(imgs) == 1:
+        img = _resize_to_width(imgs[0], settings["max_width"])
+    else:
+        img = _contact_sheet(imgs, settings["columns"], settings["sheet_width"])
+
+    temp_path: str = f"{cache_path}.tmp"
+    with open(temp_path, "wb") as img_f:
+        img_f.write(_encode_to_budget(img, settings))
+    os.replace(temp_path, cache_path)
+    return cache_path
+
+
+def _materialize(files: List[Tuple[str, str]], output: str, img_dir: str) -> None:
+    # Replace the previous attachment set in output with (name, cached file) pairs.
+    if os.path.abspath(output) == os.path.abspath(img_dir):
+        raise ValueError("Attachment output must differ from img_path.")
+
+    os.makedirs(output, exist_ok = True)
+    for file in os.listdir(output):
+        path: str = os.path.join(output, file)
+        if os.path.isfile(path):
+            os.remove(path)
+
+    for name, cached in files:
+        shutil.copyfile(cached, os.path.join(output, name + os.path.splitext(cached)[1]))
+
+
+def _prune_cache(cache_dir: str, keep: Iterable[str]) -> int:
+    # Remove cached encodings (and leftover temporary files) that are not part of the current set.
+    kept: set = {os.path.abspath(path) for path in keep}
+    removed: int = 0
+
+    for file in os.listdir(cache_dir):
+        path: str = os.path.join(cache_dir, file)
+        if os.path.isfile(path) and os.path.abspath(path) not in kept:
+            os.remove(path)
+            removed += 1
+    return removed
+
+
+# ==============================================================================
+# Public API
+# ==============================================================================
+# Methods below are intended for external use.
+
+
+def list_images(img_dir: str) -> List[str]:
+    # Images in img_dir that may be sent to the user.
+    return sorted(
+        os.path.join(img_dir, file) for file in os.listdir(img_dir)
+        if not DEBUG_IMAGES.match(file) and os.path.isfile(os.path.join(img_dir, file))
+    )
+
+
+async def prepare_attachments(img_dir: str, attachment_configs: Optional[Dict] = None) -> str:
+    # Returns the directory holding the optimized attachment set.
+    settings: Dict = {**ATTACHMENT_DEFAULTS, **(attachment_configs or {})}
+    if settings["format"] not in ENCODINGS:
+        raise ValueError(f"Unsupported attachment format : {settings['format']}")
+
+    encode_settings: Dict = {
+        key: settings[key] for key in ("format", "quality", "max_width", "max_bytes", "columns", "sheet_width")
+    }
+    extension: str = ENCODINGS[settings["format"]]
+
+    images: List[str] = list_images(img_dir)
+    timetables: List[str] = [path for path in images if TIMETABLE_IMAGES.match(os.path.basename(path))]
+
+    # (attachment name, sources)
+    jobs: List[Tuple[str, List[str]]] = []
+    if settings["contact_sheet"] and len(timetables) > 1:
+        jobs.append((SHEET_NAME, timetables))
+        images = [path for path in images if path not in timetables]
+    jobs.extend((os.path.splitext(os.path.basename(path))[0], [path]) for path in images)
+
+    os.makedirs(settings["cache"], exist_ok = True)
+    cache_paths: Dict[str, str] = await asyncio.to_thread(lambda: {
+        name: os.path.join(settings["cache"], _cache_key(sources, encode_settings) + extension)
+        for name, sources in jobs
+    })
+
+    misses: List[Tuple[str, List[str]]] = [
+        (name, sources) for name, sources in jobs if not os.path.exists(cache_paths[name])
+    ]
+    if misses:
+        loop = asyncio.get_running_loop()
+        with concurrent.futures.ProcessPoolExecutor(max_workers = max(1, int(settings["workers"]))) as executor:
+            results: List = await asyncio.gather(
+                *(loop.run_in_executor(executor, _optimize_in_worker, sources, cache_paths[name], encode_settings)
+                    for name, sources in misses),
+                return_exceptions = True
+            )
+
+        for (name, sources), result in zip(misses, results):
+            if isinstance(result, Exception):
+                console_log.error(f"Optimize attachment {name} fail, sending originals : {result}")
+                # Fall back to the untouched sources for this job.
+                jobs = [job for job in jobs if job[0] != name]
+                jobs.extend((os.path.splitext(os.path.basename(source))[0], [source]) for source in sources)
+                for source in sources:
+                    cache_paths[os.path.splitext(os.path.basename(source))[0]] = source
+
+    output: str = settings["output"]
+    await asyncio.to_thread(_materialize, [(name, cache_paths[name]) for name, _ in jobs], output, img_dir)
+    pruned: int = await asyncio.to_thread(_prune_cache, settings["cache"], cache_paths.values())
+    if pruned:
+        console_log.debug(f"Attachment cache pruned : {pruned} stale files.")
+
+    console_log.info(f"Attachments ready : {len(jobs)} files ({len(misses)} encoded, {len(jobs) - len(misses)} cached).")
+    return output
@@ -0,0 +1,495 @@
+# -*- coding: utf-8 -*-
+"""
+    Created on Sun Oct 18 04:12:55 2026
+
+    @author: Johnson
+"""
+
+# ==============================================================================
+# Standard Library Imports
+# ==============================================================================
+
+import asyncio
+import base64
+import binascii
+import collections
+import json
+import logging
+import random
+import secrets
+import threading
+import time
+from typing import Optional, Final, Tuple, List, Dict
+
+# ==============================================================================
+# Third-Party Imports
+# ==============================================================================
+
+import cv2
+import numpy as np
+from aiohttp import web
+
+# ==============================================================================
+# Constants
+# ==============================================================================
+
+SESSION_COOKIE: Final[str] = "ASPSESSIONIDMOCK"
+CAPTCHA_SIZE: Final[Tuple[int, int]] = (100, 40)
+WEEKDAYS: Final[Tuple[str, ...]] = (
+    "星期一<br>Mon", "星期二<br>Tue", "星期三<br>Wed", "星期四<br>Thu", "星期五<br>Fri", "星期六<br>Sat", "星期日<br>Sun"
+)
+# Periods 1 - 11 come before the 4 synthetic rows of a fixture table (ROW_SLICE in Fetchtools.py).
+FILLER_PERIODS: Final[Tuple[Tuple[str, str], ...]] = (
+    ("0810", "0900"), ("0910", "1000"), ("1010", "1100"), ("1110", "1200"), ("1210", "1300"), ("1310", "1400"),
+    ("1410", "1500"), ("1510", "1600"), ("1610", "1700"), ("1710", "1800"), ("1730", "1815"),
+)
+
+# Defaults of the "bench.e2e.portal" section in config.yaml.
+# latency / failures are keyed by route : login (login page and form), captcha, news, course (course page),
+# query (btn-info submit, also the http fetch mode) and notify (mail, LINE upload and push).
+PORTAL_DEFAULTS: Final[Dict] = {
+    "host": "127.0.0.1",
+    "port": 8765,
+    "smtp_port": 8766,
+    "smtp_user": "bench@localhost",
+    "smtp_password": "bench",
+    "account": "A12345678",
+    "password": "bench123",
+    "years": [110, 111, 112, 113, 114],
+    "no_data": ["114-2"],
+    "fixtures": "./bench_fixtures/schedule_rows.json",
+    "accept_any_captcha": False,
+    "captcha_reject": 0.0,
+    "session_ttl": 1800,
+    "latency": {},
+    "jitter": 0.0,
+    "failures": {},
+    "seed": 0,
+}
+
+LOGIN_PAGE: Final[str] = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Mock Portal</title></head>
+<body>
+<form method="post" action="/login">
+    <input type="text" name="STDNO">
+    <input type="password" name="PASSWD">
+    <img id="vimg" src="/vimg.png" width="100" height="40" onclick="this.src = '/vimg.png?' + Date.now()">
+    <input type="text" id="ValidCode_login" name="ValidCode_login">
+    <button type="submit" class="btn btn-primary">Login</button>
+</form>
+{alert}
+</body>
+</html>
+"""
+
+NEWS_PAGE: Final[str] = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Mock Portal - News</title></head>
+<body>
+<nav>
+    <a id="personalinfo" href="javascript:void(0)">Personal Info</a>
+    <a id="class" href="javascript:void(0)">Courses</a>
+    <a id="c2" href="/course.asp">Timetable</a>
+</nav>
+<p>Latest news.</p>
+</body>
+</html>
+"""
+
+COURSE_PAGE: Final[str] = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Mock Portal - Timetable</title></head>
+<body>
+<form method="post" action="/course.asp">
+    <select name="CosYear">{years}</select>
+    <select name="CosSmtr">{semesters}</select>
+    <button type="submit" class="btn btn-info" name="btnQuery" value="query">Query</button>
+</form>
+{result}
+</body>
+</html>
+"""
+
+# ==============================================================================
+# Global Variables
+# ==============================================================================
+
+console_log = logging.getLogger("Console_log")
+
+# ==============================================================================
+# NOTE:
+# The purpose of this Mocktools.py module is to run the whole pipeline without the real portal.
+#
+# MockPortal is an aiohttp.web server that serves the pages main() walks through:
+#     - "/"            : login form (STDNO, PASSWD, the vimg captcha image, ValidCode_login, btn-primary),
+#         a wrong captcha or password comes back as a JavaScript alert, like the real portal,
+#     - "/news.asp"    : landing page with the personalinfo / class / c2 menu,
+#         pages behind the login redirect to "/" once the session expires ("session_ttl"),
+#     - "/course.asp"  : CosYear / CosSmtr / btn-info form, answering with a table-bordered timetable
+#         built from the synthetic rows in "fixtures", or an error-container for the "no_data" terms,
+#     - "/line/upload", "/line/push" and a minimal SMTP listener on "smtp_port", standing in for the notifiers.
+#         Like Gmail, the SMTP listener advertises AUTH PLAIN LOGIN, accepts only "smtp_user" / "smtp_password"
+#         and answers MAIL FROM with 530 until the client has logged in, so MailTransport's login is exercised.
+# Every route can be slowed down ("latency" seconds plus up to "jitter") or made to fail with HTTP 503
+# ("failures" probability), with a seeded random generator so runs are reproducible.
+#
+# The server runs in its own thread and event loop (start() / stop()), because main() still makes
+# synchronous WebDriver calls on its event loop, which would otherwise block the server it is waiting for.
+# "mock-portal" serves it in the foreground; "bench-e2e" runs main() against it, see Asyncio-course-fetcher.py.
+# ==============================================================================
+
+
+# ==============================================================================
+# Private Helpers
+# ==============================================================================
+
+
+def _captcha_png(code: str, rng: random.Random) -> bytes:
+    # Near-black digits over light strike lines, like the real portal,
+    # so the digits stay dark under every configured OCR threshold and the lines fall away.
+    width, height = CAPTCHA_SIZE
+    img = np.full((height, width, 3), 255, np.uint8)
+    for _ in range(6):
+        cv2.line(
+            img, (rng.randrange(width), rng.randrange(height)), (rng.randrange(width), rng.randrange(height)),
+            (rng.randrange(150, 220),) * 3, 1
+        )
+    for idx, digit in enumerate(code):
+        cv2.putText(
+            img, digit, (8 + idx * 18, 28 + rng.randrange(-3, 4)),
+            cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2, cv2.LINE_AA
+        )
+    return cv2.imencode(".png", img)[1].tobytes()
+
+
+def _options(values: List[str], selected: Optional[str]) -> str:
+    return "".join(
+        f"<option value=\"{value}\"{' selected' if value == selected else ''}>{value}</option>" for value in values
+    )
+
+
+def _timetable(rows: List[str]) -> str:
+    headers: str = "".join(f"<th>{day}</th>" for day in WEEKDAYS)
+    fillers: str = "".join(
+        f"<tr class=\"text-center\"><td>{period}<br>{start}<br>{end}</td>{'<td>　</td>' * len(WEEKDAYS)}</tr>"
+        for period, (start, end) in enumerate(FILLER_PERIODS, 1)
+    )
+    return (
+        f"<table class=\"table table-bordered\"><thead><tr><th>節次</th>{headers}</tr></thead>"
+        f"<tbody>{fillers}{''.join(rows)}</tbody></table>"
+        f"<div class=\"bolder\">End of timetable.</div>"
+    )
+
+
+# ==============================================================================
+# Public API
+# ==============================================================================
+# Methods below are intended for external use.
+
+
+class MockPortal:
+    # Usage:
+    #     portal = MockPortal(portal_configs)
+    #     portal.start()                    # background thread
+    #     ... run against portal.url ...
+    #     portal.stop()
+    #
+    #     await portal.serve()              # foreground, until cancelled
+    def __init__(self, portal_configs: Optional[Dict] = None):
+        self._settings: Dict = {**PORTAL_DEFAULTS, **(portal_configs or {})}
+        self._rng = random.Random(self._settings["seed"])
+        self._sessions: Dict[str, Dict] = {}
+        self._retry_keys: set = set()
+        self._runner: Optional[web.AppRunner] = None
+        self._smtp: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self.stats: collections.Counter = collections.Counter()
+
+        with open(self._settings["fixtures"], "r", encoding = "utf-8") as json_f:
+            tables: List[List[str]] = json.load(json_f)
+
+        years: List[str] = [str(year) for year in self._settings["years"]]
+        terms: List[str] = [f"{year}-{semester}" for year in years for semester in ("1", "2")]
+        self._years: List[str] = years
+        self._tables: Dict[str, List[str]] = {
+            term: tables[idx % len(tables)] for idx, term in enumerate(terms)
+            if term not in self._settings["no_data"]
+        }
+
+    @property
+    def url(self) -> str:
+        return f"http://{self._settings['host']}:{self._settings['port']}/"
+
+    @property
+    def smtp_address(self) -> Tuple[str, int]:
+        return self._settings["host"], self._settings["smtp_port"]
+
+    @property
+    def account(self) -> Tuple[str, str]:
+        return self._settings["account"], self._settings["password"]
+
+    @property
+    def smtp_credentials(self) -> Tuple[str, str]:
+        return self._settings["smtp_user"], self._settings["smtp_password"]
+
+    # --------------------------------------------------------------------------
+    # Private Injection And Session Methods
+    # --------------------------------------------------------------------------
+
+    async def _delay(self, route: str) -> None:
+        self.stats[route] += 1
+        delay: float = self._settings["latency"].get(route, 0) + self._rng.uniform(0, self._settings["jitter"])
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _fails(self, route: str) -> bool:
+        if self._rng.random() < self._settings["failures"].get(route, 0):
+            self.stats[f"{route}_failed"] += 1
+            return True
+        return False
+
+    async def _inject(self, route: str) -> None:
+        await self._delay(route)
+        if self._fails(route):
+            raise web.HTTPServiceUnavailable(text = f"Injected {route} failure.")
+
+    def _session(self, request: web.Request) -> Tuple[str, Dict]:
+        sid: Optional[str] = request.cookies.get(SESSION_COOKIE)
+        if sid not in self._sessions:
+            sid = secrets.token_hex(16)
+            self._sessions[sid] = {"captcha": None, "auth_until": 0.0}
+        return sid, self._sessions[sid]
+
+    def _html(self, sid: str, text: str) -> web.Response:
+        response = web.Response(text = text, content_type = "text/html", charset = "utf-8")
+        response.set_cookie(SESSION_COOKIE, sid, httponly = True)
+        return response
+
+    def _authenticated(self, request: web.Request) -> Tuple[str, Dict]:
+        sid, session = self._session(request)
+        if session["auth_until"] < time.time():
+            raise web.HTTPFound("/")
+        return sid, session
+
+    # --------------------------------------------------------------------------
+    # Private Handlers
+    # --------------------------------------------------------------------------
+
+    async def _login_page(self, request: web.Request) -> web.Response:
+        await self._inject("login")
+        sid, _ = self._session(request)
+        return self._html(sid, LOGIN_PAGE.format(alert = ""))
+
+    async def _captcha(self, request: web.Request) -> web.Response:
+        await self._inject("captcha")
+        sid, session = self._session(request)
+        session["captcha"] = "".join(self._rng.choice("0123456789") for _ in range(5))
+
+        response = web.Response(body = _captcha_png(session["captcha"], self._rng), content_type = "image/png")
+        response.set_cookie(SESSION_COOKIE, sid, httponly = True)
+        return response
+
+    async def _login(self, request: web.Request) -> web.Response:
+        await self._inject("login")
+        sid, session = self._session(request)
+        form = await request.post()
+
+        code: str = str(form.get("ValidCode_login", "")).strip()
+        if self._settings["accept_any_captcha"]:
+            captcha_ok: bool = len(code) == 5 and code.isdigit()
+        else:
+            captcha_ok = bool(session["captcha"]) and code == session["captcha"]
+        captcha_ok = captcha_ok and self._rng.random() >= self._settings["captcha_reject"]
+        account_ok: bool = (form.get("STDNO"), form.get("PASSWD")) == self.account
+
+        # A captcha is valid for one attempt, like the real portal.
+        session["captcha"] = None
+        if not (captcha_ok and account_ok):
+            self.stats["login_rejected"] += 1
+            message: str = "驗證碼錯誤!" if not captcha_ok else "帳號或密碼錯誤!"
+            return self._html(sid, LOGIN_PAGE.format(alert = f"<script>alert(\"{message}\");</script>"))
+
+        session["auth_until"] = time.time() + self._settings["session_ttl"]
+        self.stats["login_accepted"] += 1
+        response = web.HTTPFound("/news.asp")
+        response.set_cookie(SESSION_COOKIE, sid, httponly = True)
+        raise response
+
+    async def _news(self, request: web.Request) -> web.Response:
+        await self._inject("news")
+        sid, _ = self._authenticated(request)
+        return self._html(sid, NEWS_PAGE)
+
+    async def _course(self, request: web.Request) -> web.Response:
+        sid, _ = self._authenticated(request)
+        if request.method != "POST":
+            await self._inject("course")
+            return self._html(sid, COURSE_PAGE.format(
+                years = _options(self._years, None), semesters = _options(["1", "2"], None), result = ""
+            ))
+
+        await self._inject("query")
+        form = await request.post()
+        year, semester = str(form.get("CosYear", "")), str(form.get("CosSmtr", ""))
+        rows: Optional[List[str]] = self._tables.get(f"{year}-{semester}")
+
+        result: str = _timetable(rows) if rows else "<div class=\"error-container\">查無資料 No data.</div>"
+        return self._html(sid, COURSE_PAGE.format(
+            years = _options(self._years, year), semesters = _options(["1", "2"], semester), result = result
+        ))
+
+    async def _line_upload(self, request: web.Request) -> web.Response:
+        await self._inject("notify")
+        form = await request.post()
+        upload = form.get("fileToUpload")
+        name: str = getattr(upload, "filename", None) or "image.png"
+        return web.Response(text = f"{self.url}files/{secrets.token_hex(4)}-{name}")
+
+    async def _line_push(self, request: web.Request) -> web.Response:
+        await self._inject("notify")
+        # Like LINE, a repeated X-Line-Retry-Key is answered with 409 and not delivered again.
+        retry_key: Optional[str] = request.headers.get("X-Line-Retry-Key")
+        if retry_key in self._retry_keys:
+            self.stats["line_duplicates"] += 1
+            return web.json_response({"message": "The retry key is already accepted"}, status = 409)
+
+        payload: Dict = await request.json()
+        if retry_key:
+            self._retry_keys.add(retry_key)
+        self.stats["line_messages"] += len(payload.get("messages", ()))
+        return web.json_response({})
+
+    async def _smtp_credentials(self, args: List[bytes], reader: asyncio.StreamReader,
+                                    writer: asyncio.StreamWriter) -> Tuple[str, str]:
+        # AUTH PLAIN [initial response] or AUTH LOGIN [username], missing parts are asked with 334.
+        async def ask(prompt: bytes) -> bytes:
+            writer.write(b"334 " + base64.b64encode(prompt) + b"\r\n")
+            await writer.drain()
+            return base64.b64decode((await reader.readline()).strip())
+
+        if args[1].upper() == b"PLAIN":
+            _, user, password = (base64.b64decode(args[2]) if len(args) > 2 else await ask(b"")).split(b"\0")
+        else:
+            user = base64.b64decode(args[2]) if len(args) > 2 else await ask(b"Username:")
+            password = await ask(b"Password:")
+        return user.decode("utf-8"), password.decode("utf-8")
+
+    async def _smtp_session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Just enough SMTP for aiosmtplib, including the AUTH exchange MailTransport performs.
+        writer.write(b"220 mock ESMTP\r\n")
+        in_data: bool = False
+        authenticated: bool = False
+
+        try:
+            while line := await reader.readline():
+                if in_data:
+                    if line.rstrip(b"\r\n") == b".":
+                        in_data = False
+                        await self._delay("notify")
+                        if self._fails("notify"):
+                            writer.write(b"451 Injected notify failure\r\n")
+                        else:
+                            self.stats["mails"] += 1
+                            writer.write(b"250 OK queued\r\n")
+                        await writer.drain()
+                    continue
+
+                match line[:4].upper():
+                    case b"EHLO":
+                        writer.write(b"250-mock\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+                    case b"AUTH":
+                        args: List[bytes] = line.split()
+                        try:
+                            authenticated = await self._smtp_credentials(args, reader, writer) == self.smtp_credentials
+                        except (IndexError, ValueError, binascii.Error):
+                            authenticated = False
+                        self.stats["smtp_logins" if authenticated else "smtp_logins_rejected"] += 1
+                        writer.write(b"235 2.7.0 Authentication successful\r\n" if authenticated
+                                        else b"535 5.7.8 Authentication credentials invalid\r\n")
+                    case b"MAIL" if not authenticated:
+                        writer.write(b"530 5.7.0 Authentication required\r\n")
+                    case b"DATA":
+                        in_data = True
+                        writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                    case b"QUIT":
+                        writer.write(b"221 Bye\r\n")
+                        await writer.drain()
+                        break
+                    case _:
+                        writer.write(b"250 OK\r\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    # --------------------------------------------------------------------------
+    # Lifecycle
+    # --------------------------------------------------------------------------
+
+    async def _start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/", self._login_page)
+        app.router.add_get("/vimg.png", self._captcha)
+        app.router.add_post("/login", self._login)
+        app.router.add_get("/news.asp", self._news)
+        app.router.add_route("*", "/course.asp", self._course)
+        app.router.add_post("/line/upload", self._line_upload)
+        app.router.add_post("/line/push", self._line_push)
+
+        self._runner = web.AppRunner(app, access_log = None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self._settings["host"], self._settings["port"]).start()
+        self._smtp = await asyncio.start_server(self._smtp_session, *self.smtp_address)
+        console_log.info(f"Mock portal listening on {self.url} (smtp {self.smtp_address[1]}).")
+
+    async def _stop(self) -> None:
+        if self._smtp:
+            self._smtp.close()
+            await self._smtp.wait_closed()
+            self._smtp = None
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def serve(self) -> None:
+        await self._start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self._stop()
+
+    def start(self, timeout: float = 10) -> None:
+        # Serves from a daemon thread with its own event loop; returns once the sockets are listening.
+        ready = threading.Event()
+        errors: List[BaseException] = []
+        self._loop = asyncio.new_event_loop()
+
+        def run() -> None:
+            try:
+                self._loop.run_until_complete(self._start())
+            except BaseException as e:
+                errors.append(e)
+                self._loop.close()
+                return
+            finally:
+                ready.set()
+
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._stop())
+            self._loop.close()
+
+        self._thread = threading.Thread(target = run, name = "MockPortal", daemon = True)
+        self._thread.start()
+        if not ready.wait(timeout):
+            raise TimeoutError("Mock portal did not start in time.")
+        if errors:
+            raise errors[0]
+
+    def stop(self) -> None:
+        if self._thread and self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+        self._thread = None
@@ -9,25 +9,62 @@
 # Standard Library Imports
 # ==============================================================================
 
+import asyncio
 import logging
 import os
-import re
-from smtplib import SMTP, SMTPAuthenticationError
+import uuid
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.image import MIMEImage
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, Tuple, List, Iterable, Awaitable, Callable
 
 # ==============================================================================
 # Third-Party Imports
 # ==============================================================================
 
-import requests
-from linebot import LineBotApi
-from linebot.models import TextSendMessage, ImageSendMessage
+import aiohttp
+import aiosmtplib
+from aiosmtplib import SMTPAuthenticationError, SMTPServerDisconnected
 from twilio.http.async_http_client import AsyncTwilioHttpClient
 from twilio.rest import Client
 
+# ==============================================================================
+# Local Imports
+# ==============================================================================
+
+from Imagetools import list_images
+
+# ==============================================================================
+# Constants
+# ==============================================================================
+
+# Defaults of the "notify.mail" section in config.yaml (Gmail with STARTTLS).
+MAIL_DEFAULTS: Dict = {
+    "host": "smtp.gmail.com",
+    "port": 587,
+    "start_tls": True,
+    "use_tls": False,
+    "timeout": 30,
+    "subject": "MUST Learning Outcomes Report",
+}
+
+# Defaults of the "notify.line" section in config.yaml.
+LINE_DEFAULTS: Dict = {
+    "upload_url": "https://litterbox.catbox.moe/resources/internals/api.php",
+    "upload_expiry": "1h",
+    "push_url": "https://api.line.me/v2/bot/message/push",
+    "concurrency": 4,
+    "retries": 3,
+    "backoff": 0.5,
+    "timeout": 15,
+}
+# LINE accepts at most 5 message objects per push.
+LINE_BATCH: int = 5
+# Worth retrying: rate limited or a transient server / gateway error.
+RETRY_STATUSES: Tuple[int, ...] = (429, 500, 502, 503, 504)
+# LINE answers 409 when a push with the same X-Line-Retry-Key was already accepted.
+ALREADY_ACCEPTED: int = 409
+
 # ==============================================================================
 # Global Variables
 # ==============================================================================
@@ -44,6 +81,25 @@ console_log = logging.getLogger("Console_log")
 # so when the main program imports this module, it does not need to call load_dotenv() again.
 #     # from dotenv import load_dotenv
 #     # load_dotenv()
+#
+# Mail goes through MailTransport, an aiosmtplib session that stays connected and authenticated
+# across send() calls, so several messages share one TCP / TLS / AUTH handshake and nothing blocks
+# the event loop (attachments are read in a worker thread).
+# Host, port, TLS mode and timeout come from "notify.mail" in config.yaml, so a local stand-in
+# can replace Gmail for testing, e.g.:
+#     python -m aiosmtpd -n -l localhost:8025
+#     notify.mail: {host: localhost, port: 8025, start_tls: false}
+# MAIL_ADDR / SMTP_PWD may then be left as dummies; login is skipped if the server offers no AUTH.
+#
+# LINE goes through one pooled aiohttp session per send_line() call: images are uploaded concurrently
+# (bounded by "concurrency"), transient failures are retried with exponential backoff,
+# and the image / text messages are pushed in batches of LINE_BATCH, in order.
+# Each batch carries its own X-Line-Retry-Key, reused by every retry of that batch,
+# so a push whose response was lost is not delivered twice (LINE answers the repeat with 409).
+# send_line() only reports success once every image was uploaded and every batch pushed.
+# An optional "progress" dict (kept per message by the outbox) records the pushed batches and their
+# retry keys, so a later attempt resumes after the last pushed batch instead of resending it.
+# "upload_url" and "push_url" in "notify.line" can point to local stand-ins for benchmarking.
 # ==============================================================================
 
 
@@ -77,20 +133,96 @@ def _set_communication_var(mode: str) -> Optional[Dict[str, str]]:
 
 
 def _iter_images(img_dir: str) -> Tuple[str]:
-    pattern = re.compile(r"^(?:captcha|denoising|dilate)\.png$")
-    return (os.path.join(img_dir, file) for file in os.listdir(img_dir) if not pattern.match(file))
+    return tuple(list_images(img_dir))
 
 
-def _upload_to_litterbox(file_path: str) -> str:
-    with open(file_path, "rb") as file:
-        req = requests.post(
-            "https://litterbox.catbox.moe/resources/internals/api.php",
-            data={"reqtype": "fileupload", "time": "1h"},
-            files={"fileToUpload": file},
-            timeout=10,
-        )
-    req.raise_for_status()
-    return req.text.strip()
+def _read_attachments(paths: Iterable[str]) -> List[MIMEImage]:
+    # Blocking file reads, run it with asyncio.to_thread().
+    attachments: List[MIMEImage] = []
+    for path in paths:
+        with open(path, "rb") as file:
+            img = MIMEImage(file.read())
+        img.add_header("Content-Disposition", "attachment", filename = os.path.basename(path))
+        attachments.append(img)
+    return attachments
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as file:
+        return file.read()
+
+
+class _TransientHTTPError(Exception):
+    pass
+
+
+def _check_status(response: aiohttp.ClientResponse, what: str) -> None:
+    if response.status in RETRY_STATUSES:
+        raise _TransientHTTPError(f"{what} : HTTP {response.status}")
+    response.raise_for_status()
+
+
+async def _with_retry(func: Callable[[], Awaitable], retries: int, backoff: float, what: str):
+    # Retries connection errors, timeouts and RETRY_STATUSES with exponential backoff (backoff, 2x, 4x ...).
+    for attempt in range(retries + 1):
+        try:
+            return await func()
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError, _TransientHTTPError) as e:
+            if attempt == retries:
+                raise
+            delay: float = backoff * 2 ** attempt
+            console_log.warning(f"{what} fail ({e}), retry {attempt + 1} / {retries} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+async def _upload_image(session: aiohttp.ClientSession, semaphore: asyncio.Semaphore,
+                            path: str, settings: Dict) -> str:
+    # Returns the public HTTPS URL of the uploaded image.
+    content: bytes = await asyncio.to_thread(_read_file, path)
+
+    async def upload() -> str:
+        form = aiohttp.FormData()
+        form.add_field("reqtype", "fileupload")
+        form.add_field("time", settings["upload_expiry"])
+        form.add_field("fileToUpload", content, filename = os.path.basename(path))
+
+        async with session.post(settings["upload_url"], data = form) as response:
+            _check_status(response, f"Upload {os.path.basename(path)}")
+            return (await response.text()).strip()
+
+    async with semaphore:
+        return await _with_retry(upload, settings["retries"], settings["backoff"], f"Upload {os.path.basename(path)}")
+
+
+async def _push_messages(session: aiohttp.ClientSession, conf: Dict[str, str],
+                            messages: List[Optional[Dict]], settings: Dict, progress: Optional[Dict] = None) -> None:
+    # progress : {"batches": batches already pushed, "retry_keys": one key per batch}, updated in place.
+    # Messages of already pushed batches may be None, they are not sent again.
+    progress = progress if progress is not None else {}
+    retry_keys: List[str] = progress.setdefault("retry_keys", [])
+
+    for batch, start in enumerate(range(0, len(messages), LINE_BATCH)):
+        if batch < progress.get("batches", 0):
+            continue
+
+        while len(retry_keys) <= batch:
+            retry_keys.append(str(uuid.uuid4()))
+
+        payload: Dict = {"to": conf["USER_ID"], "messages": messages[start:start + LINE_BATCH]}
+        headers: Dict[str, str] = {
+            "Authorization": f"Bearer {conf['ACCESS_TOKEN']}",
+            "X-Line-Retry-Key": retry_keys[batch],
+        }
+
+        async def push() -> None:
+            async with session.post(settings["push_url"], json = payload, headers = headers) as response:
+                if response.status == ALREADY_ACCEPTED:
+                    console_log.info("Line push already accepted by an earlier attempt.")
+                    return
+                _check_status(response, "Line push")
+
+        await _with_retry(push, settings["retries"], settings["backoff"], "Line push")
+        progress["batches"] = batch + 1
 
 
 # ==============================================================================
@@ -124,52 +256,121 @@ async def short_msg(text: str) -> None:
         console_log.error(f"Short msg error : {e}")
 
 
-async def send_mail(text: str, img_path: str) -> None :
+class MailTransport:
+    # Reusable authenticated SMTP session.
+    # Usage:
+    #     async with MailTransport(conf["MAIL_ADDR"], conf["SMTP_PWD"], **mail_configs) as transport:
+    #         await transport.send(msg_1)
+    #         await transport.send(msg_2)
+    def __init__(self, username: str, password: str, host: str = MAIL_DEFAULTS["host"],
+                    port: int = MAIL_DEFAULTS["port"], start_tls: bool = MAIL_DEFAULTS["start_tls"],
+                    use_tls: bool = MAIL_DEFAULTS["use_tls"], timeout: float = MAIL_DEFAULTS["timeout"], **_):
+        self._username: str = username
+        self._password: str = password
+        self._client = aiosmtplib.SMTP(
+            hostname = host,
+            port = port,
+            use_tls = use_tls,
+            start_tls = start_tls,
+            timeout = timeout
+        )
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self) -> "MailTransport":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def connect(self) -> None:
+        if self._client.is_connected:
+            return
+
+        # connect() alone sends no EHLO, and STARTTLS discards the extensions of the plain-text EHLO,
+        # so AUTH is only known after an EHLO on the (possibly upgraded) connection.
+        await self._client.connect()
+        await self._client.ehlo()
+        if self._client.supports_extension("auth"):
+            # login() raises SMTPAuthenticationError on failure instead of returning a value.
+            try:
+                await self._client.login(self._username, self._password)
+                console_log.info("SMTP Login success.")
+            except SMTPAuthenticationError:
+                await self.close()
+                raise SMTPAuthenticationError(535, "SMTP Login fail : MAIL_ADDR or SMTP_PWD is wrong.")
+        else:
+            console_log.debug("SMTP server offers no AUTH, sending without login.")
+
+    async def send(self, msg: MIMEMultipart) -> Dict:
+        # Returns the refused recipients ({} on success).
+        # A server that dropped the idle session gets one reconnect before giving up.
+        async with self._lock:
+            await self.connect()
+            try:
+                errors, _ = await self._client.send_message(msg)
+            except SMTPServerDisconnected:
+                console_log.warning("SMTP session dropped, reconnecting...")
+                await self.connect()
+                errors, _ = await self._client.send_message(msg)
+            return errors
+
+    async def close(self) -> None:
+        if not self._client.is_connected:
+            return
+
+        try:
+            await self._client.quit()
+        except Exception:
+            self._client.close()
+
+
+async def send_mail(text: str, img_path: str, mail_configs: Optional[Dict] = None,
+                        transport: Optional[MailTransport] = None) -> Optional[bool]:
     # SMTP:
-    # - login success -> None
-    # - send_message success -> {}
-    # Both are falsy in Python, so "if not" can be used to check success.
+    # - send_message success -> ({}, response), refused recipients are listed in the dict.
+    # An existing transport is reused (and left open); otherwise one is opened for this message.
     try:
         conf: Dict[str, str] = _set_communication_var("send_mail")
         if not conf:
             return
 
-        with SMTP("smtp.gmail.com", 587) as connector:
-            connector.ehlo()
-            connector.starttls()
+        settings: Dict = {**MAIL_DEFAULTS, **(mail_configs or {})}
 
-            try:
-                # login() raises SMTPAuthenticationError on failure instead of returning a value. 
-                # Since "if" cannot catch exceptions, a dedicated try/except is used.
-                connector.login(conf["MAIL_ADDR"], conf["SMTP_PWD"])
-                console_log.info("SMTP Login success.")
-            except SMTPAuthenticationError:
-                raise SMTPAuthenticationError(535, "SMTP Login fail : MAIL_ADDR or SMTP_PWD is wrong.")
+        msg = MIMEMultipart()
+        msg.attach(MIMEText(text, "plain", "utf-8"))
+        msg["Subject"] = settings["subject"]
+        msg["From"] = conf["MAIL_ADDR"]
+        msg["To"] = conf["TO_ADDR"]
 
-            msg = MIMEMultipart()
-            msg.attach(MIMEText(text, "plain", "utf-8"))
-            msg["Subject"] = "MUST Learning Outcomes Report"
-            msg["From"] = conf["MAIL_ADDR"]
-            msg["To"] = conf["TO_ADDR"]
-
-            for path in _iter_images(img_path):
-                with open(path, "rb") as file:
-                    img = MIMEImage(file.read())
-                    img.add_header("Content-Disposition", "attachment", filename = os.path.basename(path))
-                    msg.attach(img)
-
-            status: Optional[dict] = connector.send_message(msg)
-            if not status:
-                console_log.info(f"Send mail success. TO : {conf["TO_ADDR"]}")
-                return
-            raise Exception(f"TO : {conf["TO_ADDR"]}, {status}")
+        for img in await asyncio.to_thread(_read_attachments, list(_iter_images(img_path))):
+            msg.attach(img)
+
+        if transport:
+            status: Dict = await transport.send(msg)
+        else:
+            async with MailTransport(conf["MAIL_ADDR"], conf["SMTP_PWD"], **settings) as own_transport:
+                status: Dict = await own_transport.send(msg)
+
+        if not status:
+            console_log.info(f"Send mail success. TO : {conf["TO_ADDR"]}")
+            return True
+        raise Exception(f"TO : {conf["TO_ADDR"]}, {status}")
     except SMTPAuthenticationError as ae:
         console_log.error(ae)
     except Exception as e:
         console_log.error(f"Send mail fail : {e}")
 
 
-async def send_line(text: str, img_path: str) -> None:
+def mail_transport(mail_configs: Optional[Dict] = None) -> MailTransport:
+    # Shared transport for several send_mail() calls, e.g. every attempt of one outbox drain.
+    # Nothing connects until the first send, and the caller closes it.
+    settings: Dict = {**MAIL_DEFAULTS, **(mail_configs or {})}
+    return MailTransport(os.getenv("MAIL_ADDR", ""), os.getenv("SMTP_PWD", ""), **settings)
+
+
+async def send_line(text: str, img_path: str, line_configs: Optional[Dict] = None,
+                        progress: Optional[Dict] = None) -> Optional[bool]:
     # Target:
     # Automate the process of sending LINE Bot messages and images through code.
     # The chosen approach has several advantages:
@@ -180,7 +381,7 @@ async def send_line(text: str, img_path: str) -> None:
     #     - URLs are difficult to enumerate or guess, which provides additional privacy.
     #
     # Problem:
-    #     LINE Bot's ImageSendMessage() requires the image to be a publicly accessible HTTPS URL.
+    #     LINE Bot's image message requires the image to be a publicly accessible HTTPS URL.
     #
     # Solution:
     #     After trying multiple approaches (e.g., Google Drive, cloud storage APIs, etc.),
@@ -190,20 +391,48 @@ async def send_line(text: str, img_path: str) -> None:
     #     - An expiration time (time) can be explicitly set (e.g., '1h', '12h', '24h', '72h'), automatically deleting files after expiration.
     #     - Ideal for one-time testing or temporary image delivery, reducing the risk of long-term data exposure on the internet.
     #     - For details and usage restrictions, see the official documentation: https://litterbox.catbox.moe/tools.php
+    #
+    # Nothing is pushed unless every image is uploaded, and the text is always pushed last,
+    # so a failed upload is retried as a whole instead of reaching the user without its image.
+    # With "progress", batches pushed by an earlier attempt are skipped (their images are not uploaded again).
     try:
         conf: Dict[str, str] = _set_communication_var("send_line")
-        line_bot_api = LineBotApi(conf["ACCESS_TOKEN"])
+        if not conf:
+            return
 
-        for path in _iter_images(img_path):
-            url: str = _upload_to_litterbox(path)
-            line_bot_api.push_message(
-                conf["USER_ID"],
-                ImageSendMessage(original_content_url = url, preview_image_url = url)
+        settings: Dict = {**LINE_DEFAULTS, **(line_configs or {})}
+        progress = progress if progress is not None else {}
+        paths: List[str] = list(_iter_images(img_path))
+        pushed: int = progress.get("batches", 0) * LINE_BATCH
+        semaphore = asyncio.Semaphore(max(1, int(settings["concurrency"])))
+
+        async with aiohttp.ClientSession(
+            connector = aiohttp.TCPConnector(limit = settings["concurrency"]),
+            timeout = aiohttp.ClientTimeout(total = settings["timeout"])
+        ) as session:
+            urls: List = await asyncio.gather(
+                *(_upload_image(session, semaphore, path, settings) for path in paths[pushed:]),
+                return_exceptions = True
             )
 
-        line_bot_api.push_message(conf["USER_ID"], TextSendMessage(text))
-        console_log.info('Send line success.')
-    except requests.exceptions.HTTPError as he:
-        console_log.error(he)
+            failed: List[str] = []
+            messages: List[Optional[Dict]] = [None] * min(pushed, len(paths))
+            for path, url in zip(paths[pushed:], urls):
+                if isinstance(url, Exception):
+                    console_log.error(f"Upload {os.path.basename(path)} fail : {url}")
+                    failed.append(os.path.basename(path))
+                    continue
+                messages.append({"type": "image", "originalContentUrl": url, "previewImageUrl": url})
+
+            if failed:
+                console_log.error(f"Send line fail : {len(failed)} / {len(paths)} uploads failed, nothing pushed.")
+                return False
+
+            messages.append({"type": "text", "text": text})
+            await _push_messages(session, conf, messages, settings, progress)
+        console_log.info(f"Send line success. {len(paths)} images.")
+        return True
+    except aiohttp.ClientResponseError as he:
+        console_log.error(f"Send line fail : HTTP {he.status} {he.message}")
     except Exception as e:
-        console_log.error(f'Send line fail : {e}')
\ No newline at end of file
+        console_log.error(f'Send line fail : {e}')
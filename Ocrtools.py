@@ -0,0 +1,645 @@
+# -*- coding: utf-8 -*-
+"""
+    Created on Sat Oct 17 10:12:36 2026
+
+    @author: Johnson
+"""
+
+# ==============================================================================
+# Standard Library Imports
+# ==============================================================================
+
+import asyncio
+import hashlib
+import logging
+import os
+import socket
+import struct
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Optional, Final, Tuple, List, Dict, Iterable, Sequence, Union
+
+# ==============================================================================
+# Third-Party Imports
+# ==============================================================================
+
+import cv2
+import numpy as np
+
+# ==============================================================================
+# Constants
+# ==============================================================================
+
+CAPTCHA_LENGTH: Final[int] = 5
+DEFAULT_THRESHOLDS: Final[Tuple[int, ...]] = (20,)
+DEFAULT_KERNELS: Final[Tuple[Tuple[int, int], ...]] = ((2, 3), (3, 5), (2, 2))
+DEFAULT_MIN_CONFIDENCE: Final[float] = 0.85
+TEMPLATE_DIR: Final[str] = "ocr_templates"
+
+# Glyphs are stretched to (width, height) before matching, digits are taller than wide.
+GLYPH_SIZE: Final[Tuple[int, int]] = (16, 20)
+MAX_TEMPLATES_PER_DIGIT: Final[int] = 20
+
+# OCR server wire format (all big-endian):
+#     request  : uint32 payload length + PNG bytes
+#     response : float32 confidence + uint8 text length + ASCII text (length 0 means no answer)
+REQUEST_HEADER: Final[struct.Struct] = struct.Struct(">I")
+RESPONSE_HEADER: Final[struct.Struct] = struct.Struct(">fB")
+MAX_PAYLOAD: Final[int] = 4 * 1024 * 1024
+DEFAULT_SOCKET: Final[str] = "./ocr.sock"
+DEFAULT_PORT: Final[int] = 50515
+
+# ==============================================================================
+# Global Variables
+# ==============================================================================
+
+console_log = logging.getLogger("Console_log")
+
+# State owned by an OCR worker process (set once in _init_worker).
+_worker_settings: Dict = {}
+_worker_classifier = None
+_worker_model = None
+
+# ==============================================================================
+# NOTE:
+# The purpose of this Ocrtools.py module is to keep the captcha image pipeline
+# out of the main program, so it can be reused by the OCR workers and the benchmark tools.
+#
+# Why several candidates instead of a single kernel?
+#     - For common numbers, a kernel of np.ones((2, 3), np.uint8) works best.
+#     - For the number 1, a kernel of (3, 5) is more effective.
+#     - Numbers 3 and 4 are prone to failure due to their severe curvature.
+# There is no one-size-fits-all solution, so every threshold/kernel pair in the grid
+# produces one candidate image, all candidates go through PaddleOCR in one batched call,
+# and a per-character vote weighted by rec_scores picks the answer.
+# A wrong guess costs a full login round trip (captcha refresh and retyping the credentials),
+# which is far more expensive than a few extra images in the same inference batch.
+#
+# Fast path:
+#     The captcha is always five digits on a simple background, so a classical recognizer
+#     (connected components + normalized template matching, numpy and cv2 only) solves it in milliseconds.
+#     PaddleOCR is only loaded, lazily, when the fast path is not confident enough.
+#     The fast path is only trusted once ocr_templates/ holds real glyphs of all ten digits:
+#     with a partial set, a digit without templates is matched against the Hershey fallbacks
+#     and the nearest real glyph, which gives confidently wrong answers.
+#     build_templates() cuts a full set from a labelled corpus (see "build-templates").
+#     harvest_captcha() adds the glyphs of an answer only after the portal accepted it,
+#     and the oldest template of a digit is evicted once it holds MAX_TEMPLATES_PER_DIGIT.
+#
+# OCR server:
+#     "uv run Asyncio-course-fetcher.py ocr-server" keeps an OcrPool resident and answers
+#     recognition requests over a Unix domain socket (loopback TCP on Windows, which has no AF_UNIX in Python).
+#     When the server is reachable, setup_ocr() uses OcrClient and skips model loading entirely.
+# ==============================================================================
+
+
+# ==============================================================================
+# Private Helpers
+# ==============================================================================
+
+
+def _candidate_chars(texts: Sequence[str], scores: Sequence[float]) -> List[Tuple[str, float]]:
+    # Flatten the recognized text lines into (digit, score) pairs.
+    # PaddleOCR may split the captcha into several text lines, each with its own score,
+    # and may emit noise characters such as "-" which are dropped here.
+    chars: List[Tuple[str, float]] = []
+    for text, score in zip(texts, scores):
+        chars.extend((char, float(score)) for char in text if char.isdigit())
+    return chars
+
+
+def _normalize_glyph(glyph: np.ndarray) -> Optional[np.ndarray]:
+    # Crop to the ink, stretch to GLYPH_SIZE and blur slightly so small stroke offsets still match.
+    # Returns a zero-mean unit vector, so a dot product is the normalized cross-correlation.
+    ys, xs = np.nonzero(glyph)
+    if not len(ys):
+        return None
+
+    glyph = glyph[ys.min():ys.max() + 1, xs.min():xs.max() + 1]
+    glyph = cv2.resize(glyph, GLYPH_SIZE, interpolation = cv2.INTER_AREA)
+    vector: np.ndarray = cv2.GaussianBlur(glyph, (3, 3), 0).astype(np.float32).ravel()
+    vector -= vector.mean()
+
+    norm: float = float(np.linalg.norm(vector))
+    return vector / norm if norm else None
+
+
+def _synthetic_templates() -> Iterable[Tuple[str, np.ndarray]]:
+    # Baseline templates rendered with the built-in Hershey fonts, so every digit has at least one template.
+    # They match the captcha font only loosely and rarely pass min_confidence on their own.
+    fonts: Tuple[int, ...] = (
+        cv2.FONT_HERSHEY_SIMPLEX,
+        cv2.FONT_HERSHEY_DUPLEX,
+        cv2.FONT_HERSHEY_SIMPLEX | cv2.FONT_ITALIC,
+    )
+    for font in fonts:
+        for thickness in (2, 3):
+            for digit in "0123456789":
+                canvas: np.ndarray = np.zeros((60, 60), np.uint8)
+                cv2.putText(canvas, digit, (10, 48), font, 1.5, 255, thickness)
+                yield digit, canvas
+
+
+def _digit_templates(template_dir: str) -> Dict[str, List[str]]:
+    # Template files per digit, oldest first.
+    templates: Dict[str, List[str]] = defaultdict(list)
+    if not os.path.isdir(template_dir):
+        return templates
+
+    files: List[str] = [file for file in os.listdir(template_dir) if file.endswith(".png") and file[:1].isdigit()]
+    for file in sorted(files, key = lambda file: os.path.getmtime(os.path.join(template_dir, file))):
+        templates[file[0]].append(file)
+    return templates
+
+
+def _segment_answer(candidates: Iterable[np.ndarray], text: str) -> Optional[List[np.ndarray]]:
+    # Glyphs of the first candidate that splits into as many digits as the answer.
+    for candidate in candidates:
+        glyphs: List[np.ndarray] = segment_digits(candidate)
+        if len(glyphs) == len(text):
+            return glyphs
+    return None
+
+
+def _load_model():
+    # PaddleOCR is imported and built on first use only,
+    # which keeps both the main process and a fast-path-only worker free of the heavy Paddle load.
+    global _worker_model
+
+    if _worker_model is None:
+        from paddleocr import PaddleOCR
+        _worker_model = PaddleOCR(use_textline_orientation = True, lang = "en")
+    return _worker_model
+
+
+def _init_worker(settings: Dict) -> None:
+    # Runs once per worker process, so every recognition request hits warm state.
+    global _worker_settings, _worker_classifier
+
+    _worker_settings = settings
+    _worker_classifier = DigitClassifier(settings["template_dir"]) if settings["fast_path"] else None
+    if _worker_classifier and not _worker_classifier.complete:
+        console_log.info(
+            f"OCR fast path disabled, no template for digits {''.join(_worker_classifier.missing)} "
+            f"in {settings['template_dir']} (see build-templates)."
+        )
+
+    # Every captcha goes to PaddleOCR unless the fast path can answer it, so load the model here,
+    # not on the first captcha inside a timed login attempt.
+    if not (_worker_classifier and _worker_classifier.complete):
+        _load_model()
+
+
+def _worker_ready() -> int:
+    return os.getpid()
+
+
+def _recognize_in_worker(png_bytes: bytes) -> Tuple[Optional[str], float]:
+    return recognize_captcha(png_bytes, _worker_settings, _worker_classifier)
+
+
+def _encode_response(text: Optional[str], confidence: float) -> bytes:
+    payload: bytes = (text or "").encode("ascii")
+    return RESPONSE_HEADER.pack(confidence, len(payload)) + payload
+
+
+# ==============================================================================
+# Public API
+# ==============================================================================
+# Methods below are intended for external use.
+
+
+def decode_captcha(png_bytes: bytes) -> np.ndarray:
+    # Decode the screenshot once and keep every stage in memory.
+    return cv2.imdecode(np.frombuffer(png_bytes, np.uint8), cv2.IMREAD_GRAYSCALE)
+
+
+def preprocess_captcha(gray_img: np.ndarray, threshold: int,
+                        kernel_size: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    # Threshold -> invert -> dilate -> invert, returns (denoising, dilated).
+    # Note:
+    #     - Testing on different computers shows that recognition performance can still vary,
+    #         even with identical CPUs and GPUs.
+    #     - Running without browser headless mode is recommended,
+    #         as headless rendering can affect image resolution and
+    #         make it very difficult for PaddleOCR to recognize text.
+    _ , denoising_img = cv2.threshold(gray_img, threshold, 255, cv2.THRESH_BINARY)
+
+    kernel: np.ndarray = np.ones(tuple(kernel_size), np.uint8)
+    dilated_img: np.ndarray = cv2.dilate(cv2.bitwise_not(denoising_img), kernel, iterations=1)
+    dilated_img = cv2.bitwise_not(dilated_img)
+
+    return denoising_img, dilated_img
+
+
+def build_candidates(png_bytes: bytes,
+                        thresholds: Iterable[int] = DEFAULT_THRESHOLDS,
+                        kernels: Iterable[Tuple[int, int]] = DEFAULT_KERNELS,
+                        debug_dir: Optional[str] = None) -> List[np.ndarray]:
+    # Build one grayscale candidate image per (threshold, kernel) pair of the grid.
+    gray_img: np.ndarray = decode_captcha(png_bytes)
+    kernels = tuple(tuple(kernel) for kernel in kernels)
+    candidates: List[np.ndarray] = []
+
+    for threshold in thresholds:
+        for kernel_size in kernels:
+            denoising_img, dilated_img = preprocess_captcha(gray_img, threshold, kernel_size)
+
+            # Intermediate images are only written for troubleshooting (first candidate only).
+            if debug_dir and not candidates:
+                with open(os.path.join(debug_dir, "captcha.png"), "wb") as captcha_f:
+                    captcha_f.write(png_bytes)
+                cv2.imwrite(os.path.join(debug_dir, "denoising.png"), denoising_img)
+                cv2.imwrite(os.path.join(debug_dir, "dilate.png"), dilated_img)
+
+            candidates.append(dilated_img)
+
+    return candidates
+
+
+def vote_captcha(results: Iterable[Dict]) -> Tuple[Optional[str], float]:
+    # Per-character vote across all candidates, weighted by rec_scores.
+    # Only candidates that yield exactly CAPTCHA_LENGTH digits take part in the vote.
+    # Confidence is the weakest position's winning weight divided by the number of voters,
+    # so a unanimous vote at score 0.98 returns 0.98, and any disagreement lowers it.
+    ballots: List[Dict[str, float]] = [defaultdict(float) for _ in range(CAPTCHA_LENGTH)]
+    voters: int = 0
+
+    for result in results:
+        chars = _candidate_chars(result.get("rec_texts", ()), result.get("rec_scores", ()))
+        if len(chars) != CAPTCHA_LENGTH:
+            console_log.debug(f"OCR candidate dropped : {''.join(char for char, _ in chars)}")
+            continue
+
+        voters += 1
+        for position, (char, score) in enumerate(chars):
+            ballots[position][char] += score
+
+    if not voters:
+        return None, 0.0
+
+    winners: List[Tuple[str, float]] = [max(ballot.items(), key = lambda item: item[1]) for ballot in ballots]
+    text: str = "".join(char for char, _ in winners)
+    confidence: float = min(weight for _, weight in winners) / voters
+
+    return text, confidence
+
+
+def recognize_captcha(png_bytes: bytes, settings: Dict,
+                        classifier: Optional["DigitClassifier"] = None) -> Tuple[Optional[str], float]:
+    # Full recognition of one captcha: candidates -> fast path -> PaddleOCR fallback.
+    # Nothing is harvested here, the answer is unconfirmed until the login succeeds (see harvest_captcha()).
+    candidates: List[np.ndarray] = build_candidates(
+        png_bytes, settings["thresholds"], settings["kernels"], settings["debug_dir"]
+    )
+
+    if classifier and classifier.complete:
+        text, confidence = classifier.classify(candidates)
+        if text and confidence >= settings["min_confidence"]:
+            return text, confidence
+        console_log.debug(f"OCR fast path not confident : {text} ({confidence:.2f})")
+
+    # PaddleOCR reads image files as 3-channel BGR, so the arrays keep the same layout.
+    results: List[Dict] = _load_model().predict(
+        [cv2.cvtColor(candidate, cv2.COLOR_GRAY2BGR) for candidate in candidates]
+    )
+    return vote_captcha(results)
+
+
+def segment_digits(dilated_img: np.ndarray) -> List[np.ndarray]:
+    # Split a preprocessed candidate (dark digits on white) into per-digit glyphs, left to right.
+    #     - Specks far smaller than the largest component (e.g. what is left of the strike line) are dropped.
+    #     - Components overlapping on the x axis are merged, since a thin stroke may break a digit in two.
+    #     - A component much wider than the others is split evenly, since neighbouring digits may touch.
+    binary: np.ndarray = cv2.bitwise_not(dilated_img)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity = 8)
+    if count <= 1:
+        return []
+
+    largest: int = int(stats[1:, cv2.CC_STAT_AREA].max())
+    boxes: List[List[int]] = sorted(
+        [list(map(int, stat[:4])) for stat in stats[1:] if stat[cv2.CC_STAT_AREA] >= largest * 0.25],
+        key = lambda box: box[0]
+    )
+
+    merged: List[List[int]] = []
+    for x, y, w, h in boxes:
+        if merged:
+            mx, my, mw, mh = merged[-1]
+            overlap: int = min(mx + mw, x + w) - max(mx, x)
+            if overlap > min(mw, w) // 2:
+                right, bottom = max(mx + mw, x + w), max(my + mh, y + h)
+                merged[-1] = [min(mx, x), min(my, y), right - min(mx, x), bottom - min(my, y)]
+                continue
+        merged.append([x, y, w, h])
+
+    median_width: float = float(np.median([box[2] for box in merged]))
+    glyphs: List[np.ndarray] = []
+    for x, y, w, h in merged:
+        parts: int = max(1, round(w / median_width)) if w > median_width * 1.6 else 1
+        step: float = w / parts
+        for part in range(parts):
+            left, right = x + round(part * step), x + round((part + 1) * step)
+            glyphs.append(binary[y:y + h, left:right])
+
+    return glyphs
+
+
+class DigitClassifier:
+    # Nearest-neighbour digit matcher over normalized glyph templates.
+    # Template sources, in order:
+    #     1. Hershey font renderings (always available, loose match).
+    #     2. <template_dir>/<digit>_*.png, glyphs cut from real captchas by build_templates()
+    #         or harvested from confirmed logins by harvest_captcha().
+    # The classifier is only "complete", and used by recognize_captcha(), when source 2 covers every digit.
+    def __init__(self, template_dir: str = TEMPLATE_DIR):
+        self._template_dir: str = template_dir
+        self._labels: List[str] = []
+        self._vectors: List[np.ndarray] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._covered: set = set()
+
+        for digit, glyph in _synthetic_templates():
+            self._add(digit, glyph)
+
+        for digit, files in _digit_templates(template_dir).items():
+            for file in files:
+                if self._add(digit, cv2.imread(os.path.join(template_dir, file), cv2.IMREAD_GRAYSCALE)):
+                    self._covered.add(digit)
+
+    @property
+    def missing(self) -> List[str]:
+        return [digit for digit in "0123456789" if digit not in self._covered]
+
+    @property
+    def complete(self) -> bool:
+        return not self.missing
+
+    def _add(self, digit: str, glyph: Optional[np.ndarray]) -> bool:
+        vector: Optional[np.ndarray] = _normalize_glyph(glyph) if glyph is not None else None
+        if vector is None:
+            return False
+
+        self._labels.append(digit)
+        self._vectors.append(vector)
+        self._matrix = None
+        return True
+
+    def _match(self, glyph: np.ndarray) -> Tuple[Optional[str], float]:
+        # Confidence is the best similarity, scaled down when the runner-up digit is within 0.1 of it.
+        vector: Optional[np.ndarray] = _normalize_glyph(glyph)
+        if vector is None:
+            return None, 0.0
+
+        if self._matrix is None:
+            self._matrix = np.vstack(self._vectors)
+
+        similarities: np.ndarray = self._matrix @ vector
+        best_by_digit: Dict[str, float] = {}
+        for label, similarity in zip(self._labels, similarities):
+            best_by_digit[label] = max(best_by_digit.get(label, -1.0), float(similarity))
+
+        ranked: List[Tuple[str, float]] = sorted(best_by_digit.items(), key = lambda item: item[1], reverse = True)
+        digit, best = ranked[0]
+        runner_up: float = ranked[1][1] if len(ranked) > 1 else -1.0
+
+        return digit, max(0.0, best) * min(1.0, (best - runner_up) / 0.1)
+
+    def classify(self, candidates: Iterable[np.ndarray]) -> Tuple[Optional[str], float]:
+        # Classify every candidate and keep the most confident 5-digit reading.
+        # Confidence of a reading is its weakest glyph.
+        best_text, best_confidence = None, 0.0
+
+        for candidate in candidates:
+            glyphs: List[np.ndarray] = segment_digits(candidate)
+            if len(glyphs) != CAPTCHA_LENGTH:
+                continue
+
+            matches: List[Tuple[Optional[str], float]] = [self._match(glyph) for glyph in glyphs]
+            if not all(digit for digit, _ in matches):
+                continue
+
+            confidence: float = min(score for _, score in matches)
+            if confidence > best_confidence:
+                best_text, best_confidence = "".join(digit for digit, _ in matches), confidence
+
+        return best_text, best_confidence
+
+    def harvest(self, glyphs: Sequence[np.ndarray], text: str) -> int:
+        # Store the glyphs of a confirmed answer as new templates.
+        # File names are content hashes, so concurrent workers never clobber each other.
+        # A digit holding MAX_TEMPLATES_PER_DIGIT templates drops its oldest one first,
+        # so the set follows the portal instead of freezing on the first glyphs seen.
+        if len(glyphs) != len(text):
+            return 0
+
+        os.makedirs(self._template_dir, exist_ok = True)
+        templates: Dict[str, List[str]] = _digit_templates(self._template_dir)
+        saved: int = 0
+
+        for digit, glyph in zip(text, glyphs):
+            name: str = f"{digit}_{hashlib.sha1(glyph.tobytes()).hexdigest()[:10]}.png"
+            if name in templates[digit] or not self._add(digit, glyph):
+                continue
+
+            while len(templates[digit]) >= MAX_TEMPLATES_PER_DIGIT:
+                os.remove(os.path.join(self._template_dir, templates[digit].pop(0)))
+
+            cv2.imwrite(os.path.join(self._template_dir, name), glyph)
+            templates[digit].append(name)
+            self._covered.add(digit)
+            saved += 1
+
+        if saved:
+            console_log.debug(f"OCR templates harvested : {text} ({saved} new)")
+        return saved
+
+
+def harvest_captcha(png_bytes: bytes, text: str, settings: Dict) -> int:
+    # Called once the portal accepted "text" for this captcha, so only confirmed answers become templates.
+    # Blocking, run it with asyncio.to_thread() from the event loop.
+    # Workers pick the new templates up the next time they start.
+    if not (settings["harvest"] and text and len(text) == CAPTCHA_LENGTH):
+        return 0
+
+    try:
+        glyphs: Optional[List[np.ndarray]] = _segment_answer(
+            build_candidates(png_bytes, settings["thresholds"], settings["kernels"]), text
+        )
+        return DigitClassifier(settings["template_dir"]).harvest(glyphs, text) if glyphs else 0
+    except Exception as e:
+        console_log.error(f"OCR harvest fail : {e}")
+        return 0
+
+
+def build_templates(samples: Iterable[Tuple[str, bytes]], settings: Dict) -> Dict[str, int]:
+    # Replace template_dir with glyphs cut from labelled captchas, samples are (label, png_bytes).
+    # Returns the number of templates per digit; a digit left at 0 keeps the fast path disabled.
+    template_dir: str = settings["template_dir"]
+    for files in _digit_templates(template_dir).values():
+        for file in files:
+            os.remove(os.path.join(template_dir, file))
+
+    classifier: DigitClassifier = DigitClassifier(template_dir)
+    for label, png_bytes in samples:
+        glyphs: Optional[List[np.ndarray]] = _segment_answer(
+            build_candidates(png_bytes, settings["thresholds"], settings["kernels"]), label
+        )
+        if glyphs:
+            classifier.harvest(glyphs, label)
+        else:
+            console_log.debug(f"OCR template skipped, segmentation mismatch : {label}")
+
+    return {digit: len(_digit_templates(template_dir).get(digit, [])) for digit in "0123456789"}
+
+
+def load_ocr_settings(ocr_configs: Dict, img_path: str) -> Dict:
+    # Normalize the "ocr" section of config.yaml into the settings shared by every OCR backend.
+    return {
+        "thresholds": tuple(ocr_configs.get("thresholds", DEFAULT_THRESHOLDS)),
+        "kernels": tuple(tuple(kernel) for kernel in ocr_configs.get("kernels", DEFAULT_KERNELS)),
+        "debug_dir": img_path if ocr_configs.get("debug") else None,
+        "fast_path": bool(ocr_configs.get("fast_path", True)),
+        "min_confidence": float(ocr_configs.get("min_confidence", DEFAULT_MIN_CONFIDENCE)),
+        "template_dir": ocr_configs.get("template_dir", TEMPLATE_DIR),
+        "harvest": bool(ocr_configs.get("harvest", True)),
+    }
+
+
+class OcrPool:
+    # Dedicated process pool for captcha recognition.
+    # OCR used to share the main ThreadPoolExecutor with setup_env / setup_driver,
+    # so GIL-bound preprocessing and Paddle inference competed with the setup work.
+    # Each worker keeps its recognizer warm and only exchanges PNG bytes and (text, confidence),
+    # which keeps the pickled payload small and the event loop free.
+    def __init__(self, settings: Dict, max_workers: int = 2):
+        self._max_workers: int = max(1, int(max_workers))
+        self._executor: ProcessPoolExecutor = ProcessPoolExecutor(
+                max_workers = self._max_workers,
+                initializer = _init_worker,
+                initargs = (settings,)
+            )
+
+    def warm_up(self) -> None:
+        # Submitting one task per worker forces every process to start and run its initializer.
+        # Any initializer failure surfaces here as BrokenProcessPool instead of on the first login attempt.
+        futures = [self._executor.submit(_worker_ready) for _ in range(self._max_workers)]
+        wait(futures)
+        for future in futures:
+            future.result()
+
+    async def recognize(self, png_bytes: bytes) -> Tuple[Optional[str], float]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, _recognize_in_worker, png_bytes)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait = True, cancel_futures = True)
+
+
+def ocr_server_address(server_configs: Dict) -> Union[str, Tuple[str, int]]:
+    # Unix domain socket path where available, otherwise a loopback TCP address.
+    if hasattr(socket, "AF_UNIX"):
+        return server_configs.get("socket", DEFAULT_SOCKET)
+    return "127.0.0.1", int(server_configs.get("port", DEFAULT_PORT))
+
+
+async def serve_ocr(settings: Dict, address: Union[str, Tuple[str, int]], max_workers: int = 2) -> None:
+    # Long-lived OCR service: the pool is warmed once and reused by every client run.
+    # Each connection may send any number of requests, they are answered in order.
+    pool: OcrPool = OcrPool(settings, max_workers = max_workers)
+    await asyncio.to_thread(pool.warm_up)
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    (length,) = REQUEST_HEADER.unpack(await reader.readexactly(REQUEST_HEADER.size))
+                except asyncio.IncompleteReadError:
+                    break
+
+                if length > MAX_PAYLOAD:
+                    console_log.warning(f"OCR server payload too large : {length} bytes")
+                    break
+
+                png_bytes: bytes = await reader.readexactly(length)
+                try:
+                    text, confidence = await pool.recognize(png_bytes)
+                except Exception as e:
+                    console_log.error(f"OCR server recognize fail : {e}")
+                    text, confidence = None, 0.0
+
+                writer.write(_encode_response(text, confidence))
+                await writer.drain()
+        except Exception as e:
+            console_log.error(f"OCR server connection fail : {e}")
+        finally:
+            writer.close()
+
+    try:
+        if isinstance(address, str):
+            if os.path.exists(address):
+                os.remove(address)
+            server = await asyncio.start_unix_server(handle, path = address)
+        else:
+            server = await asyncio.start_server(handle, host = address[0], port = address[1])
+
+        console_log.info(f"OCR server listening on {address}")
+        async with server:
+            await server.serve_forever()
+    finally:
+        pool.shutdown()
+        if isinstance(address, str) and os.path.exists(address):
+            os.remove(address)
+
+
+class OcrClient:
+    # Client of serve_ocr() with the same interface as OcrPool.
+    # One connection is opened lazily on the running event loop and reused for every request;
+    # requests are serialized with a lock since the protocol answers in order.
+    def __init__(self, address: Union[str, Tuple[str, int]], timeout: float = 30):
+        self._address: Union[str, Tuple[str, int]] = address
+        self._timeout: float = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+
+    def warm_up(self) -> None:
+        # Blocking probe used by setup_ocr(), raises OSError when no server is listening.
+        if isinstance(self._address, str):
+            if not os.path.exists(self._address):
+                raise FileNotFoundError(f"OCR server socket not found : {self._address}")
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                probe.settimeout(1)
+                probe.connect(self._address)
+        else:
+            with socket.create_connection(self._address, timeout = 1):
+                pass
+
+    async def _open(self) -> None:
+        if isinstance(self._address, str):
+            self._reader, self._writer = await asyncio.open_unix_connection(self._address)
+        else:
+            self._reader, self._writer = await asyncio.open_connection(*self._address)
+
+    async def recognize(self, png_bytes: bytes) -> Tuple[Optional[str], float]:
+        async with self._lock:
+            try:
+                if self._writer is None:
+                    await self._open()
+
+                self._writer.write(REQUEST_HEADER.pack(len(png_bytes)) + png_bytes)
+                await self._writer.drain()
+
+                confidence, length = RESPONSE_HEADER.unpack(
+                    await asyncio.wait_for(self._reader.readexactly(RESPONSE_HEADER.size), self._timeout)
+                )
+                text: str = (await self._reader.readexactly(length)).decode("ascii") if length else ""
+                return text or None, confidence
+            except Exception:
+                self.shutdown()
+                raise
+
+    def shutdown(self) -> None:
+        if self._writer:
+            self._writer.close()
+        self._reader, self._writer = None, None
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+    Created on Sun Oct 18 02:46:11 2026
+
+    @author: Johnson
+"""
+
+# ==============================================================================
+# Standard Library Imports
+# ==============================================================================
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import time
+from contextlib import closing
+from typing import Optional, Final, Tuple, List, Dict, Iterable, Awaitable, Callable
+
+# ==============================================================================
+# Constants
+# ==============================================================================
+
+# Defaults of the "notify.outbox" section in config.yaml.
+OUTBOX_DEFAULTS: Final[Dict] = {
+    "path": "./outbox.sqlite3",
+    "files": "./outbox_files",
+    "max_attempts": 5,
+    "backoff": 2,
+    "max_backoff": 300,
+    "drain_timeout": 60,
+}
+
+SCHEMA: Final[str] = """
+    create table if not exists outbox (
+        id              integer primary key autoincrement,
+        channel         text not null,
+        dedup_key       text not null,
+        message         text not null,
+        attachment_path text,
+        status          text not null default 'pending' check (status in ('pending', 'sent', 'dead')),
+        attempts        integer not null default 0,
+        next_attempt_at real not null,
+        last_error      text,
+        created_at      real not null,
+        sent_at         real,
+        progress        text
+    );
+    create unique index if not exists outbox_pending_dedup on outbox (dedup_key) where status = 'pending';
+    create index if not exists outbox_due on outbox (status, next_attempt_at);
+"""
+# Columns added after the first release, created on outboxes that predate them.
+MIGRATIONS: Final[Dict[str, str]] = {
+    "progress": "alter table outbox add column progress text",
+}
+
+# sender(message, attachment_path, progress) -> True on success, see the NOTE below.
+Sender = Callable[[str, Optional[str], Dict], Awaitable[Optional[bool]]]
+
+# ==============================================================================
+# Global Variables
+# ==============================================================================
+
+console_log = logging.getLogger("Console_log")
+
+# ==============================================================================
+# NOTE:
+# The purpose of this Outboxtools.py module is to make notifications survive a failed channel.
+#
+# notifiers_to_user() no longer calls the channels directly: it enqueues one message per channel
+# into a local SQLite outbox, then drains it. Attachments are snapshotted into "files",
+# so a later retry still sends what this run produced even if attachments/ has been rebuilt since.
+#
+# Delivery rules:
+#     - Deduplication : a message with the same channel, text and attachment content is enqueued once
+#         while a copy of it is still pending (e.g. a rerun after a failed send).
+#     - Backoff : each failure pushes the message back by backoff * 2 ** attempts (capped at max_backoff);
+#         channels are drained concurrently and independently, so a flaky channel never delays another.
+#     - After max_attempts the message is marked "dead" and kept for inspection.
+#     - Progress : each message carries a JSON "progress" dict handed to the sender on every attempt
+#         and saved back after it, so a sender that delivers in parts (LINE push batches) resumes
+#         where the previous attempt stopped instead of delivering the first parts again.
+#     - Once no pending message refers to a snapshot any more (all its channels sent or dead),
+#         the snapshot directory is deleted.
+#
+# "notify-only" drains the outbox without the browser, OCR, login or scraping.
+# A sender is an async callable (message, attachment_path, progress) -> True on success,
+# which may update the progress dict in place.
+# ==============================================================================
+
+
+# ==============================================================================
+# Private Helpers
+# ==============================================================================
+
+
+def _content_key(message: str, attachment_path: Optional[str]) -> str:
+    digest = hashlib.sha256(message.encode("utf-8"))
+    if attachment_path and os.path.isdir(attachment_path):
+        for file in sorted(os.listdir(attachment_path)):
+            path: str = os.path.join(attachment_path, file)
+            if os.path.isfile(path):
+                digest.update(file.encode("utf-8"))
+                with open(path, "rb") as file_f:
+                    digest.update(hashlib.sha256(file_f.read()).digest())
+    return digest.hexdigest()
+
+
+def _snapshot(attachment_path: Optional[str], files_dir: str, content_key: str) -> Optional[str]:
+    if not attachment_path or not os.path.isdir(attachment_path):
+        return None
+
+    snapshot_path: str = os.path.join(files_dir, content_key[:16])
+    if not os.path.isdir(snapshot_path):
+        shutil.copytree(attachment_path, snapshot_path)
+    return snapshot_path
+
+
+# ==============================================================================
+# Public API
+# ==============================================================================
+# Methods below are intended for external use.
+
+
+class Outbox:
+    # Blocking SQLite calls are short, but still run through asyncio.to_thread() by the async methods.
+    def __init__(self, outbox_configs: Optional[Dict] = None):
+        self._settings: Dict = {**OUTBOX_DEFAULTS, **(outbox_configs or {})}
+        self._path: str = self._settings["path"]
+
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(SCHEMA)
+            columns: set = {row["name"] for row in conn.execute("pragma table_info(outbox)")}
+            for column, statement in MIGRATIONS.items():
+                if column not in columns:
+                    conn.execute(statement)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._path, timeout = 10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _enqueue(self, channels: Iterable[str], message: str, attachment_path: Optional[str]) -> int:
+        content_key: str = _content_key(message, attachment_path)
+        snapshot_path: Optional[str] = _snapshot(attachment_path, self._settings["files"], content_key)
+        now: float = time.time()
+
+        with closing(self._connect()) as conn, conn:
+            added: int = 0
+            for channel in channels:
+                cursor = conn.execute(
+                    "insert or ignore into outbox "
+                    "(channel, dedup_key, message, attachment_path, next_attempt_at, created_at) "
+                    "values (?, ?, ?, ?, ?, ?)",
+                    (channel, f"{channel}:{content_key}", message, snapshot_path, now, now)
+                )
+                added += cursor.rowcount
+        return added
+
+    def _due(self, channel: str) -> List[sqlite3.Row]:
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "select * from outbox where channel = ? and status = 'pending' and next_attempt_at <= ? "
+                "order by id", (channel, time.time())
+            ).fetchall()
+
+    def _next_wait(self, channel: str) -> Optional[float]:
+        # Seconds until the next pending message of the channel is due, None if nothing is pending.
+        with closing(self._connect()) as conn:
+            due: Optional[float] = conn.execute(
+                "select min(next_attempt_at) from outbox where channel = ? and status = 'pending'", (channel,)
+            ).fetchone()[0]
+        return None if due is None else max(0.0, due - time.time())
+
+    def _release_snapshot(self, conn: sqlite3.Connection, snapshot_path: Optional[str]) -> None:
+        # Delete a snapshot once no pending message refers to it; only paths inside "files" are touched.
+        if not snapshot_path:
+            return
+
+        files_dir: str = os.path.abspath(self._settings["files"])
+        if os.path.dirname(os.path.abspath(snapshot_path)) != files_dir:
+            return
+
+        still_pending: int = conn.execute(
+            "select count(*) from outbox where attachment_path = ? and status = 'pending'", (snapshot_path,)
+        ).fetchone()[0]
+        if not still_pending:
+            shutil.rmtree(snapshot_path, ignore_errors = True)
+
+    def _mark_sent(self, row: sqlite3.Row) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("update outbox set status = 'sent', sent_at = ? where id = ?", (time.time(), row["id"]))
+            self._release_snapshot(conn, row["attachment_path"])
+
+    def _mark_failed(self, row: sqlite3.Row, error: str, progress: Dict) -> None:
+        attempts: int = row["attempts"] + 1
+        delay: float = min(self._settings["backoff"] * 2 ** (attempts - 1), self._settings["max_backoff"])
+        status: str = "dead" if attempts >= self._settings["max_attempts"] else "pending"
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "update outbox set status = ?, attempts = ?, next_attempt_at = ?, last_error = ?, progress = ? "
+                "where id = ?",
+                (status, attempts, time.time() + delay, error, json.dumps(progress), row["id"])
+            )
+            if status == "dead":
+                self._release_snapshot(conn, row["attachment_path"])
+
+        if status == "dead":
+            console_log.error(f"Outbox {row['channel']} message {row['id']} gave up after {attempts} attempts.")
+        else:
+            console_log.warning(f"Outbox {row['channel']} message {row['id']} fail, retry in {delay:.1f}s.")
+
+    def pending(self) -> Dict[str, int]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "select channel, count(*) from outbox where status = 'pending' group by channel"
+            ).fetchall()
+        return {channel: count for channel, count in rows}
+
+    async def enqueue(self, channels: Iterable[str], message: str, attachment_path: Optional[str] = None) -> int:
+        # Returns how many messages were added (duplicates of pending messages are skipped).
+        return await asyncio.to_thread(self._enqueue, list(channels), message, attachment_path)
+
+    async def drain_channel(self, channel: str, sender: Sender, deadline: float) -> Tuple[int, int]:
+        # Sends due messages of one channel until it is empty or the next retry falls after the deadline.
+        # Returns (sent, still pending).
+        sent: int = 0
+        while True:
+            for row in await asyncio.to_thread(self._due, channel):
+                progress: Dict = json.loads(row["progress"] or "{}")
+                try:
+                    ok: Optional[bool] = await sender(row["message"], row["attachment_path"], progress)
+                    error: str = "sender reported failure"
+                except Exception as e:
+                    ok, error = False, str(e)
+
+                if ok:
+                    await asyncio.to_thread(self._mark_sent, row)
+                    sent += 1
+                else:
+                    await asyncio.to_thread(self._mark_failed, row, error, progress)
+
+            wait: Optional[float] = await asyncio.to_thread(self._next_wait, channel)
+            if wait is None:
+                return sent, 0
+            if time.time() + wait > deadline:
+                return sent, (await asyncio.to_thread(self.pending)).get(channel, 0)
+            await asyncio.sleep(wait)
+
+    async def drain(self, senders: Dict[str, Sender], timeout: Optional[float] = None) -> Dict[str, Tuple[int, int]]:
+        # Channels are drained concurrently, each with its own backoff schedule.
+        deadline: float = time.time() + (self._settings["drain_timeout"] if timeout is None else timeout)
+        results: List[Tuple[int, int]] = await asyncio.gather(
+            *(self.drain_channel(channel, sender, deadline) for channel, sender in senders.items())
+        )
+
+        report: Dict[str, Tuple[int, int]] = dict(zip(senders, results))
+        for channel, (sent, left) in report.items():
+            console_log.info(f"Outbox {channel} : {sent} sent, {left} pending.")
+        return report
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+    Created on Sat Oct 17 19:41:22 2026
+
+    @author: Johnson
+"""
+
+# ==============================================================================
+# Standard Library Imports
+# ==============================================================================
+
+import logging
+import re
+from typing import Final, List, Iterable, NamedTuple, Pattern
+
+# ==============================================================================
+# Constants
+# ==============================================================================
+
+EXCLUDED_KEYWORDS: Final[set] = {"遠", "健康", "電影", "音樂"}
+FREE_PERIOD: Final[str] = "空堂 - Free Period"
+WEEKDAYS: Final[int] = 5
+
+# One C-level pass strips every tag except the three separators the layout needs
+# (<br> between segments, </td> between cells, </tr> between rows), after which rows and cells
+# are cut with str.split. Text is kept verbatim, as the old regex-based parse_row did.
+STRIP_PATTERN: Final[Pattern[str]] = re.compile(r"<(?!br>|/td>|/tr>)[^>]*>", re.IGNORECASE)
+EXCLUDED_PATTERN: Final[Pattern[str]] = re.compile("|".join(map(re.escape, sorted(EXCLUDED_KEYWORDS))))
+
+# ==============================================================================
+# Global Variables
+# ==============================================================================
+
+console_log = logging.getLogger("Console_log")
+
+# ==============================================================================
+# NOTE:
+# The purpose of this Parsetools.py module is to turn timetable row HTML into typed rows.
+#
+# Cell layout of a timetable row:
+#     <td>period<br>start<br>end</td>  then one <td> per weekday (Mon ~ Sun), each holding
+#     Chinese name<br>English name<br>... , or a lone "\u3000" for a free period.
+# Noise segments (e.g. Remote Learning or specific course categories) are dropped per segment
+# with one compiled alternation of EXCLUDED_KEYWORDS, and only the Mon ~ Fri cells are kept.
+#
+# The previous parse_row() flattened the whole row with chained str.replace and re.sub,
+# split on "<br>" and relied on a fixed step of 5 parts per cell, so any extra segment
+# shifted every following course. Walking the <td> structure keeps each course in its own cell.
+# The old implementation is kept in Benchtools.py as the reference for "bench-parser".
+# ==============================================================================
+
+
+class TimetableRow(NamedTuple):
+    time: str
+    mon: str
+    tue: str
+    wed: str
+    thr: str
+    fri: str
+
+
+# ==============================================================================
+# Private Helpers
+# ==============================================================================
+
+
+def _segments(cell: str, count: int) -> List[str]:
+    # First "count" <br>-separated segments of a cell, noise segments skipped, padded with "".
+    # Most cells carry no noise, so the keyword scan decides whether the filter loop is needed at all.
+    if EXCLUDED_PATTERN.search(cell) is None:
+        segments: List[str] = cell.split("<br>", count)[:count]
+    else:
+        segments = [segment for segment in cell.split("<br>") if not EXCLUDED_PATTERN.search(segment)][:count]
+    return segments + [""] * (count - len(segments))
+
+
+def _course_name(cell: str) -> str:
+    if "\u3000" in cell:
+        return FREE_PERIOD
+
+    name, detail = _segments(cell, 2)
+    return FREE_PERIOD if "空堂" in name else f"{name} - {detail}"
+
+
+def _build_row(cells: List[str]) -> TimetableRow:
+    if len(cells) < 1 + WEEKDAYS:
+        raise ValueError(f"Unexpected timetable row layout : {len(cells)} cells")
+
+    _, start, end = _segments(cells[0], 3)
+    return TimetableRow(f"{start}-{end}", *map(_course_name, cells[1:1 + WEEKDAYS]))
+
+
+# ==============================================================================
+# Public API
+# ==============================================================================
+# Methods below are intended for external use.
+
+
+def parse_table(html: str) -> List[TimetableRow]:
+    # Parse any number of <tr> rows (a whole tbody, or concatenated outerHTML) at once.
+    rows: List[str] = STRIP_PATTERN.sub("", html).split("</tr>")
+    return [_build_row(row.split("</td>")) for row in rows if "</td>" in row]
+
+
+def parse_rows(rows_html: Iterable[str]) -> List[TimetableRow]:
+    return parse_table("".join(rows_html))
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+    Created on Sat Oct 17 21:06:37 2026
+
+    @author: Johnson
+"""
+
+# ==============================================================================
+# Standard Library Imports
+# ==============================================================================
+
+import json
+import logging
+import os
+import time
+from typing import Optional, Final, List, Dict
+from urllib.parse import urljoin
+
+# ==============================================================================
+# Third-Party Imports
+# ==============================================================================
+
+from cryptography.fernet import Fernet, InvalidToken
+
+# ==============================================================================
+# Constants
+# ==============================================================================
+
+CHECK_PAGE: Final[str] = "news.asp"
+# Cookie fields accepted by WebDriver add_cookie(); anything else the driver reports is dropped.
+COOKIE_FIELDS: Final[set] = {"name", "value", "path", "domain", "secure", "httpOnly", "expiry", "sameSite"}
+
+# ==============================================================================
+# Global Variables
+# ==============================================================================
+
+console_log = logging.getLogger("Console_log")
+
+# ==============================================================================
+# NOTE:
+# The purpose of this Sessiontools.py module is to reuse an authenticated portal session
+# across runs, so a polling run does not need to solve the captcha again.
+#
+# After a successful login the driver's cookies are written to "session.path",
+# encrypted with Fernet (AES-128-CBC + HMAC-SHA256) using SESSION_KEY from .env.
+# Create the key once with:
+#     python -c "from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())"
+# Without SESSION_KEY the cache is disabled and every run logs in as before.
+#
+# On startup the cookies are restored and checked with one navigation to news.asp:
+# the portal redirects an expired session back to the login page, so still being on
+# news.asp afterwards means the session is valid. Otherwise the file is removed and
+# the caller falls back to login_page().
+#
+# load_dotenv() is invoked globally by the main program, as in Sqltools.py.
+# ==============================================================================
+
+
+# ==============================================================================
+# Private Helpers
+# ==============================================================================
+
+
+def _cookie_for_driver(cookie: Dict) -> Dict:
+    cleaned: Dict = {key: value for key, value in cookie.items() if key in COOKIE_FIELDS}
+    if "expiry" in cleaned:
+        cleaned["expiry"] = int(cleaned["expiry"])
+    return cleaned
+
+
+# ==============================================================================
+# Public API
+# ==============================================================================
+# Methods below are intended for external use.
+
+
+class SessionStore:
+    # Encrypted cookie cache of the portal session. All methods are blocking WebDriver / file calls,
+    # run them with asyncio.to_thread().
+    def __init__(self, path: str, key: Optional[str] = None, max_age: float = 1800):
+        self._path: str = path
+        self._max_age: float = max_age
+        self._fernet: Optional[Fernet] = None
+
+        key = key if key is not None else os.getenv("SESSION_KEY")
+        if not key:
+            console_log.info("SESSION_KEY is not set, session cache disabled.")
+            return
+
+        try:
+            self._fernet = Fernet(key.encode())
+        except ValueError as ve:
+            console_log.error(f"Invalid SESSION_KEY, session cache disabled : {ve}")
+
+    @property
+    def enabled(self) -> bool:
+        return self._fernet is not None
+
+    def available(self) -> bool:
+        # A cached session exists and is younger than max_age.
+        if not self.enabled or not os.path.exists(self._path):
+            return False
+        return time.time() - os.path.getmtime(self._path) < self._max_age
+
+    def save(self, driver) -> Optional[bool]:
+        if not self.enabled:
+            return
+
+        try:
+            cookies: List[Dict] = driver.get_cookies()
+            token: bytes = self._fernet.encrypt(json.dumps(cookies).encode("utf-8"))
+
+            # Write then rename, so an interrupted run never leaves a truncated cache behind.
+            temp_path: str = f"{self._path}.tmp"
+            with open(temp_path, "wb") as session_f:
+                session_f.write(token)
+            os.chmod(temp_path, 0o600)
+            os.replace(temp_path, self._path)
+
+            console_log.info(f"Session cached : {len(cookies)} cookies.")
+            return True
+        except Exception as e:
+            console_log.error(f"Save session fail : {e}")
+
+    def load(self) -> Optional[List[Dict]]:
+        if not self.available():
+            return
+
+        try:
+            with open(self._path, "rb") as session_f:
+                token: bytes = session_f.read()
+            return json.loads(self._fernet.decrypt(token, ttl = int(self._max_age)))
+        except InvalidToken:
+            console_log.warning("Cached session is expired or was encrypted with another key.")
+            self.clear()
+        except Exception as e:
+            console_log.error(f"Load session fail : {e}")
+
+    def restore(self, driver, url: str) -> Optional[bool]:
+        # Cookies can only be added for the current domain, so the portal is opened first.
+        cookies: Optional[List[Dict]] = self.load()
+        if not cookies:
+            return
+
+        try:
+            driver.get(url)
+            for cookie in cookies:
+                try:
+                    driver.add_cookie(_cookie_for_driver(cookie))
+                except Exception as e:
+                    console_log.debug(f"Skip cookie {cookie.get('name')} : {e}")
+
+            driver.get(urljoin(url, CHECK_PAGE))
+            if CHECK_PAGE in driver.current_url:
+                console_log.info("Cached session restored success.")
+                return True
+
+            console_log.info("Cached session is no longer valid.")
+            self.clear()
+        except Exception as e:
+            console_log.error(f"Restore session fail : {e}")
+
+    def clear(self) -> None:
+        try:
+            if os.path.exists(self._path):
+                os.remove(self._path)
+        except OSError as oe:
+            console_log.error(f"Clear session fail : {oe}")
@@ -12,9 +12,8 @@
 import asyncio
 import logging
 import os
-import re
 from contextlib import asynccontextmanager
-from typing import Optional, Tuple, Pattern, List
+from typing import Optional, Final, Tuple, List, Dict, Iterable, Awaitable, Callable
 
 # ==============================================================================
 # Third-Party Imports
@@ -24,6 +23,18 @@ import asyncpg
 import pandas as pd
 from asyncpg.utils import _quote_ident
 
+# ==============================================================================
+# Constants
+# ==============================================================================
+
+# Session-local staging table of bulk_upsert_sql(), dropped automatically at commit.
+STAGING_TB: Final[str] = "course_staging"
+COURSE_COLUMNS: Final[List[str]] = ["term", "time", "Mon", "Tue", "Wed", "Thr", "Fri"]
+# One row per applied migration, in the target schema.
+VERSION_TB: Final[str] = "schema_version"
+# Pre-aggregated course counts read by fetch_sql(), kept in step with the course table by a trigger.
+SUMMARY_TB: Final[str] = "course_counts"
+
 # ==============================================================================
 # Global Variables
 # ==============================================================================
@@ -45,6 +56,13 @@ console_log = logging.getLogger("Console_log")
 # so when the main program imports this module, it does not need to call load_dotenv() again.
 #     # from dotenv import load_dotenv
 #     # load_dotenv()
+#
+# Schema versioning:
+#     Every schema change is a numbered migration in MyPsql._migrations, and applied versions are
+#     recorded in {TARGET_SCHEMA}.schema_version. A warm start only opens the pool as the target user
+#     and reads max(version); the superuser path (_checking_sql: database / role checks, DDL, grants)
+#     runs only when that version is behind the latest migration, or the pool cannot connect at all.
+#     Migrations must be idempotent, since a database created before versioning existed replays them once.
 # ==============================================================================
 
 
@@ -68,6 +86,12 @@ class MyPsql:
         self._target_sch: str = os.getenv("TARGET_SCHEMA")
         self._target_tb: str = os.getenv("TARGET_TB")
 
+        # Schema migrations : (version, description, step). Append only, never renumber.
+        self._migrations: Tuple[Tuple[int, str, Callable[[], Awaitable[Optional[bool]]]], ...] = (
+            (1, "course table, owner and updated_at trigger", self._migrate_bootstrap),
+            (2, "normalize_course() and trigger-maintained course_counts", self._migrate_course_counts),
+        )
+
     # --------------------------------------------------------------------------
     # Private Initialization Methods
     # --------------------------------------------------------------------------
@@ -84,8 +108,15 @@ class MyPsql:
                 if self._initialized:
                     return
 
-                await self._checking_sql()
+                # Warm start : one version check on a pooled connection, no superuser connection and no DDL.
                 await self._connect_pool()
+                if self._pool and await self._schema_version() >= self._latest_version():
+                    self._initialized = True
+                    return
+
+                await self._checking_sql()
+                if not self._pool:
+                    await self._connect_pool()
                 self._initialized = True
         except Exception as e:
             console_log.error(f"Ensure initialized fail : {e}")
@@ -116,12 +147,144 @@ class MyPsql:
         try:
             await self._connect_to(obj = os.getenv("TARGET_TB"))
             await self._target_schema_exists()
-            await self._target_table_exists()
-            await self._grant_user()
-            await self._set_trigger()
+            await self._version_table_exists()
+            await self._run_migrations()
         except Exception as e:
             console_log.error(f"Supperuser conn pdb fail : {e}")
 
+    # --------------------------------------------------------------------------
+    # Private Migration Methods
+    # --------------------------------------------------------------------------
+
+    def _latest_version(self) -> int:
+        return max(version for version, _, _ in self._migrations)
+
+    async def _schema_version(self) -> int:
+        # Cheap warm-start check as the target user; 0 when the version table does not exist yet.
+        try:
+            async with self._pool.acquire() as conn:
+                return await conn.fetchval(
+                        f"select coalesce(max(version), 0) from {_quote_ident(self._target_sch)}.{VERSION_TB}"
+                    )
+        except asyncpg.UndefinedTableError:
+            return 0
+        except Exception as e:
+            console_log.error(f"Schema version fail : {e}")
+            return 0
+
+    async def _version_table_exists(self) -> None:
+        try:
+            q_sch = _quote_ident(self._target_sch)
+            await self._conn.execute(f"""
+                create table if not exists {q_sch}.{VERSION_TB} (
+                        version     int primary key,
+                        description text not null,
+                        applied_at  timestamptz not null default now()
+                );
+                alter table {q_sch}.{VERSION_TB} owner to {_quote_ident(self._target_user)};
+            """)
+        except Exception as e:
+            console_log.error(f"Version table exists fail : {e}")
+
+    async def _run_migrations(self) -> None:
+        # Applies pending migrations in order and stops at the first one that fails,
+        # so a later run retries it instead of skipping past it.
+        applied: int = await self._conn.fetchval(
+                f"select coalesce(max(version), 0) from {_quote_ident(self._target_sch)}.{VERSION_TB}"
+            )
+
+        for version, description, step in self._migrations:
+            if version <= applied:
+                continue
+
+            if not await step():
+                console_log.error(f"Migration {version} ({description}) fail, stop migrating.")
+                return
+
+            await self._conn.execute(
+                    f"insert into {_quote_ident(self._target_sch)}.{VERSION_TB} (version, description) \
+                        values ($1, $2) on conflict (version) do nothing", version, description
+                )
+            console_log.info(f"Migration {version} applied : {description}")
+
+    async def _migrate_bootstrap(self) -> Optional[bool]:
+        # Version 1 : what _checking_sql() used to do on every run.
+        results: List[Optional[bool]] = [
+            await self._target_table_exists(),
+            await self._grant_user(),
+            await self._set_trigger(),
+        ]
+        return all(results)
+
+    async def _migrate_course_counts(self) -> Optional[bool]:
+        # Version 2 : course counting moves into Postgres.
+        # normalize_course() is the SQL form of the old Python clean-up (strip "(xx)" tags, then trim),
+        # and a row trigger applies each insert / update / delete to course_counts as a delta,
+        # so it is updated in the same transaction as upsert_sql() and bulk_upsert_sql().
+        try:
+            q_sch = _quote_ident(self._target_sch)
+            q_tb = _quote_ident(self._target_tb)
+            q_user = _quote_ident(self._target_user)
+            await self._conn.execute(f"""
+                create or replace function {q_sch}.normalize_course(course text)
+                returns text as $$
+                    select regexp_replace(regexp_replace(course, '\\(.{{1,3}}\\)', '', 'g'), '^\\s+|\\s+$', '', 'g');
+                $$ language sql immutable strict;
+
+                create table if not exists {q_sch}.{SUMMARY_TB} (
+                        course      text primary key,
+                        credits     int not null
+                );
+                alter table {q_sch}.{SUMMARY_TB} owner to {q_user};
+
+                create or replace function {q_sch}.maintain_course_counts()
+                returns trigger as $$
+                begin
+                    if tg_op in ('UPDATE', 'DELETE') then
+                        update {q_sch}.{SUMMARY_TB} as summary
+                        set credits = summary.credits - delta.credits
+                        from (
+                            select {q_sch}.normalize_course(cell) as course, count(*) as credits
+                            from unnest(array[old."Mon", old."Tue", old."Wed", old."Thr", old."Fri"]) as cell
+                            where cell is not null
+                            group by 1
+                        ) as delta
+                        where summary.course = delta.course;
+                    end if;
+
+                    if tg_op in ('INSERT', 'UPDATE') then
+                        insert into {q_sch}.{SUMMARY_TB} as summary (course, credits)
+                        select {q_sch}.normalize_course(cell), count(*)
+                        from unnest(array[new."Mon", new."Tue", new."Wed", new."Thr", new."Fri"]) as cell
+                        where cell is not null
+                        group by 1
+                        on conflict (course) do update set credits = summary.credits + excluded.credits;
+                    end if;
+
+                    delete from {q_sch}.{SUMMARY_TB} where credits <= 0;
+                    return null;
+                end;
+                $$ language plpgsql;
+
+                drop trigger if exists trg_course_counts on {q_sch}.{q_tb};
+
+                create trigger trg_course_counts
+                after insert or delete or update of "Mon", "Tue", "Wed", "Thr", "Fri" on {q_sch}.{q_tb}
+                for each row
+                execute function {q_sch}.maintain_course_counts();
+
+                truncate {q_sch}.{SUMMARY_TB};
+                insert into {q_sch}.{SUMMARY_TB} (course, credits)
+                select {q_sch}.normalize_course(cell), count(*)
+                from {q_sch}.{q_tb}, unnest(array["Mon", "Tue", "Wed", "Thr", "Fri"]) as cell
+                where cell is not null
+                group by 1;
+            """)
+            console_log.info(f"Course counts summary {self._target_sch}.{SUMMARY_TB} ensured.")
+            return True
+        except Exception as e:
+            console_log.error(f"Migrate course counts fail : {e}")
+
     async def _connect_pool(self) -> None:
         try:
             self._pool = await asyncpg.create_pool(
@@ -210,7 +373,7 @@ class MyPsql:
         except Exception as e:
             console_log.error(f"Target schema exists fail : {e}")
 
-    async def _target_table_exists(self) -> None:
+    async def _target_table_exists(self) -> Optional[bool]:
         try:
             ttable_exists: bool = await self._conn.fetchval(
                     "select to_regclass($1)", f'{self._target_sch}.{self._target_tb}'
@@ -238,19 +401,21 @@ class MyPsql:
                             owner to {_quote_ident(self._target_user)};"
                     )
                 console_log.info(f"Table {self._target_sch}.{self._target_tb} ensured (owner = {self._target_user})")
+            return True
         except Exception as e:
             console_log.error(f"Target table exists fail : {e}")
 
-    async def _grant_user(self) -> None:
+    async def _grant_user(self) -> Optional[bool]:
         try:
             await self._conn.execute(
                     f"grant connect on database {_quote_ident(self._target_db)} to {_quote_ident(self._target_user)}"
                 )
             console_log.info(f"Granted privileges to {self._target_user}")
+            return True
         except Exception as e:
             console_log.error(f"Grant user fail : {e}")
 
-    async def _set_trigger(self) -> None:
+    async def _set_trigger(self) -> Optional[bool]:
         # This function _set_trigger() ensures that whenever a table is updated,
         # the updated_at column is automatically set to the current time,
         # without requiring manual handling.
@@ -274,6 +439,7 @@ class MyPsql:
                 execute function {q_sch}.set_updated_at();
             """)
             console_log.info("Set trigger success.")
+            return True
         except Exception as e:
             console_log.error(f"Set trigger fail : {e}")
 
@@ -310,7 +476,7 @@ class MyPsql:
             await self._pool.close()
             self._pool = None
 
-    async def upsert_sql(self, academic_term: str, courses: Tuple[Tuple[str]]):
+    async def upsert_sql(self, academic_term: str, courses: Tuple[Tuple[str]]) -> Optional[bool]:
         try:
             q_sch = _quote_ident(self._target_sch)
             q_tb = _quote_ident(self._target_tb)
@@ -338,23 +504,97 @@ class MyPsql:
             async with self._transaction() as conn:
                 await conn.executemany(sql, courses)
             console_log.info(f"Upsert success for term {academic_term}: {len(courses)} rows.")
+            return True
         except Exception as e:
             console_log.error(f"Upsert sql fail : {e}")
 
+    async def bulk_upsert_sql(self, courses: Iterable[Tuple[str, ...]]) -> Optional[Dict[str, int]]:
+        # Bulk counterpart of upsert_sql() for rows of any number of terms:
+        # rows are streamed with COPY into a temporary staging table,
+        # then merged into the target table with one set-based statement, all in a single transaction.
+        # "xmax = 0" is only true for freshly inserted tuples, which splits inserted from updated rows;
+        # rows whose values did not change are filtered out by the where clause and counted as unchanged.
+        try:
+            q_sch = _quote_ident(self._target_sch)
+            q_tb = _quote_ident(self._target_tb)
+            records: List[Tuple[str, ...]] = list(courses)
+
+            async with self._transaction() as conn:
+                await conn.execute(f"""
+                    create temp table {STAGING_TB} (
+                        term    varchar(10),
+                        time    varchar(15),
+                        "Mon"   varchar(100),
+                        "Tue"   varchar(100),
+                        "Wed"   varchar(100),
+                        "Thr"   varchar(100),
+                        "Fri"   varchar(100)
+                    ) on commit drop
+                """)
+                await conn.copy_records_to_table(STAGING_TB, records = records, columns = COURSE_COLUMNS)
+
+                counts = await conn.fetchrow(f"""
+                    with staged as (
+                        select distinct on (term, time) *
+                        from {STAGING_TB}
+                        order by term, time
+                    ), merged as (
+                        insert into {q_sch}.{q_tb}
+                        (term, time, "Mon", "Tue", "Wed", "Thr", "Fri")
+                        select term, time, "Mon", "Tue", "Wed", "Thr", "Fri" from staged
+                        on conflict (term, time)
+                        do update set
+                            "Mon" = excluded."Mon",
+                            "Tue" = excluded."Tue",
+                            "Wed" = excluded."Wed",
+                            "Thr" = excluded."Thr",
+                            "Fri" = excluded."Fri",
+                            updated_at = now()
+                        where (
+                            {q_sch}.{q_tb}."Mon" is distinct from excluded."Mon" or
+                            {q_sch}.{q_tb}."Tue" is distinct from excluded."Tue" or
+                            {q_sch}.{q_tb}."Wed" is distinct from excluded."Wed" or
+                            {q_sch}.{q_tb}."Thr" is distinct from excluded."Thr" or
+                            {q_sch}.{q_tb}."Fri" is distinct from excluded."Fri"
+                        )
+                        returning (xmax = 0) as inserted
+                    )
+                    select
+                        (select count(*) from staged) as staged,
+                        count(*) filter (where inserted) as inserted,
+                        count(*) filter (where not inserted) as updated
+                    from merged
+                """)
+
+            result: Dict[str, int] = {
+                "inserted": counts["inserted"],
+                "updated": counts["updated"],
+                "unchanged": counts["staged"] - counts["inserted"] - counts["updated"],
+            }
+            console_log.info(
+                f"Bulk upsert success : {len(records)} rows, "
+                f"{result['inserted']} inserted, {result['updated']} updated, {result['unchanged']} unchanged."
+            )
+            return result
+        except Exception as e:
+            console_log.error(f"Bulk upsert sql fail : {e}")
+
     async def fetch_sql(self) -> pd.DataFrame:
         try:
+            # Reads the few pre-aggregated rows of course_counts (see _migrate_course_counts)
+            # instead of unnesting and normalizing every cell of the whole history.
             sql: str = f"""
-                            select unnest(array["Mon", "Tue", "Wed", "Thr", "Fri"])
-                            from {_quote_ident(self._target_sch)}.{_quote_ident(self._target_tb)}
+                            select course, credits
+                            from {_quote_ident(self._target_sch)}.{SUMMARY_TB}
+                            order by credits desc, course
                         """
 
             async with self._transaction() as conn:
                 rows = await conn.fetch(sql)
 
-            pattern: Pattern[str] = re.compile(r'\(.{1,3}\)')
-            courses: List[str] = [pattern.sub('', row[0]).strip() for row in rows]
-
-            counts_courses: pd.DataFrame = pd.Series(courses).value_counts().reset_index()
+            counts_courses: pd.DataFrame = pd.DataFrame(
+                [tuple(row) for row in rows], columns = ["course", "count"]
+            )
             return counts_courses
         except Exception as e:
             console_log.error(f"Fetch sql fail : {e}")
\ No newline at end of file
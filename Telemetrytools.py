@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""
+    Created on Sun Oct 18 03:31:08 2026
+
+    @author: Johnson
+"""
+
+# ==============================================================================
+# Standard Library Imports
+# ==============================================================================
+
+import asyncio
+import contextlib
+import functools
+import inspect
+import itertools
+import json
+import logging
+import math
+import os
+import threading
+import time
+from typing import Optional, Final, Tuple, List, Dict, Iterator, Callable
+
+# ==============================================================================
+# Constants
+# ==============================================================================
+
+METRIC_PREFIX: Final[str] = "course_fetcher"
+RUN_FILE_PREFIX: Final[str] = "run-"
+PROMETHEUS_FILENAME: Final[str] = "metrics.prom"
+LAG_QUANTILES: Final[Tuple[float, ...]] = (0.5, 0.9, 0.99)
+# A stall is blamed on the shortest event-loop span covering at least this share of it.
+SUSPECT_OVERLAP: Final[float] = 0.5
+
+# Defaults of the "telemetry" section in config.yaml.
+TELEMETRY_DEFAULTS: Final[Dict] = {
+    "enabled": True,
+    "output": "./telemetry",
+    "keep": 30,
+    "lag_interval": 0.05,
+    "stall_threshold": 0.1,
+}
+
+# ==============================================================================
+# Global Variables
+# ==============================================================================
+
+console_log = logging.getLogger("Console_log")
+
+# ==============================================================================
+# NOTE:
+# The purpose of this Telemetrytools.py module is to show where the time of a run goes.
+#
+# Telemetry collects two kinds of measurements:
+#     - Spans : wall time of a named stage ("login_attempt", "parse", "store", "notify", ...),
+#         recorded by telemetry.span() (with block) or telemetry.timed() (decorator, sync or async).
+#         Extra labels such as term = "113-2" or channel = "mail" are kept per span.
+#     - Loop lag : a sampler task sleeps "lag_interval" seconds on the event loop and records how late it wakes up.
+#         A late wake-up above "stall_threshold" is a stall: synchronous Selenium or file work ran on the loop.
+#         Each stall names its suspects, the shortest spans that ran on the loop thread during it.
+#
+# export() writes, into "output":
+#     - run-<timestamp>.json : every span, totals per stage and per (stage, labels), loop-lag percentiles and stalls
+#         of this run (the "keep" most recent runs are kept, so runs can be compared for regressions),
+#     - metrics.prom : the (stage, labels) totals in Prometheus text format, one series per term or channel,
+#         e.g. for node_exporter's textfile collector.
+# ==============================================================================
+
+
+# ==============================================================================
+# Private Helpers
+# ==============================================================================
+
+
+def _quantile(values: List[float], q: float) -> float:
+    # Nearest-rank quantile of already sorted values.
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, math.ceil(q * len(values)) - 1))]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _metric(name: str, value: float, labels: Optional[Dict[str, str]] = None) -> str:
+    label_text: str = ",".join(f"{key}=\"{_escape(text)}\"" for key, text in (labels or {}).items())
+    value_text: str = str(value) if isinstance(value, int) else f"{value:.6f}"
+    return f"{METRIC_PREFIX}_{name}{{{label_text}}} {value_text}" if label_text \
+        else f"{METRIC_PREFIX}_{name} {value_text}"
+
+
+def _header(name: str, kind: str, text: str) -> List[str]:
+    return [f"# HELP {METRIC_PREFIX}_{name} {text}", f"# TYPE {METRIC_PREFIX}_{name} {kind}"]
+
+
+def _write_atomic(path: str, text: str) -> None:
+    temp_path: str = f"{path}.tmp"
+    with open(temp_path, "w", encoding = "utf-8") as out_f:
+        out_f.write(text)
+    os.replace(temp_path, path)
+
+
+# ==============================================================================
+# Public API
+# ==============================================================================
+# Methods below are intended for external use.
+
+
+class Telemetry:
+    # Usage:
+    #     telemetry = Telemetry()
+    #     with telemetry.span("parse", term = "113-2"):
+    #         ...
+    #
+    #     @telemetry.timed("login_attempt")
+    #     async def login_attempt(): ...
+    #
+    #     telemetry.start_sampler(0.05, 0.1)  # inside the running event loop
+    #     ...
+    #     await telemetry.stop_sampler()
+    #     telemetry.export("./telemetry")
+    def __init__(self):
+        self._origin: float = time.perf_counter()
+        self._started_at: float = time.time()
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._spans: List[Dict] = []
+        self._active: Dict[int, str] = {}
+        self._lags: List[float] = []
+        self._stalls: List[Dict] = []
+        self._loop_thread: Optional[int] = None
+        self._sampler: Optional[asyncio.Task] = None
+
+    def _now(self) -> float:
+        return time.perf_counter() - self._origin
+
+    @contextlib.contextmanager
+    def span(self, stage: str, **labels: str) -> Iterator[None]:
+        span_id: int = next(self._ids)
+        start: float = self._now()
+        ok: bool = True
+        with self._lock:
+            self._active[span_id] = stage
+
+        try:
+            yield
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            end: float = self._now()
+            record: Dict = {
+                "stage": stage,
+                "labels": {key: str(value) for key, value in labels.items()},
+                "start": round(start, 6),
+                "duration": round(end - start, 6),
+                "ok": ok,
+                "on_loop": threading.get_ident() == self._loop_thread,
+            }
+            with self._lock:
+                del self._active[span_id]
+                self._spans.append(record)
+
+    def timed(self, stage: str, **labels: str) -> Callable:
+        def decorator(func: Callable) -> Callable:
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(stage, **labels):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(stage, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    async def _sample_loop(self, interval: float, threshold: float) -> None:
+        while True:
+            expected: float = self._now() + interval
+            await asyncio.sleep(interval)
+            lag: float = max(0.0, self._now() - expected)
+            self._lags.append(lag)
+
+            if lag >= threshold:
+                self._stalls.append({"start": round(expected, 6), "lag": round(lag, 6)})
+                with self._lock:
+                    active: List[str] = sorted(set(self._active.values()))
+                console_log.debug(f"Event loop stalled {lag * 1000:.0f} ms (open spans : {', '.join(active) or 'none'}).")
+
+    def start_sampler(self, interval: float = 0.05, threshold: float = 0.1) -> None:
+        # Must be called from the running event loop; spans on this thread count as on-loop.
+        if self._sampler:
+            return
+        self._loop_thread = threading.get_ident()
+        self._sampler = asyncio.get_running_loop().create_task(self._sample_loop(interval, threshold))
+
+    async def stop_sampler(self) -> None:
+        if not self._sampler:
+            return
+        self._sampler.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._sampler
+        self._sampler = None
+
+    def _suspects(self, stall: Dict, spans: List[Dict]) -> List[str]:
+        start, end = stall["start"], stall["start"] + stall["lag"]
+        overlapping: List[Dict] = [
+            span for span in spans
+            if span["on_loop"]
+            and min(end, span["start"] + span["duration"]) - max(start, span["start"]) >= stall["lag"] * SUSPECT_OVERLAP
+        ]
+        overlapping.sort(key = lambda span: span["duration"])
+        return [
+            span["stage"] + "".join(f" {key}={value}" for key, value in span["labels"].items())
+            for span in overlapping[:3]
+        ]
+
+    def summary(self) -> Dict:
+        with self._lock:
+            spans: List[Dict] = sorted(self._spans, key = lambda span: span["start"])
+        lags: List[float] = sorted(self._lags)
+
+        # "stages" totals each stage, "series" each (stage, labels) pair, e.g. every term of "scrape".
+        stages: Dict[str, Dict] = {}
+        series: Dict[Tuple, Dict] = {}
+        for span in spans:
+            key: Tuple = (span["stage"], *sorted(span["labels"].items()))
+            for entry in (
+                stages.setdefault(span["stage"], {"count": 0, "total": 0.0, "max": 0.0, "errors": 0}),
+                series.setdefault(key, {"stage": span["stage"], "labels": span["labels"],
+                                        "count": 0, "total": 0.0, "max": 0.0, "errors": 0}),
+            ):
+                entry["count"] += 1
+                entry["total"] = round(entry["total"] + span["duration"], 6)
+                entry["max"] = max(entry["max"], span["duration"])
+                entry["errors"] += 0 if span["ok"] else 1
+
+        return {
+            "started_at": self._started_at,
+            "duration": round(self._now(), 6),
+            "stages": stages,
+            "series": list(series.values()),
+            "loop_lag": {
+                "samples": len(lags),
+                "total": round(sum(lags), 6),
+                "max": round(lags[-1], 6) if lags else 0.0,
+                **{f"p{round(q * 100)}": round(_quantile(lags, q), 6) for q in LAG_QUANTILES},
+            },
+            "stalls": [{**stall, "suspects": self._suspects(stall, spans)} for stall in self._stalls],
+            "spans": spans,
+        }
+
+    def to_prometheus(self, summary: Dict) -> str:
+        lines: List[str] = []
+
+        lines += _header("run_duration_seconds", "gauge", "Wall time of the last run.")
+        lines.append(_metric("run_duration_seconds", summary["duration"]))
+        lines += _header("run_started_timestamp_seconds", "gauge", "Unix time the last run started.")
+        lines.append(_metric("run_started_timestamp_seconds", summary["started_at"]))
+
+        # One series per (stage, labels), so e.g. sum by (stage) gives the stage total and term splits it.
+        series: List[Tuple[Dict[str, str], Dict]] = [
+            ({"stage": entry["stage"], **entry["labels"]}, entry) for entry in summary["series"]
+        ]
+        lines += _header("stage_duration_seconds", "summary", "Wall time spent in each stage during the last run.")
+        for labels, entry in series:
+            lines.append(_metric("stage_duration_seconds_sum", entry["total"], labels))
+            lines.append(_metric("stage_duration_seconds_count", entry["count"], labels))
+        lines += _header("stage_duration_max_seconds", "gauge", "Longest single span of each stage during the last run.")
+        for labels, entry in series:
+            lines.append(_metric("stage_duration_max_seconds", entry["max"], labels))
+        lines += _header("stage_errors", "gauge", "Spans of each stage that raised during the last run.")
+        for labels, entry in series:
+            lines.append(_metric("stage_errors", entry["errors"], labels))
+
+        loop_lag: Dict = summary["loop_lag"]
+        lines += _header("event_loop_lag_seconds", "summary", "How late the event loop sampler woke up.")
+        for q in LAG_QUANTILES:
+            lines.append(_metric("event_loop_lag_seconds", loop_lag[f"p{round(q * 100)}"], {"quantile": str(q)}))
+        lines.append(_metric("event_loop_lag_seconds_sum", loop_lag["total"]))
+        lines.append(_metric("event_loop_lag_seconds_count", loop_lag["samples"]))
+        lines += _header("event_loop_lag_max_seconds", "gauge", "Worst event loop lag of the last run.")
+        lines.append(_metric("event_loop_lag_max_seconds", loop_lag["max"]))
+        lines += _header("event_loop_stalls", "gauge", "Event loop stalls above the threshold during the last run.")
+        lines.append(_metric("event_loop_stalls", len(summary["stalls"])))
+        return "\n".join(lines) + "\n"
+
+    def export(self, output: str = TELEMETRY_DEFAULTS["output"], keep: int = TELEMETRY_DEFAULTS["keep"]) -> Optional[bool]:
+        # Blocking, run it with asyncio.to_thread() from the event loop.
+        try:
+            summary: Dict = self.summary()
+            os.makedirs(output, exist_ok = True)
+
+            stamp: str = time.strftime("%Y%m%d-%H%M%S", time.localtime(self._started_at))
+            _write_atomic(
+                os.path.join(output, f"{RUN_FILE_PREFIX}{stamp}.json"),
+                json.dumps(summary, ensure_ascii = False, indent = 2)
+            )
+            _write_atomic(os.path.join(output, PROMETHEUS_FILENAME), self.to_prometheus(summary))
+
+            runs: List[str] = sorted(
+                file for file in os.listdir(output) if file.startswith(RUN_FILE_PREFIX) and file.endswith(".json")
+            )
+            for file in runs[:max(0, len(runs) - max(1, int(keep)))]:
+                os.remove(os.path.join(output, file))
+
+            slowest: List[Tuple[str, Dict]] = sorted(
+                summary["stages"].items(), key = lambda item: item[1]["total"], reverse = True
+            )[:5]
+            console_log.info(
+                f"Run took {summary['duration']:.1f}s, loop lag max {summary['loop_lag']['max'] * 1000:.0f} ms, "
+                f"{len(summary['stalls'])} stalls. Slowest stages : "
+                + ", ".join(f"{stage} {entry['total']:.2f}s" for stage, entry in slowest)
+            )
+            return True
+        except Exception as e:
+            console_log.error(f"Export telemetry fail : {e}")
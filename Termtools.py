@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+    Created on Sat Oct 17 22:18:54 2026
+
+    @author: Johnson
+"""
+
+# ==============================================================================
+# Standard Library Imports
+# ==============================================================================
+
+import datetime
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Optional, Final, Tuple, List, Dict, Iterable
+
+# ==============================================================================
+# Constants
+# ==============================================================================
+
+# Minguo calendar: year 1 is 1912, terms are labelled "<year>-<semester>" (e.g. "114-1").
+ROC_OFFSET: Final[int] = 1911
+# Semester 1 starts in August, semester 2 in February.
+FIRST_SEMESTER_MONTH: Final[int] = 8
+SECOND_SEMESTER_MONTH: Final[int] = 2
+
+# ==============================================================================
+# Global Variables
+# ==============================================================================
+
+console_log = logging.getLogger("Console_log")
+
+# ==============================================================================
+# NOTE:
+# The purpose of this Termtools.py module is to let a run skip terms that have not changed.
+#
+# FingerprintStore keeps, per term, the SHA-256 of its parsed rows (headers included)
+# and when it was last fetched, in a small JSON file next to schedule.xlsx:
+#     {"113-2": {"digest": "...", "fetched_at": 1760000000.0, "stale": false}, ...}
+#
+# Two independent savings:
+#     - Any mode: a term whose digest is unchanged skips store_xlsx, store_db and timetable_pic.
+#     - Incremental mode ("fetch.incremental"): only the current and upcoming terms are visited,
+#         plus terms that are missing, marked stale ("mark-stale" subcommand) or older than "stale_after".
+#
+# The digest is taken over the parsed rows rather than the raw HTML,
+# so browser / tabs / http modes produce the same fingerprint for the same timetable.
+# ==============================================================================
+
+
+# ==============================================================================
+# Private Helpers
+# ==============================================================================
+
+
+def _term_key(term: str) -> Tuple[int, int]:
+    year, semester = term.split("-")
+    return int(year), int(semester)
+
+
+# ==============================================================================
+# Public API
+# ==============================================================================
+# Methods below are intended for external use.
+
+
+def current_term(today: Optional[datetime.date] = None) -> Tuple[int, int]:
+    today = today or datetime.date.today()
+
+    if today.month >= FIRST_SEMESTER_MONTH:
+        return today.year - ROC_OFFSET, 1
+    if today.month >= SECOND_SEMESTER_MONTH:
+        return today.year - ROC_OFFSET - 1, 2
+    return today.year - ROC_OFFSET - 1, 1
+
+
+def is_recent(term: str, today: Optional[datetime.date] = None) -> bool:
+    # Current or upcoming term; unparsable labels count as recent so they are never skipped.
+    try:
+        return _term_key(term) >= current_term(today)
+    except ValueError:
+        return True
+
+
+def fingerprint(time_datas: Iterable[str], courses_info: Iterable[Iterable[str]]) -> str:
+    payload: str = json.dumps([list(time_datas), [list(row) for row in courses_info]], ensure_ascii = False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class FingerprintStore:
+    def __init__(self, path: str, stale_after: float = 604800):
+        self._path: str = path
+        self._stale_after: float = stale_after
+        self._terms: Dict[str, Dict] = {}
+        self._dirty: bool = False
+
+        try:
+            if os.path.exists(path):
+                with open(path, "r", encoding = "utf-8") as json_f:
+                    self._terms = json.load(json_f)
+        except Exception as e:
+            console_log.error(f"Load fingerprints fail, every term will be fetched : {e}")
+            self._terms = {}
+
+    def needs_visit(self, term: str) -> bool:
+        entry: Optional[Dict] = self._terms.get(term)
+        if not entry or entry.get("stale"):
+            return True
+        return time.time() - entry.get("fetched_at", 0) > self._stale_after
+
+    def unchanged(self, term: str, digest: str) -> bool:
+        entry: Optional[Dict] = self._terms.get(term)
+        return bool(entry) and not entry.get("stale") and entry.get("digest") == digest
+
+    def touch(self, term: str) -> None:
+        # Visited and unchanged: only the fetch time moves.
+        if term in self._terms:
+            self._terms[term]["fetched_at"] = time.time()
+            self._dirty = True
+
+    def record(self, term: str, digest: str) -> None:
+        self._terms[term] = {"digest": digest, "fetched_at": time.time(), "stale": False}
+        self._dirty = True
+
+    def mark_stale(self, terms: Optional[Iterable[str]] = None) -> List[str]:
+        # No terms given marks every known term.
+        marked: List[str] = [term for term in (terms or list(self._terms)) if term in self._terms]
+        for term in marked:
+            self._terms[term]["stale"] = True
+        self._dirty = self._dirty or bool(marked)
+        return marked
+
+    def save(self) -> Optional[bool]:
+        if not self._dirty:
+            return True
+
+        try:
+            temp_path: str = f"{self._path}.tmp"
+            with open(temp_path, "w", encoding = "utf-8") as json_f:
+                json.dump(self._terms, json_f, ensure_ascii = False, indent = 2, sort_keys = True)
+            os.replace(temp_path, self._path)
+
+            self._dirty = False
+            return True
+        except Exception as e:
+            console_log.error(f"Save fingerprints fail : {e}")
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+    Created on Sat Oct 17 23:02:16 2026
+
+    @author: Johnson
+"""
+
+# ==============================================================================
+# Standard Library Imports
+# ==============================================================================
+
+import logging
+import os
+import threading
+from typing import Optional, Final, List, Dict, Iterable
+
+# ==============================================================================
+# Third-Party Imports
+# ==============================================================================
+
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+
+# ==============================================================================
+# Constants
+# ==============================================================================
+
+# Same header look as pandas' openpyxl writer, so rewritten and preserved sheets match.
+HEADER_FONT: Final[Font] = Font(bold = True)
+HEADER_BORDER: Final[Border] = Border(*(Side(style = "thin"),) * 4)
+HEADER_ALIGNMENT: Final[Alignment] = Alignment(horizontal = "center", vertical = "top")
+
+# ==============================================================================
+# Global Variables
+# ==============================================================================
+
+console_log = logging.getLogger("Console_log")
+
+# ==============================================================================
+# NOTE:
+# The purpose of this Xlsxtools.py module is to write schedule.xlsx once per run.
+#
+# store_xlsx() used to reopen the workbook with pd.ExcelWriter(mode = "a") for every term,
+# so openpyxl loaded and re-serialized every sheet each time (quadratic in the number of terms),
+# synchronously on the event loop.
+#
+# WorkbookSink only collects the term DataFrames; flush() then, in one pass, off the event loop:
+#     1. streams the sheets that were not touched in this run out of the existing workbook (read-only mode),
+#     2. writes them and the new sheets through a write-only workbook, keeping the existing sheet order,
+#     3. saves to a temporary file and renames it over the old one.
+# Preserved sheets keep their values and header style; other cell formatting is not carried over.
+# ==============================================================================
+
+
+# ==============================================================================
+# Private Helpers
+# ==============================================================================
+
+
+def _header_cells(sheet, values: Iterable) -> List[WriteOnlyCell]:
+    cells: List[WriteOnlyCell] = []
+    for value in values:
+        cell = WriteOnlyCell(sheet, value = value)
+        cell.font, cell.border, cell.alignment = HEADER_FONT, HEADER_BORDER, HEADER_ALIGNMENT
+        cells.append(cell)
+    return cells
+
+
+def _write_frame(sheet, df: pd.DataFrame) -> None:
+    sheet.append(_header_cells(sheet, df.columns))
+    for row in df.astype(object).where(df.notna(), None).itertuples(index = False, name = None):
+        sheet.append(row)
+
+
+def _copy_sheet(sheet, source) -> None:
+    for idx, row in enumerate(source.iter_rows(values_only = True)):
+        sheet.append(_header_cells(sheet, row) if idx == 0 else row)
+
+
+# ==============================================================================
+# Public API
+# ==============================================================================
+# Methods below are intended for external use.
+
+
+class WorkbookSink:
+    def __init__(self, path: str):
+        self._path: str = path
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    def add(self, sheet_name: str, df: pd.DataFrame) -> None:
+        # Latest frame wins if a term is added twice.
+        with self._lock:
+            self._frames[sheet_name] = df
+
+    def flush(self) -> Optional[bool]:
+        # Blocking, run it with asyncio.to_thread(). Returns True when there was nothing to write.
+        with self._lock:
+            frames: Dict[str, pd.DataFrame] = dict(self._frames)
+
+        if not frames:
+            return True
+
+        temp_path: str = f"{self._path}.tmp"
+        try:
+            book = Workbook(write_only = True)
+            source = load_workbook(self._path, read_only = True) if os.path.exists(self._path) else None
+
+            try:
+                existing: List[str] = source.sheetnames if source else []
+                for name in existing:
+                    sheet = book.create_sheet(name)
+                    if name in frames:
+                        _write_frame(sheet, frames[name])
+                    else:
+                        _copy_sheet(sheet, source[name])
+
+                for name, df in frames.items():
+                    if name not in existing:
+                        _write_frame(book.create_sheet(name), df)
+            finally:
+                if source:
+                    source.close()
+
+            book.save(temp_path)
+            os.replace(temp_path, self._path)
+
+            with self._lock:
+                for name, df in frames.items():
+                    if self._frames.get(name) is df:
+                        del self._frames[name]
+
+            console_log.info(f"Workbook {self._path} written : {len(frames)} sheets updated.")
+            return True
+        except Exception as e:
+            console_log.error(f"Write workbook {self._path} fail : {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
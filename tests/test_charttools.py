@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+    Created on Sat Oct 24 11:02:26 2026
+
+    @author: Johnson
+"""
+
+import asyncio
+import importlib.util
+import os
+
+import pandas as pd
+import pytest
+
+import Charttools
+from Charttools import ChartRenderer, build_figures, chart_key
+
+SETTINGS = {
+    "columns": ["Courses", "Credit course"],
+    "pie_title": "Courses",
+    "bar_title": "Credit courses",
+    "bar_tickangle": -45,
+}
+
+
+def _counts() -> pd.DataFrame:
+    return pd.DataFrame({"course": ["Calculus", "Physics"], "count": [3, 2]})
+
+
+def test_unsupported_backend_falls_back_to_selenium():
+    renderer = ChartRenderer("matplotlib")
+    assert not renderer.available
+    assert asyncio.run(renderer.render({"courses_pie": None}, {})) == {"courses_pie": False}
+
+
+def test_kaleido_without_chrome_is_unavailable(monkeypatch):
+    monkeypatch.setattr(Charttools, "_chrome_path", lambda: None)
+    assert not ChartRenderer("kaleido").available
+
+
+def test_chart_key_follows_data_and_settings():
+    assert chart_key(_counts(), SETTINGS) == chart_key(_counts(), dict(SETTINGS))
+    assert chart_key(_counts(), SETTINGS) != chart_key(_counts().assign(count = [3, 3]), SETTINGS)
+    assert chart_key(_counts(), SETTINGS) != chart_key(_counts(), {**SETTINGS, "bar_tickangle": 0})
+
+
+@pytest.mark.skipif(
+    importlib.util.find_spec("kaleido") is None or not Charttools._chrome_path(),
+    reason = "kaleido >= 1 needs a local Chrome / Chromium"
+)
+def test_kaleido_renders_png(tmp_path):
+    renderer = ChartRenderer("kaleido", max_workers = 1, width = 400, height = 300)
+    figures = build_figures(_counts(), SETTINGS)
+    paths = {name: str(tmp_path / f"{name}.png") for name in figures}
+
+    try:
+        assert asyncio.run(renderer.render(figures, paths)) == {name: True for name in figures}
+    finally:
+        renderer.shutdown()
+
+    for path in paths.values():
+        with open(path, "rb") as png_f:
+            assert png_f.read(8) == b"\x89PNG\r\n\x1a\n"
+        assert os.path.getsize(path) > 1000
+
+
+def test_plotly_asset_is_versioned_and_replaced(tmp_path):
+    stale = tmp_path / "plotly-0.0.1.min.js"
+    stale.write_text("stale", encoding = "utf-8")
+
+    written = Charttools.write_charts_html(build_figures(_counts(), SETTINGS), "dashboard", str(tmp_path))
+
+    assert Charttools.PLOTLY_ASSET == f"plotly-{Charttools.plotly.__version__}.min.js"
+    assert not stale.exists()
+    assert (tmp_path / Charttools.PLOTLY_ASSET).stat().st_size > 1000
+    with open(written[0], "r", encoding = "utf-8") as html_f:
+        assert f"src=\"{Charttools.PLOTLY_ASSET}\"" in html_f.read()
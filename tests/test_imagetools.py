@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+    Created on Sat Oct 24 14:26:03 2026
+
+    @author: Johnson
+"""
+
+import asyncio
+import os
+
+import cv2
+import numpy as np
+
+from Imagetools import list_images, prepare_attachments
+
+
+def _write_png(path, shade: int, size = (300, 400)) -> None:
+    cv2.imwrite(str(path), np.full((*size, 3), shade, np.uint8))
+
+
+def _settings(tmp_path) -> dict:
+    return {"output": str(tmp_path / "attachments"), "cache": str(tmp_path / "cache"), "workers": 1}
+
+
+def test_list_images_skips_debug_images(tmp_path):
+    for name in ("captcha.png", "dilate.png", "courses_pie.png"):
+        _write_png(tmp_path / name, 200)
+    assert [os.path.basename(path) for path in list_images(str(tmp_path))] == ["courses_pie.png"]
+
+
+def test_timetables_become_one_contact_sheet(tmp_path):
+    img_dir = tmp_path / "imgs"
+    img_dir.mkdir()
+    _write_png(img_dir / "schedule_info_113-2.png", 100)
+    _write_png(img_dir / "schedule_info_114-1.png", 150)
+    _write_png(img_dir / "courses_pie.png", 200, (2000, 3000))
+
+    output: str = asyncio.run(prepare_attachments(str(img_dir), _settings(tmp_path)))
+
+    assert sorted(os.listdir(output)) == ["courses_pie.jpg", "schedule_sheet.jpg"]
+    assert cv2.imread(os.path.join(output, "courses_pie.jpg")).shape[1] == 1280
+
+
+def test_cache_keeps_only_the_current_set(tmp_path):
+    img_dir = tmp_path / "imgs"
+    img_dir.mkdir()
+    _write_png(img_dir / "courses_pie.png", 200)
+    _write_png(img_dir / "courses_bar.png", 220)
+    settings: dict = _settings(tmp_path)
+
+    asyncio.run(prepare_attachments(str(img_dir), settings))
+    first: set = set(os.listdir(settings["cache"]))
+    assert len(first) == 2
+
+    _write_png(img_dir / "courses_pie.png", 120)
+    (img_dir / "courses_bar.png").unlink()
+    (tmp_path / "cache" / "leftover.jpg.tmp").write_bytes(b"")
+    asyncio.run(prepare_attachments(str(img_dir), settings))
+
+    second: set = set(os.listdir(settings["cache"]))
+    assert len(second) == 1 and not second & first
+    assert os.listdir(settings["output"]) == ["courses_pie.jpg"]
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+    Created on Sat Oct 24 17:05:14 2026
+
+    @author: Johnson
+"""
+
+import asyncio
+import os
+import random
+import socket
+from typing import Dict, List, Tuple
+
+import aiohttp
+import pytest
+
+import Notifiers
+import Ocrtools
+from Fetchtools import ScheduleClient, extract_table
+from Mocktools import SESSION_COOKIE, MockPortal, _captcha_png
+from Parsetools import parse_rows
+
+FIXTURE_PATH: str = os.path.join(os.path.dirname(__file__), "..", "bench_fixtures", "schedule_rows.json")
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _start_portal(monkeypatch, accept_any_captcha: bool) -> MockPortal:
+    portal = MockPortal({
+        "port": _free_port(), "smtp_port": _free_port(), "fixtures": FIXTURE_PATH,
+        "years": [113, 114], "accept_any_captcha": accept_any_captcha,
+    })
+    smtp_user, smtp_password = portal.smtp_credentials
+    for key, value in {"MAIL_ADDR": smtp_user, "SMTP_PWD": smtp_password, "TO_ADDR": smtp_user,
+                        "ACCESS_TOKEN": "bench", "USER_ID": "bench"}.items():
+        monkeypatch.setenv(key, value)
+
+    portal.start()
+    return portal
+
+
+@pytest.fixture
+def portal(monkeypatch):
+    portal = _start_portal(monkeypatch, accept_any_captcha = True)
+    yield portal
+    portal.stop()
+
+
+@pytest.fixture
+def strict_portal(monkeypatch):
+    # Checks the captcha answer, like the shipped bench.e2e.portal config.
+    portal = _start_portal(monkeypatch, accept_any_captcha = False)
+    yield portal
+    portal.stop()
+
+
+async def _login(portal: MockPortal) -> str:
+    # The browser's part of the login, over plain HTTP; returns the session cookie.
+    account, password = portal.account
+    async with aiohttp.ClientSession(cookie_jar = aiohttp.CookieJar(unsafe = True)) as session:
+        async with session.get(portal.url):
+            pass
+        async with session.get(f"{portal.url}vimg.png"):
+            pass
+        async with session.post(f"{portal.url}login", data = {
+            "STDNO": account, "PASSWD": password, "ValidCode_login": "12345"
+        }) as response:
+            assert response.url.path == "/news.asp"
+        return next(cookie.value for cookie in session.cookie_jar if cookie.key == SESSION_COOKIE)
+
+
+def _session_info(portal: MockPortal, cookie: str) -> Dict:
+    # What export_session() reads from the course page in the browser.
+    return {
+        "action": f"{portal.url}course.asp",
+        "method": "post",
+        "fields": [("btnQuery", "query")],
+        "years": [("113", "113"), ("114", "114")],
+        "semesters": [("1", "1"), ("2", "2")],
+        "cookies": [{"name": SESSION_COOKIE, "value": cookie}],
+    }
+
+
+def test_mock_captcha_segments_into_five_digits(strict_portal):
+    async def fetch_captcha() -> bytes:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{strict_portal.url}vimg.png") as response:
+                return await response.read()
+
+    png_bytes: bytes = asyncio.run(fetch_captcha())
+    for threshold in (18, 20, 22):
+        candidates = Ocrtools.build_candidates(png_bytes, (threshold,))
+        assert candidates
+        assert all(len(Ocrtools.segment_digits(candidate)) == 5 for candidate in candidates)
+
+
+def test_ocr_logs_in_to_a_strict_mock(strict_portal, tmp_path):
+    settings: Dict = Ocrtools.load_ocr_settings({"template_dir": str(tmp_path)}, str(tmp_path))
+    rng = random.Random(7)
+    counts: Dict[str, int] = Ocrtools.build_templates(
+        [(code, _captcha_png(code, rng)) for code in ("01234", "56789", "97531", "86420")], settings
+    )
+    assert all(counts.values())
+    classifier = Ocrtools.DigitClassifier(str(tmp_path))
+
+    async def scenario() -> str:
+        account, password = strict_portal.account
+        async with aiohttp.ClientSession(cookie_jar = aiohttp.CookieJar(unsafe = True)) as session:
+            async with session.get(f"{strict_portal.url}vimg.png") as response:
+                png_bytes: bytes = await response.read()
+            code, _ = Ocrtools.recognize_captcha(png_bytes, settings, classifier)
+            async with session.post(f"{strict_portal.url}login", data = {
+                "STDNO": account, "PASSWD": password, "ValidCode_login": code
+            }) as response:
+                return response.url.path
+
+    assert asyncio.run(scenario()) == "/news.asp"
+    assert strict_portal.stats["login_accepted"] == 1
+
+
+def test_schedule_client_fetches_every_term(portal):
+    async def scenario() -> Dict[str, Tuple]:
+        cookie: str = await _login(portal)
+        async with ScheduleClient(_session_info(portal, cookie), concurrency = 4) as client:
+            terms: List = list(client.terms())
+            htmls: List[str] = await asyncio.gather(
+                *(client.fetch_term(year, semester) for (year, _), (semester, _) in terms)
+            )
+        return {f"{year}-{semester}": extract_table(html) for ((year, _), (semester, _)), html in zip(terms, htmls)}
+
+    tables = asyncio.run(scenario())
+
+    assert sorted(tables) == ["113-1", "113-2", "114-1", "114-2"]
+    assert tables["114-2"][2]
+    for term in ("113-1", "113-2", "114-1"):
+        time_datas, rows_html, no_data = tables[term]
+        assert not no_data and len(rows_html) == 4
+        assert time_datas[1].startswith("星期一")
+        assert len(parse_rows(rows_html)) == 4
+    assert portal.stats["login_accepted"] == 1
+
+
+def test_schedule_client_without_session_gets_the_login_page(portal):
+    async def scenario() -> str:
+        async with ScheduleClient(_session_info(portal, "expired")) as client:
+            return await client.fetch_term("114", "1")
+
+    assert extract_table(asyncio.run(scenario()))[2]
+
+
+def test_mail_logs_in_to_the_mock(portal, tmp_path):
+    (tmp_path / "courses_pie.png").write_bytes(b"\x89PNG\r\n\x1a\n")
+    host, smtp_port = portal.smtp_address
+    mail_configs: Dict = {"host": host, "port": smtp_port, "start_tls": False, "timeout": 5}
+
+    assert asyncio.run(Notifiers.send_mail("report", str(tmp_path), mail_configs)) is True
+    assert portal.stats["smtp_logins"] == 1 and portal.stats["mails"] == 1
+
+
+def test_mail_transport_is_shared_across_sends(portal, tmp_path):
+    host, smtp_port = portal.smtp_address
+    mail_configs: Dict = {"host": host, "port": smtp_port, "start_tls": False, "timeout": 5}
+
+    async def scenario() -> List:
+        transport = Notifiers.mail_transport(mail_configs)
+        try:
+            return [await Notifiers.send_mail(f"report {idx}", str(tmp_path), mail_configs, transport)
+                    for idx in range(3)]
+        finally:
+            await transport.close()
+
+    assert asyncio.run(scenario()) == [True] * 3
+    assert portal.stats["smtp_logins"] == 1 and portal.stats["mails"] == 3
+
+
+def test_mail_with_wrong_password_is_refused(portal, tmp_path, monkeypatch):
+    monkeypatch.setenv("SMTP_PWD", "wrong")
+    host, smtp_port = portal.smtp_address
+
+    assert asyncio.run(Notifiers.send_mail("report", str(tmp_path), {
+        "host": host, "port": smtp_port, "start_tls": False, "timeout": 5
+    })) is None
+    assert portal.stats["smtp_logins_rejected"] and not portal.stats["mails"]
+
+
+def test_mock_smtp_requires_auth_before_mail(portal):
+    async def scenario() -> List[bytes]:
+        reader, writer = await asyncio.open_connection(*portal.smtp_address)
+        replies: List[bytes] = [await reader.readline()]
+        for command in (b"EHLO client\r\n", b"MAIL FROM:<bench@localhost>\r\n", b"QUIT\r\n"):
+            writer.write(command)
+            await writer.drain()
+            reply: bytes = await reader.readline()
+            while reply[3:4] == b"-":
+                replies.append(reply)
+                reply = await reader.readline()
+            replies.append(reply)
+        writer.close()
+        return replies
+
+    replies = asyncio.run(scenario())
+    assert b"250-AUTH PLAIN LOGIN\r\n" in replies
+    assert any(reply.startswith(b"530") for reply in replies)
+
+
+def test_line_goes_through_the_mock(portal, tmp_path):
+    for idx in range(6):
+        (tmp_path / f"img_{idx}.png").write_bytes(b"\x89PNG\r\n\x1a\n" + bytes([idx]))
+    line_configs: Dict = {"upload_url": f"{portal.url}line/upload", "push_url": f"{portal.url}line/push"}
+
+    assert asyncio.run(Notifiers.send_line("report", str(tmp_path), line_configs)) is True
+    assert portal.stats["line_messages"] == 7
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""
+    Created on Sat Oct 24 13:18:44 2026
+
+    @author: Johnson
+"""
+
+import asyncio
+import base64
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiosmtplib import SMTPAuthenticationError
+
+import Notifiers
+from Notifiers import MailTransport
+
+USERNAME: str = "bench@localhost"
+PASSWORD: str = "bench"
+
+
+class AuthSmtpStub:
+    # Minimal SMTP server that advertises AUTH PLAIN LOGIN and refuses mail before a successful login.
+    def __init__(self):
+        self.logins: List[str] = []
+        self.messages: List[bytes] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: List[asyncio.StreamWriter] = []
+
+    async def __aenter__(self) -> "AuthSmtpStub":
+        self._server = await asyncio.start_server(self._session, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        # Sessions a failing client left open would otherwise keep wait_closed() waiting.
+        for writer in self._writers:
+            writer.close()
+        self._server.close()
+        await self._server.wait_closed()
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def _credentials(self, args: List[str], reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter) -> Tuple[str, str]:
+        # AUTH PLAIN <base64 \0user\0password>, or AUTH LOGIN answered over two 334 prompts.
+        if args[1].upper() == "PLAIN":
+            _, user, password = base64.b64decode(args[2]).split(b"\0")
+            return user.decode(), password.decode()
+
+        values: List[str] = []
+        for prompt in (b"VXNlcm5hbWU6", b"UGFzc3dvcmQ6"):
+            writer.write(b"334 " + prompt + b"\r\n")
+            await writer.drain()
+            values.append(base64.b64decode((await reader.readline()).strip()).decode())
+        return values[0], values[1]
+
+    async def _session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        authenticated: bool = False
+        self._writers.append(writer)
+        writer.write(b"220 stub ESMTP\r\n")
+
+        while line := await reader.readline():
+            command: str = line.decode().strip()
+            verb: str = command.split(" ", 1)[0].upper()
+
+            if verb == "EHLO":
+                writer.write(b"250-stub\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+            elif verb == "AUTH":
+                user, password = await self._credentials(command.split(), reader, writer)
+                authenticated = (user, password) == (USERNAME, PASSWORD)
+                if authenticated:
+                    self.logins.append(user)
+                writer.write(b"235 2.7.0 Authentication successful\r\n" if authenticated
+                                else b"535 5.7.8 Authentication credentials invalid\r\n")
+            elif verb == "MAIL" and not authenticated:
+                writer.write(b"530 5.7.0 Authentication required\r\n")
+            elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                writer.write(b"250 OK\r\n")
+            elif verb == "DATA":
+                writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                await writer.drain()
+                body: bytes = b""
+                while (chunk := await reader.readline()) != b".\r\n":
+                    body += chunk
+                self.messages.append(body)
+                writer.write(b"250 OK queued\r\n")
+            elif verb == "QUIT":
+                writer.write(b"221 Bye\r\n")
+                await writer.drain()
+                break
+            else:
+                writer.write(b"502 Command not implemented\r\n")
+            await writer.drain()
+
+        writer.close()
+
+
+def _message() -> MIMEMultipart:
+    msg = MIMEMultipart()
+    msg.attach(MIMEText("report", "plain", "utf-8"))
+    msg["Subject"], msg["From"], msg["To"] = "Report", USERNAME, USERNAME
+    return msg
+
+
+def test_transport_logs_in_before_sending():
+    async def scenario():
+        async with AuthSmtpStub() as stub:
+            async with MailTransport(USERNAME, PASSWORD, host = "127.0.0.1", port = stub.port,
+                                        start_tls = False, timeout = 5) as transport:
+                assert await transport.send(_message()) == {}
+                assert await transport.send(_message()) == {}
+            return stub
+
+    stub = asyncio.run(scenario())
+    assert stub.logins == [USERNAME]
+    assert len(stub.messages) == 2
+
+
+def test_transport_rejects_wrong_password():
+    async def scenario():
+        async with AuthSmtpStub() as stub:
+            with pytest.raises(SMTPAuthenticationError):
+                await MailTransport(USERNAME, "wrong", host = "127.0.0.1", port = stub.port,
+                                    start_tls = False, timeout = 5).connect()
+            return stub
+
+    assert not asyncio.run(scenario()).messages
+
+
+def test_send_mail_with_attachments(tmp_path, monkeypatch):
+    monkeypatch.setenv("MAIL_ADDR", USERNAME)
+    monkeypatch.setenv("SMTP_PWD", PASSWORD)
+    monkeypatch.setenv("TO_ADDR", USERNAME)
+    (tmp_path / "courses_pie.png").write_bytes(b"\x89PNG\r\n\x1a\n" + b"\0" * 32)
+
+    async def scenario():
+        async with AuthSmtpStub() as stub:
+            sent = await Notifiers.send_mail("report", str(tmp_path), {
+                "host": "127.0.0.1", "port": stub.port, "start_tls": False, "timeout": 5
+            })
+            return sent, stub
+
+    sent, stub = asyncio.run(scenario())
+    assert sent is True
+    assert stub.logins == [USERNAME]
+    assert b"courses_pie.png" in stub.messages[0]
+
+
+class LinePushStub:
+    # LINE push endpoint that accepts the first attempt of every batch but answers it with 503,
+    # as if the response was lost, then expects the retry to come back with the same X-Line-Retry-Key.
+    def __init__(self):
+        self.attempts: List[str] = []
+        self.delivered: List[Dict] = []
+        self._runner: Optional[web.AppRunner] = None
+        self.url: str = ""
+
+    async def __aenter__(self) -> "LinePushStub":
+        app = web.Application()
+        app.router.add_post("/push", self._push)
+        self._runner = web.AppRunner(app, access_log = None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", 0).start()
+        self.url = f"http://127.0.0.1:{self._runner.addresses[0][1]}/push"
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._runner.cleanup()
+
+    async def _push(self, request: web.Request) -> web.Response:
+        retry_key: str = request.headers["X-Line-Retry-Key"]
+        first: bool = retry_key not in self.attempts
+        self.attempts.append(retry_key)
+        if not first:
+            return web.json_response({}, status = 409)
+
+        self.delivered.extend((await request.json())["messages"])
+        return web.json_response({}, status = 503)
+
+
+def test_line_push_retry_reuses_key_and_accepts_409():
+    messages: List[Dict] = [{"type": "text", "text": str(idx)} for idx in range(7)]
+
+    async def scenario():
+        async with LinePushStub() as stub:
+            async with aiohttp.ClientSession() as session:
+                await Notifiers._push_messages(
+                    session, {"ACCESS_TOKEN": "token", "USER_ID": "user"}, messages,
+                    {**Notifiers.LINE_DEFAULTS, "push_url": stub.url, "backoff": 0}
+                )
+            return stub
+
+    stub = asyncio.run(scenario())
+    assert stub.delivered == messages
+    # Two batches (5 + 2), each sent twice under one key.
+    assert len(set(stub.attempts)) == 2
+    assert stub.attempts[0] == stub.attempts[1] and stub.attempts[2] == stub.attempts[3]
+
+
+class LineStub:
+    # Upload and push endpoints for send_line(); uploads of "broken" files and pushes holding
+    # a "refused" text fail with HTTP 400, which is not retried.
+    def __init__(self, broken: Tuple[str, ...] = (), refused: Tuple[str, ...] = ()):
+        self.broken, self.refused = broken, refused
+        self.uploads: List[str] = []
+        self.pushes: List[List[Dict]] = []
+        self._runner: Optional[web.AppRunner] = None
+        self.settings: Dict = {}
+
+    async def __aenter__(self) -> "LineStub":
+        app = web.Application()
+        app.router.add_post("/upload", self._upload)
+        app.router.add_post("/push", self._push)
+        self._runner = web.AppRunner(app, access_log = None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", 0).start()
+        base: str = f"http://127.0.0.1:{self._runner.addresses[0][1]}"
+        self.settings = {"upload_url": f"{base}/upload", "push_url": f"{base}/push", "retries": 0, "backoff": 0}
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._runner.cleanup()
+
+    async def _upload(self, request: web.Request) -> web.Response:
+        name: str = (await request.post())["fileToUpload"].filename
+        self.uploads.append(name)
+        if name in self.broken:
+            return web.Response(status = 400)
+        return web.Response(text = f"https://files.example/{name}")
+
+    async def _push(self, request: web.Request) -> web.Response:
+        messages: List[Dict] = (await request.json())["messages"]
+        if any(message.get("text") in self.refused for message in messages):
+            return web.json_response({}, status = 400)
+        self.pushes.append(messages)
+        return web.json_response({})
+
+
+def _images(tmp_path, count: int) -> str:
+    for idx in range(count):
+        (tmp_path / f"img_{idx}.png").write_bytes(b"\x89PNG\r\n\x1a\n" + bytes([idx]))
+    return str(tmp_path)
+
+
+def test_send_line_pushes_nothing_when_an_upload_fails(tmp_path, monkeypatch):
+    monkeypatch.setenv("ACCESS_TOKEN", "token")
+    monkeypatch.setenv("USER_ID", "user")
+    img_dir: str = _images(tmp_path, 3)
+
+    async def scenario():
+        async with LineStub(broken = ("img_1.png",)) as stub:
+            return await Notifiers.send_line("report", img_dir, stub.settings), stub
+
+    sent, stub = asyncio.run(scenario())
+    assert sent is False
+    assert sorted(stub.uploads) == ["img_0.png", "img_1.png", "img_2.png"]
+    assert stub.pushes == []
+
+
+def test_send_line_resumes_after_the_pushed_batches(tmp_path, monkeypatch):
+    monkeypatch.setenv("ACCESS_TOKEN", "token")
+    monkeypatch.setenv("USER_ID", "user")
+    img_dir: str = _images(tmp_path, 7)
+    progress: Dict = {}
+
+    async def attempt(refused: Tuple[str, ...]):
+        async with LineStub(refused = refused) as stub:
+            return await Notifiers.send_line("report", img_dir, stub.settings, progress), stub
+
+    # Batch 1 (5 images) goes out, batch 2 (2 images + text) is refused.
+    sent, first = asyncio.run(attempt(("report",)))
+    assert not sent
+    assert progress["batches"] == 1 and len(progress["retry_keys"]) == 2
+    assert len(first.pushes) == 1 and len(first.pushes[0]) == 5
+
+    # The retry uploads and pushes only what batch 2 needs.
+    sent, second = asyncio.run(attempt(()))
+    assert sent is True
+    assert sorted(second.uploads) == ["img_5.png", "img_6.png"]
+    assert [len(messages) for messages in second.pushes] == [3]
+    assert second.pushes[0][-1] == {"type": "text", "text": "report"}
+    assert progress["batches"] == 2
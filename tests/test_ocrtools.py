@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+    Created on Sun Oct 25 10:41:52 2026
+
+    @author: Johnson
+"""
+
+import random
+import sys
+import types
+from typing import Dict, List
+
+import pytest
+
+import Ocrtools
+from Mocktools import _captcha_png
+
+
+@pytest.fixture
+def paddle_loads(monkeypatch) -> List[Dict]:
+    # Stands in for the paddleocr package, records every model build.
+    loads: List[Dict] = []
+
+    class PaddleOCR:
+        def __init__(self, **kwargs):
+            loads.append(kwargs)
+
+    monkeypatch.setitem(sys.modules, "paddleocr", types.SimpleNamespace(PaddleOCR = PaddleOCR))
+    monkeypatch.setattr(Ocrtools, "_worker_model", None)
+    monkeypatch.setattr(Ocrtools, "_worker_classifier", None)
+    monkeypatch.setattr(Ocrtools, "_worker_settings", {})
+    return loads
+
+
+def _settings(template_dir: str, fast_path: bool = True) -> Dict:
+    return Ocrtools.load_ocr_settings({"template_dir": template_dir, "fast_path": fast_path}, template_dir)
+
+
+def test_init_worker_loads_model_with_incomplete_templates(paddle_loads, tmp_path):
+    rng = random.Random(3)
+    Ocrtools.build_templates([("23577", _captcha_png("23577", rng))], _settings(str(tmp_path)))
+
+    Ocrtools._init_worker(_settings(str(tmp_path)))
+
+    assert Ocrtools._worker_classifier.missing == ["0", "1", "4", "6", "8", "9"]
+    assert Ocrtools._worker_model is not None and len(paddle_loads) == 1
+
+
+def test_init_worker_loads_model_without_fast_path(paddle_loads, tmp_path):
+    Ocrtools._init_worker(_settings(str(tmp_path), fast_path = False))
+
+    assert Ocrtools._worker_classifier is None
+    assert Ocrtools._worker_model is not None and len(paddle_loads) == 1
+
+
+def test_init_worker_skips_model_with_complete_templates(paddle_loads, tmp_path):
+    rng = random.Random(3)
+    Ocrtools.build_templates(
+        [(code, _captcha_png(code, rng)) for code in ("01234", "56789")], _settings(str(tmp_path))
+    )
+
+    Ocrtools._init_worker(_settings(str(tmp_path)))
+
+    assert Ocrtools._worker_classifier.complete
+    assert Ocrtools._worker_model is None and not paddle_loads
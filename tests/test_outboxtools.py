@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+    Created on Sat Oct 24 15:40:32 2026
+
+    @author: Johnson
+"""
+
+import asyncio
+import os
+import sqlite3
+from contextlib import closing
+from typing import Dict, List, Optional
+
+from Outboxtools import Outbox
+
+
+def _outbox(tmp_path, **overrides) -> Outbox:
+    return Outbox({
+        "path": str(tmp_path / "outbox.sqlite3"), "files": str(tmp_path / "outbox_files"),
+        "backoff": 0, "max_backoff": 0, "max_attempts": 3, "drain_timeout": 5, **overrides
+    })
+
+
+def _attachments(tmp_path) -> str:
+    directory = tmp_path / "attachments"
+    directory.mkdir(exist_ok = True)
+    (directory / "courses_pie.jpg").write_bytes(b"pie")
+    return str(directory)
+
+
+def _statuses(tmp_path) -> List[str]:
+    with closing(sqlite3.connect(tmp_path / "outbox.sqlite3")) as conn:
+        return [row[0] for row in conn.execute("select status from outbox order by id")]
+
+
+def test_pending_duplicate_is_enqueued_once(tmp_path):
+    outbox = _outbox(tmp_path)
+    attachments: str = _attachments(tmp_path)
+
+    assert asyncio.run(outbox.enqueue(["mail", "line"], "report", attachments)) == 2
+    assert asyncio.run(outbox.enqueue(["mail", "line"], "report", attachments)) == 0
+    assert asyncio.run(outbox.enqueue(["mail"], "other report", attachments)) == 1
+    assert outbox.pending() == {"mail": 2, "line": 1}
+
+
+def test_sender_gets_the_snapshot_and_it_is_removed_when_all_channels_are_done(tmp_path):
+    outbox = _outbox(tmp_path)
+    attachments: str = _attachments(tmp_path)
+    asyncio.run(outbox.enqueue(["mail", "line"], "report", attachments))
+    (tmp_path / "attachments" / "courses_pie.jpg").write_bytes(b"rebuilt")
+
+    seen: List[bytes] = []
+
+    async def mail(message: str, path: Optional[str], progress: Dict) -> bool:
+        with open(os.path.join(path, "courses_pie.jpg"), "rb") as img_f:
+            seen.append(img_f.read())
+        return True
+
+    async def line(message: str, path: Optional[str], progress: Dict) -> bool:
+        return False
+
+    assert asyncio.run(outbox.drain({"mail": mail}))["mail"] == (1, 0)
+    assert seen == [b"pie"]
+    # The line message still needs the snapshot.
+    assert len(os.listdir(tmp_path / "outbox_files")) == 1
+
+    report = asyncio.run(outbox.drain({"line": line}))
+    assert report["line"] == (0, 0)
+    assert _statuses(tmp_path) == ["sent", "dead"]
+    assert os.listdir(tmp_path / "outbox_files") == []
+
+
+def test_failed_message_backs_off_and_keeps_its_progress(tmp_path):
+    outbox = _outbox(tmp_path, backoff = 60, max_backoff = 60)
+    asyncio.run(outbox.enqueue(["line"], "report"))
+    calls: List[Dict] = []
+
+    async def line(message: str, path: Optional[str], progress: Dict) -> bool:
+        calls.append(dict(progress))
+        progress["batches"] = progress.get("batches", 0) + 1
+        raise RuntimeError("push failed")
+
+    assert asyncio.run(outbox.drain({"line": line}, timeout = 1))["line"] == (0, 1)
+    assert calls == [{}]
+
+    # Make the retry due now, the next attempt resumes from the saved progress.
+    with closing(sqlite3.connect(tmp_path / "outbox.sqlite3")) as conn, conn:
+        conn.execute("update outbox set next_attempt_at = 0")
+    asyncio.run(outbox.drain({"line": line}, timeout = 1))
+    assert calls == [{}, {"batches": 1}]
+
+
+def test_older_outbox_gets_the_progress_column(tmp_path):
+    with closing(sqlite3.connect(tmp_path / "outbox.sqlite3")) as conn, conn:
+        conn.execute(
+            "create table outbox (id integer primary key autoincrement, channel text not null, "
+            "dedup_key text not null, message text not null, attachment_path text, "
+            "status text not null default 'pending', attempts integer not null default 0, "
+            "next_attempt_at real not null, last_error text, created_at real not null, sent_at real)"
+        )
+        conn.execute(
+            "insert into outbox (channel, dedup_key, message, next_attempt_at, created_at) "
+            "values ('mail', 'mail:x', 'old report', 0, 0)"
+        )
+
+    outbox = _outbox(tmp_path)
+    delivered: List[str] = []
+
+    async def mail(message: str, path: Optional[str], progress: Dict) -> bool:
+        delivered.append(message)
+        return True
+
+    assert asyncio.run(outbox.drain({"mail": mail}))["mail"] == (1, 0)
+    assert delivered == ["old report"]
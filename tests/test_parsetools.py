@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+    Created on Sat Oct 24 09:12:40 2026
+
+    @author: Johnson
+"""
+
+import json
+import os
+
+import pytest
+
+from Benchtools import _legacy_parse_row, bench_parser
+from Parsetools import FREE_PERIOD, TimetableRow, parse_rows, parse_table
+
+FIXTURE_PATH: str = os.path.join(os.path.dirname(__file__), "..", "bench_fixtures", "schedule_rows.json")
+
+
+def _cell(*segments: str) -> str:
+    return f"<td>{'<br>'.join(segments)}</td>"
+
+
+def _row(period: str, start: str, end: str, *cells: str) -> str:
+    return f"<tr class=\"text-center\">{_cell(period, start, end)}{''.join(cells)}</tr>"
+
+
+def test_parse_rows_keeps_each_course_in_its_cell():
+    html: str = _row(
+        "1", "0810", "0900",
+        _cell("<a class=\"course\">微積分(一)</a>", "Calculus(I)", "王大明", "E288", "3"),
+        "<td>　</td>",
+        _cell("物理(一)", "Physics(I)", "李建宏", "E210", "3"),
+        _cell("空堂", "Free"),
+        _cell("體育", "Physical Education", "王大明", "E138", "3"),
+        "<td>　</td>", "<td>　</td>",
+    )
+
+    assert parse_rows([html]) == [TimetableRow(
+        "0810-0900", "微積分(一) - Calculus(I)", FREE_PERIOD, "物理(一) - Physics(I)",
+        FREE_PERIOD, "體育 - Physical Education",
+    )]
+
+
+def test_noise_segments_do_not_shift_the_course_name():
+    # A category segment ("音樂欣賞類", "遠距教學") before the English name is skipped.
+    html: str = _row(
+        "2", "0910", "1000",
+        _cell("應用中文(一)", "遠距教學", "Applied Chinese(I)", "E224", "3"),
+        _cell("通識", "音樂欣賞類", "General Education", "E164", "3"),
+        *["<td>　</td>"] * 5,
+    )
+
+    row: TimetableRow = parse_rows([html])[0]
+    assert row.mon == "應用中文(一) - Applied Chinese(I)"
+    assert row.tue == "通識 - General Education"
+    assert row.wed == row.thr == row.fri == FREE_PERIOD
+
+
+def test_parse_table_reads_concatenated_rows():
+    rows = [_row(str(period), "0810", "0900", *["<td>　</td>"] * 7) for period in range(3)]
+    assert len(parse_table("".join(rows))) == 3
+
+
+def test_short_row_is_rejected():
+    with pytest.raises(ValueError):
+        parse_rows([_row("1", "0810", "0900", "<td>　</td>")])
+
+
+def test_fixture_matches_legacy_parser():
+    with open(FIXTURE_PATH, "r", encoding = "utf-8") as json_f:
+        tables = json.load(json_f)
+
+    for rows_html in tables:
+        assert [list(row) for row in parse_rows(rows_html)] == [_legacy_parse_row(html) for html in rows_html]
+
+
+def test_bench_parser_reports_no_mismatch():
+    report = bench_parser(FIXTURE_PATH, repeat = 1, rounds = 1)
+    assert report["tables"] and not report["mismatches"]
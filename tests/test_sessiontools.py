@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+    Created on Sat Oct 24 09:40:17 2026
+
+    @author: Johnson
+"""
+
+import os
+import time
+from typing import Dict, List
+
+from cryptography.fernet import Fernet
+
+from Sessiontools import SessionStore
+
+URL: str = "https://portal.example/"
+COOKIES: List[Dict] = [
+    {"name": "ASPSESSIONID", "value": "abc", "path": "/", "domain": "portal.example", "secure": True, "httpOnly": True},
+    {"name": "lang", "value": "zh", "path": "/", "domain": "portal.example", "expiry": 4102444800},
+]
+
+
+class FakeDriver:
+    # Just the WebDriver surface SessionStore touches.
+    def __init__(self, cookies: List[Dict] = (), landing: str = "news.asp"):
+        self._cookies: List[Dict] = list(cookies)
+        self._landing: str = landing
+        self.added: List[Dict] = []
+        self.current_url: str = ""
+
+    def get_cookies(self) -> List[Dict]:
+        return self._cookies
+
+    def add_cookie(self, cookie: Dict) -> None:
+        self.added.append(cookie)
+
+    def get(self, url: str) -> None:
+        self.current_url = URL + self._landing if url.endswith("news.asp") else url
+
+
+def test_disabled_without_key(tmp_path, monkeypatch):
+    monkeypatch.delenv("SESSION_KEY", raising = False)
+    store = SessionStore(str(tmp_path / "session.bin"))
+
+    assert not store.enabled
+    assert store.save(FakeDriver(COOKIES)) is None
+    assert not os.path.exists(tmp_path / "session.bin")
+
+
+def test_invalid_key_disables_cache(tmp_path):
+    assert not SessionStore(str(tmp_path / "session.bin"), key = "not-a-fernet-key").enabled
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path: str = str(tmp_path / "session.bin")
+    store = SessionStore(path, key = Fernet.generate_key().decode())
+
+    assert store.save(FakeDriver(COOKIES))
+    assert b"ASPSESSIONID" not in open(path, "rb").read()
+    assert os.stat(path).st_mode & 0o777 == 0o600
+    assert store.load() == COOKIES
+
+
+def test_other_key_clears_cache(tmp_path):
+    path: str = str(tmp_path / "session.bin")
+    SessionStore(path, key = Fernet.generate_key().decode()).save(FakeDriver(COOKIES))
+
+    assert SessionStore(path, key = Fernet.generate_key().decode()).load() is None
+    assert not os.path.exists(path)
+
+
+def test_stale_cache_is_not_available(tmp_path):
+    path: str = str(tmp_path / "session.bin")
+    store = SessionStore(path, key = Fernet.generate_key().decode(), max_age = 60)
+    store.save(FakeDriver(COOKIES))
+
+    stale: float = time.time() - 120
+    os.utime(path, (stale, stale))
+    assert not store.available()
+    assert store.load() is None
+
+
+def test_restore_adds_cookies_and_checks_landing(tmp_path):
+    store = SessionStore(str(tmp_path / "session.bin"), key = Fernet.generate_key().decode())
+    store.save(FakeDriver(COOKIES))
+
+    driver = FakeDriver()
+    assert store.restore(driver, URL)
+    assert [cookie["name"] for cookie in driver.added] == ["ASPSESSIONID", "lang"]
+
+
+def test_rejected_session_is_cleared(tmp_path):
+    path: str = str(tmp_path / "session.bin")
+    store = SessionStore(path, key = Fernet.generate_key().decode())
+    store.save(FakeDriver(COOKIES))
+
+    assert store.restore(FakeDriver(landing = ""), URL) is None
+    assert not os.path.exists(path)
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+    Created on Sat Oct 24 16:22:57 2026
+
+    @author: Johnson
+"""
+
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+from Telemetrytools import PROMETHEUS_FILENAME, RUN_FILE_PREFIX, Telemetry
+
+
+def test_span_records_duration_labels_and_errors():
+    telemetry = Telemetry()
+    with telemetry.span("parse", term = "114-1"):
+        time.sleep(0.01)
+    with pytest.raises(ValueError):
+        with telemetry.span("parse", term = "113-2"):
+            raise ValueError("broken row")
+
+    summary = telemetry.summary()
+    assert summary["stages"]["parse"]["count"] == 2
+    assert summary["stages"]["parse"]["errors"] == 1
+    assert summary["stages"]["parse"]["max"] >= 0.01
+    assert [span["labels"]["term"] for span in summary["spans"]] == ["114-1", "113-2"]
+
+
+def test_timed_wraps_sync_and_async_functions():
+    telemetry = Telemetry()
+
+    @telemetry.timed("store")
+    def store(value: int) -> int:
+        return value * 2
+
+    @telemetry.timed("notify", channel = "mail")
+    async def notify(value: int) -> int:
+        await asyncio.sleep(0)
+        return value + 1
+
+    assert store(2) == 4
+    assert asyncio.run(notify(1)) == 2
+    assert store.__name__ == "store"
+
+    spans = telemetry.summary()["spans"]
+    assert [(span["stage"], span["labels"]) for span in spans] == [("store", {}), ("notify", {"channel": "mail"})]
+
+
+def test_sampler_blames_the_blocking_span():
+    telemetry = Telemetry()
+
+    async def run():
+        telemetry.start_sampler(interval = 0.01, threshold = 0.05)
+        await asyncio.sleep(0.03)
+        with telemetry.span("screenshot"):
+            time.sleep(0.2)
+        await asyncio.sleep(0.03)
+        await telemetry.stop_sampler()
+
+    asyncio.run(run())
+    summary = telemetry.summary()
+
+    assert summary["loop_lag"]["samples"] > 0
+    assert summary["loop_lag"]["max"] >= 0.1
+    assert summary["stalls"] and summary["stalls"][0]["suspects"] == ["screenshot"]
+    assert summary["spans"][0]["on_loop"]
+
+
+def test_prometheus_text():
+    telemetry = Telemetry()
+    with telemetry.span("login_attempt"):
+        pass
+
+    text: str = telemetry.to_prometheus(telemetry.summary())
+    assert "# TYPE course_fetcher_stage_duration_seconds summary" in text
+    assert "course_fetcher_stage_duration_seconds_count{stage=\"login_attempt\"} 1" in text
+    assert "course_fetcher_event_loop_stalls 0" in text
+
+
+def test_prometheus_splits_stages_by_label():
+    telemetry = Telemetry()
+    for term in ("113-2", "114-1", "114-1"):
+        with telemetry.span("scrape", term = term):
+            pass
+
+    summary = telemetry.summary()
+    assert summary["stages"]["scrape"]["count"] == 3
+    assert [(entry["labels"]["term"], entry["count"]) for entry in summary["series"]] == [("113-2", 1), ("114-1", 2)]
+
+    text: str = telemetry.to_prometheus(summary)
+    assert "course_fetcher_stage_duration_seconds_count{stage=\"scrape\",term=\"113-2\"} 1" in text
+    assert "course_fetcher_stage_duration_seconds_count{stage=\"scrape\",term=\"114-1\"} 2" in text
+
+
+def test_export_writes_run_and_keeps_the_latest(tmp_path):
+    for idx in range(3):
+        (tmp_path / f"{RUN_FILE_PREFIX}2026010{idx}-000000.json").write_text("{}", encoding = "utf-8")
+
+    telemetry = Telemetry()
+    with telemetry.span("parse"):
+        pass
+    assert telemetry.export(str(tmp_path), keep = 2)
+
+    runs = sorted(file for file in os.listdir(tmp_path) if file.startswith(RUN_FILE_PREFIX))
+    assert len(runs) == 2
+    with open(tmp_path / runs[-1], "r", encoding = "utf-8") as json_f:
+        assert json.load(json_f)["stages"]["parse"]["count"] == 1
+    assert (tmp_path / PROMETHEUS_FILENAME).exists()
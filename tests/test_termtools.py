@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+    Created on Sat Oct 24 10:05:51 2026
+
+    @author: Johnson
+"""
+
+import datetime
+import json
+
+import pytest
+
+from Termtools import FingerprintStore, current_term, fingerprint, is_recent
+
+
+@pytest.mark.parametrize("today, term", [
+    (datetime.date(2025, 8, 1), (114, 1)),
+    (datetime.date(2025, 12, 31), (114, 1)),
+    (datetime.date(2026, 1, 15), (114, 1)),
+    (datetime.date(2026, 2, 1), (114, 2)),
+    (datetime.date(2026, 7, 31), (114, 2)),
+])
+def test_current_term_boundaries(today, term):
+    assert current_term(today) == term
+
+
+def test_is_recent():
+    today = datetime.date(2026, 3, 1)
+    assert is_recent("114-2", today)
+    assert is_recent("115-1", today)
+    assert not is_recent("114-1", today)
+    assert not is_recent("113-2", today)
+    assert is_recent("not-a-term", today)
+
+
+def test_fingerprint_follows_content():
+    rows = [("0810-0900", "A", "B", "C", "D", "E")]
+    assert fingerprint(("", "Mon"), rows) == fingerprint(["", "Mon"], [list(rows[0])])
+    assert fingerprint(("", "Mon"), rows) != fingerprint(("", "Tue"), rows)
+
+
+def test_unknown_term_needs_visit(tmp_path):
+    store = FingerprintStore(str(tmp_path / "fingerprints.json"))
+    assert store.needs_visit("114-1")
+    assert not store.unchanged("114-1", "digest")
+
+
+def test_record_save_and_reload(tmp_path):
+    path: str = str(tmp_path / "fingerprints.json")
+    store = FingerprintStore(path)
+    store.record("114-1", "digest")
+    assert store.save()
+
+    reloaded = FingerprintStore(path)
+    assert not reloaded.needs_visit("114-1")
+    assert reloaded.unchanged("114-1", "digest")
+    assert not reloaded.unchanged("114-1", "other")
+
+
+def test_old_entry_needs_visit_and_touch_refreshes(tmp_path):
+    store = FingerprintStore(str(tmp_path / "fingerprints.json"), stale_after = 60)
+    store.record("114-1", "digest")
+    store._terms["114-1"]["fetched_at"] -= 120
+
+    assert store.needs_visit("114-1")
+    store.touch("114-1")
+    assert not store.needs_visit("114-1")
+
+
+def test_mark_stale(tmp_path):
+    path: str = str(tmp_path / "fingerprints.json")
+    store = FingerprintStore(path)
+    store.record("113-2", "a")
+    store.record("114-1", "b")
+    store.save()
+
+    assert store.mark_stale(["114-1", "999-9"]) == ["114-1"]
+    assert store.needs_visit("114-1") and not store.unchanged("114-1", "b")
+    assert not store.needs_visit("113-2")
+
+    assert sorted(store.mark_stale()) == ["113-2", "114-1"]
+    store.save()
+    assert all(entry["stale"] for entry in json.load(open(path, encoding = "utf-8")).values())
+
+
+def test_corrupt_file_starts_empty(tmp_path):
+    path = tmp_path / "fingerprints.json"
+    path.write_text("{not json", encoding = "utf-8")
+    assert FingerprintStore(str(path)).needs_visit("114-1")
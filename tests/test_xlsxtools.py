@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+    Created on Sat Oct 24 10:31:09 2026
+
+    @author: Johnson
+"""
+
+import os
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from Xlsxtools import WorkbookSink
+
+
+def _frame(course: str) -> pd.DataFrame:
+    return pd.DataFrame({"time": ["0810-0900", "0910-1000"], "mon": [course, None]})
+
+
+def test_empty_flush_writes_nothing(tmp_path):
+    path: str = str(tmp_path / "schedule.xlsx")
+    assert WorkbookSink(path).flush()
+    assert not os.path.exists(path)
+
+
+def test_flush_writes_every_sheet(tmp_path):
+    path: str = str(tmp_path / "schedule.xlsx")
+    sink = WorkbookSink(path)
+    sink.add("114-1", _frame("Calculus"))
+    sink.add("113-2", _frame("Physics"))
+    assert sink.flush()
+
+    book = load_workbook(path)
+    assert book.sheetnames == ["114-1", "113-2"]
+    assert [cell.value for cell in book["114-1"][1]] == ["time", "mon"]
+    assert book["114-1"]["B2"].value == "Calculus"
+    assert book["114-1"]["B3"].value is None
+    assert book["114-1"]["A1"].font.bold
+    assert not os.path.exists(f"{path}.tmp")
+
+
+def test_later_flush_keeps_untouched_sheets_in_order(tmp_path):
+    path: str = str(tmp_path / "schedule.xlsx")
+    first = WorkbookSink(path)
+    first.add("113-2", _frame("Physics"))
+    first.add("114-1", _frame("Calculus"))
+    first.flush()
+
+    second = WorkbookSink(path)
+    second.add("114-1", _frame("Algebra"))
+    second.add("114-2", _frame("Chemistry"))
+    assert second.flush()
+
+    book = load_workbook(path)
+    assert book.sheetnames == ["113-2", "114-1", "114-2"]
+    assert book["113-2"]["B2"].value == "Physics"
+    assert book["114-1"]["B2"].value == "Algebra"
+    assert book["113-2"]["A1"].font.bold
+
+
+def test_flushed_frames_are_not_written_twice(tmp_path):
+    path: str = str(tmp_path / "schedule.xlsx")
+    sink = WorkbookSink(path)
+    sink.add("114-1", _frame("Calculus"))
+    sink.flush()
+
+    mtime: float = os.path.getmtime(path)
+    assert sink.flush()
+    assert os.path.getmtime(path) == mtime
+
+
+def test_failed_flush_keeps_frames(tmp_path):
+    path = tmp_path / "schedule.xlsx"
+    path.write_bytes(b"not a workbook")
+    sink = WorkbookSink(str(path))
+    sink.add("114-1", _frame("Calculus"))
+
+    assert sink.flush() is None
+    path.unlink()
+    assert sink.flush()
+    assert load_workbook(str(path)).sheetnames == ["114-1"]